@@ -6,27 +6,42 @@ PRODUCTION READY VERSION
 
 from src.crisis.resources import CrisisResources
 from src.crisis.detector import CrisisDetector
-from rewriter import HybridRewriter
+from src.components import ComponentRegistry
 from src.auth.routes import create_auth_blueprint
 from src.db.client import get_collection
 from src.db.models import AnalysisRecord
 from src.history.routes import create_history_blueprint
-import PyPDF2
+from src.inference.batcher import BatchQueueFullError, MicroBatcher
+from src.cache import SqliteCacheBackend
+from src.inference.cache import MongoCacheBackend, ScoreCache
+from src.extraction import UploadLines
+from src.lexicon import Redactor
+from src.pipeline import Stage, StageGraph
+from src.rewriting.deferred import DeferredRewriter
+from src.rewriting.cache import RewriteCache
+from src.inference.scoring import iter_line_results, score_texts as score_many_texts
+from src.inference.runtime import RuntimeConfig, apply_runtime, runtime_layout
+from src.inference.pool import InferencePool, load_detoxify
+from src.jobs.manager import JobManager, serialize_job
+import functools
+import gc
 import io
+import json
 import logging
-import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 from bson import ObjectId
 from bson.errors import InvalidId
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
-from textblob import TextBlob
-from detoxify import Detoxify
 from pymongo.errors import PyMongoError
 from flask_jwt_extended import JWTManager, get_jwt_identity, jwt_required
 from flask_cors import CORS
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 import sys
 import os
 
@@ -123,9 +138,106 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def validate_upload():
+    """Return an error response if the request has no usable file, else None"""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file uploaded'}), 400
+
+    file = request.files['file']
+
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'Only .txt and .pdf files allowed'}), 400
+
+    return None
+
+
+# Micro-batching configuration for single-text scoring
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', '16'))
+BATCH_MAX_WAIT_MS = float(os.getenv('BATCH_MAX_WAIT_MS', '5'))
+BATCH_MAX_QUEUE = int(os.getenv('BATCH_MAX_QUEUE', '256'))
+BATCH_TIMEOUT_SECONDS = float(os.getenv('BATCH_TIMEOUT_SECONDS', '30'))
+
+# Optional quantized CPU inference, e.g. DETOXIFY_QUANTIZE=int8
+DETOXIFY_QUANTIZE = os.getenv('DETOXIFY_QUANTIZE') or None
+# Inference backend: torch (eager), torchscript or onnx
+DETOXIFY_BACKEND = os.getenv('DETOXIFY_BACKEND', 'torch')
+# Load weights, HF config and tokenizer from the local artifact store (offline after first run)
+DETOXIFY_ARTIFACT_STORE = os.getenv(
+    'DETOXIFY_ARTIFACT_STORE', 'True').lower() == 'true'
+# Map weights from the artifact store file so all workers on a host share one copy
+DETOXIFY_MMAP_WEIGHTS = os.getenv(
+    'DETOXIFY_MMAP_WEIGHTS', 'False').lower() == 'true'
+
+# Texts per forward pass when scoring uploaded files
+UPLOAD_BATCH_SIZE = int(os.getenv('UPLOAD_BATCH_SIZE', '32'))
+# Uploaded lines are scored UPLOAD_CHUNK_SIZE at a time while the file is still
+# being extracted. With UPLOAD_INFERENCE_WORKERS > 1 chunks are scored on worker
+# threads in the background. Torch already spreads one forward pass over all
+# intra-op threads, so this only pays off when those are limited per worker.
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', '256'))
+UPLOAD_INFERENCE_WORKERS = int(os.getenv('UPLOAD_INFERENCE_WORKERS', '1'))
+upload_executor = ThreadPoolExecutor(
+    max_workers=UPLOAD_INFERENCE_WORKERS,
+    thread_name_prefix='upload-inference'
+) if UPLOAD_INFERENCE_WORKERS > 1 else None
+
+# Threads running independent /api/analyze stages (toxicity, sentiment, crisis,
+# redaction, rewrite) in parallel; 0 or 1 runs them one after another
+ANALYZE_WORKERS = int(os.getenv('ANALYZE_WORKERS', '8'))
+analyze_executor = ThreadPoolExecutor(
+    max_workers=ANALYZE_WORKERS,
+    thread_name_prefix='analyze-stage'
+) if ANALYZE_WORKERS > 1 else None
+
+# Latency budget for Groq rewrites. Slower rewrites return the rule-based
+# result at once and finish in the background (GET /api/rewrites/<id>)
+REWRITE_BUDGET_SECONDS = float(os.getenv('REWRITE_BUDGET_SECONDS', '1.5'))
+REWRITE_WORKERS = int(os.getenv('REWRITE_WORKERS', '8'))
+
+# Background analysis jobs (POST /api/jobs): worker threads per process and
+# lines scored per progress update
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+JOB_CHUNK_SIZE = int(os.getenv('JOB_CHUNK_SIZE', '256'))
+
+# Toxicity score cache (SCORE_CACHE_SIZE=0 disables it, SCORE_CACHE_BACKEND=mongo
+# adds a tier shared by all workers)
+SCORE_CACHE_SIZE = int(os.getenv('SCORE_CACHE_SIZE', '10000'))
+SCORE_CACHE_TTL_SECONDS = float(os.getenv('SCORE_CACHE_TTL_SECONDS', '3600'))
+SCORE_CACHE_BACKEND = os.getenv('SCORE_CACHE_BACKEND', 'memory').lower()
+
+# Groq rewrite cache (REWRITE_CACHE_SIZE=0 disables it, REWRITE_CACHE_PATH adds
+# an SQLite file that keeps rewrites across restarts)
+REWRITE_CACHE_SIZE = int(os.getenv('REWRITE_CACHE_SIZE', '2000'))
+REWRITE_CACHE_TTL_SECONDS = float(os.getenv('REWRITE_CACHE_TTL_SECONDS', '86400'))
+REWRITE_CACHE_PATH = os.getenv('REWRITE_CACHE_PATH') or None
+
+# Estimated prompt tokens per Groq request when rewriting uploaded lines in bulk
+REWRITE_BATCH_TOKENS = int(os.getenv('REWRITE_BATCH_TOKENS', '2000'))
+
+# Load all components while app.py is imported rather than on first use
+WARM_UP_ON_IMPORT = os.getenv('WARM_UP_ON_IMPORT', 'False').lower() == 'true'
+
+# Torch thread pools for `python app.py` (gunicorn.conf.py applies them per
+# worker): 0 keeps the torch default. INFERENCE_CPU_AFFINITY is empty (no
+# pinning), 'auto' or a CPU list such as '0-3'
+INFERENCE_INTRA_OP_THREADS = int(os.getenv('INFERENCE_INTRA_OP_THREADS', '0'))
+INFERENCE_INTER_OP_THREADS = int(os.getenv('INFERENCE_INTER_OP_THREADS', '0'))
+INFERENCE_CPU_AFFINITY = os.getenv('INFERENCE_CPU_AFFINITY', '')
+
+# Run Detoxify in this many dedicated worker processes (each with its own
+# replica, split over the CPUs like above) instead of in the request threads;
+# 0 scores in-process
+INFERENCE_POOL_WORKERS = int(os.getenv('INFERENCE_POOL_WORKERS', '0'))
+
 # Global model variables
 model = None
+batcher = None
+score_cache = None
 rewriter = None
+deferred_rewriter = None
 crisis_detector = None
 
 
@@ -151,31 +263,141 @@ TOXIC_WORDS = [
     'bullshit'
 ]
 
+# Optional lexicon file (one term per line) replacing TOXIC_WORDS; edits are
+# picked up without a restart, checked every TOXIC_WORDS_RELOAD_SECONDS
+TOXIC_WORDS_FILE = os.getenv('TOXIC_WORDS_FILE') or None
+TOXIC_WORDS_RELOAD_SECONDS = float(
+    os.getenv('TOXIC_WORDS_RELOAD_SECONDS', '5'))
+toxic_redactor = Redactor(
+    TOXIC_WORDS,
+    path=TOXIC_WORDS_FILE,
+    reload_interval=TOXIC_WORDS_RELOAD_SECONDS
+)
+
+
+def build_score_cache():
+    """Create the toxicity score cache for the configured model"""
+    if SCORE_CACHE_SIZE <= 0:
+        return None
+    shared_backend = None
+    if SCORE_CACHE_BACKEND == 'mongo':
+        shared_backend = MongoCacheBackend(get_collection(
+            MONGO_URI, MONGO_DB_NAME, 'score_cache'))
+    model_id = f"unbiased:{DETOXIFY_QUANTIZE or 'fp32'}:{DETOXIFY_BACKEND}"
+    return ScoreCache(
+        model_id,
+        max_size=SCORE_CACHE_SIZE,
+        ttl_seconds=SCORE_CACHE_TTL_SECONDS,
+        shared_backend=shared_backend
+    )
+
 
 def load_model():
     """Load Detoxify model with error handling"""
-    global model
+    global model, batcher, score_cache
     try:
         logger.info("🔄 Loading Detoxify model...")
-        model = Detoxify('unbiased')
-        logger.info("✅ Detoxify model loaded successfully!")
+        detoxify_options = dict(quantize=DETOXIFY_QUANTIZE,
+                                backend=DETOXIFY_BACKEND,
+                                artifact_store=DETOXIFY_ARTIFACT_STORE,
+                                mmap_weights=DETOXIFY_MMAP_WEIGHTS)
+        if isinstance(model, InferencePool):
+            model.close()
+        if INFERENCE_POOL_WORKERS > 0:
+            # The workers import Detoxify; this process never loads the model.
+            # The pool starts them on its first request in each process, so a
+            # preloading gunicorn master never runs workers of its own.
+            model = InferencePool(
+                functools.partial(load_detoxify, 'unbiased',
+                                  **detoxify_options),
+                workers=INFERENCE_POOL_WORKERS,
+                intra_op_threads=INFERENCE_INTRA_OP_THREADS,
+                inter_op_threads=INFERENCE_INTER_OP_THREADS,
+                cpu_affinity=INFERENCE_CPU_AFFINITY,
+                attributes=('quantize', 'backend',
+                            'load_seconds', 'mmap_weights'),
+                warm_up_text='warm up'
+            )
+        else:
+            # Imported here: torch and transformers dominate the import time of app.py
+            from detoxify import Detoxify
+            model = Detoxify('unbiased', **detoxify_options)
+        if batcher is not None:
+            batcher.close()
+        batcher = MicroBatcher(
+            model.predict,
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS,
+            max_queue_size=BATCH_MAX_QUEUE,
+            # One batch in flight per pool worker
+            workers=max(1, INFERENCE_POOL_WORKERS)
+        )
+        score_cache = build_score_cache()
+        if isinstance(model, InferencePool):
+            logger.info(
+                f"✅ Inference pool ready: {model.workers} workers load Detoxify on first use")
+        else:
+            logger.info(
+                f"✅ Detoxify model loaded successfully in {model.load_seconds:.2f}s!")
         return True
     except Exception as e:
         logger.error(f"❌ Failed to load Detoxify model: {str(e)}")
         return False
 
 
+def apply_deferred_rewrite(rewrite_id, document):
+    """Store a finished background Groq rewrite on its analysis record"""
+    if not document or document['status'] != 'completed' or not ObjectId.is_valid(rewrite_id):
+        return
+    try:
+        history_collection.update_one(
+            {'_id': ObjectId(rewrite_id)},
+            {'$set': {
+                'rewrite_suggestion': document['rewritten_text'],
+                'rewrite_method': document['method_used']
+            }}
+        )
+    except PyMongoError as db_error:
+        logger.error(f"Failed to store deferred rewrite: {db_error}")
+
+
+def build_rewrite_cache():
+    """Create the Groq rewrite cache"""
+    if REWRITE_CACHE_SIZE <= 0:
+        return None
+    persistent_backend = None
+    if REWRITE_CACHE_PATH:
+        persistent_backend = SqliteCacheBackend(REWRITE_CACHE_PATH, table='rewrites')
+    return RewriteCache(
+        max_size=REWRITE_CACHE_SIZE,
+        ttl_seconds=REWRITE_CACHE_TTL_SECONDS,
+        persistent_backend=persistent_backend
+    )
+
+
 def load_rewriter():
     """Load Hybrid Rewriter (Groq + Rules)"""
-    global rewriter
+    global rewriter, deferred_rewriter
     try:
         logger.info("🔄 Initializing Hybrid Rewriter...")
+        from rewriter import HybridRewriter
         api_key = os.getenv('GROQ_API_KEY')
         prefer_local = os.getenv('PREFER_LOCAL', 'False').lower() == 'true'
+        # Optional JSON file replacing the rule-based replacement tables
+        rules_path = os.getenv('REWRITER_RULES_FILE') or None
 
         rewriter = HybridRewriter(
             groq_api_key=api_key,
-            prefer_local=prefer_local
+            prefer_local=prefer_local,
+            rules_path=rules_path,
+            cache=build_rewrite_cache()
+        )
+        deferred_rewriter = DeferredRewriter(
+            rewriter,
+            get_collection(MONGO_URI, MONGO_DB_NAME, 'rewrites'),
+            budget_seconds=REWRITE_BUDGET_SECONDS,
+            max_workers=REWRITE_WORKERS,
+            on_complete=apply_deferred_rewrite
         )
         logger.info("✅ Hybrid Rewriter initialized!")
         return True
@@ -197,15 +419,98 @@ def load_crisis_detector():
         return False
 
 
-# Ensure core components are loaded
-detoxify_loaded = load_model()
-rewriter_loaded = load_rewriter()
-crisis_loaded = load_crisis_detector()
+# Each component is imported and initialized once per process, on first use by
+# a route or in warm_up(); /api/health reports the load time of each one
+components = ComponentRegistry()
+components.register('detoxify', load_model)
+components.register('rewriter', load_rewriter)
+components.register('crisis_detector', load_crisis_detector)
+
+
+def is_preflight():
+    """CORS preflight requests are answered without loading any component"""
+    return request.method == 'OPTIONS'
+
+
+def warm_up():
+    """Load every component now instead of on first use"""
+    results = components.warm_up()
+    # Under a preloading server (gunicorn --preload) everything loaded here is
+    # inherited copy-on-write by the forked workers. Freezing the GC stops the
+    # collector from writing to those objects and un-sharing their pages.
+    gc.collect()
+    gc.freeze()
+    return results
+
+
+if WARM_UP_ON_IMPORT:
+    warm_up()
+
+
+def warm_up_inference():
+    """Run one forward pass so the first request does not pay for lazy kernel setup"""
+    if model is None:
+        return None
+    start = time.perf_counter()
+    model.predict('warm up')
+    seconds = time.perf_counter() - start
+    logger.info(f"🔥 Inference warmed up in {seconds:.2f}s")
+    return seconds
+
+
+def create_app():
+    """WSGI application factory: load every component, then return the app
+
+    gunicorn calls it as "app:create_app()" (see gunicorn.conf.py). With
+    preload_app it runs once in the master and the forked workers inherit the
+    loaded components; each worker then runs warm_up_inference() before it
+    accepts connections.
+    """
+    warm_up()
+    return app
+
+
+def score_text(text):
+    """Score a single text, sharing a forward pass with concurrent requests"""
+    if score_cache is not None:
+        cached = score_cache.get(text)
+        if cached is not None:
+            return cached
+
+    if batcher is not None:
+        scores = batcher.predict(text, timeout=BATCH_TIMEOUT_SECONDS)
+    else:
+        scores = {k: float(v) for k, v in model.predict(text).items()}
+
+    if score_cache is not None:
+        score_cache.set(text, scores)
+    return scores
+
+
+def score_texts(texts):
+    """Score many texts in batches, scoring each distinct uncached text once"""
+    return score_many_texts(
+        texts,
+        model.predict_batch,
+        cache=score_cache,
+        batch_size=UPLOAD_BATCH_SIZE
+    )
+
+
+# Worker pool for background analysis jobs; job state and results live in MongoDB
+job_manager = JobManager(
+    get_collection(MONGO_URI, MONGO_DB_NAME, 'jobs'),
+    get_collection(MONGO_URI, MONGO_DB_NAME, 'job_results'),
+    score_texts,
+    max_workers=JOB_WORKERS,
+    chunk_size=JOB_CHUNK_SIZE
+)
 
 
 def analyze_sentiment(text):
     """Analyze sentiment using TextBlob"""
     try:
+        from textblob import TextBlob
         blob = TextBlob(text)
         polarity = blob.sentiment.polarity
         subjectivity = blob.sentiment.subjectivity
@@ -248,20 +553,10 @@ def analyze_sentiment(text):
 
 
 def clean_toxic_text(text, toxic_words=None):
-    """Clean toxic words from text with case-insensitive matching"""
+    """Redact toxic words (case-insensitive, longest match first) in one pass"""
     if toxic_words is None:
-        toxic_words = TOXIC_WORDS
-
-    cleaned_text = text
-    toxic_words_found = []
-
-    for word in toxic_words:
-        pattern = re.compile(re.escape(word), re.IGNORECASE)
-        if pattern.search(cleaned_text):
-            toxic_words_found.append(word)
-            cleaned_text = pattern.sub('[REDACTED]', cleaned_text)
-
-    return cleaned_text, toxic_words_found
+        return toxic_redactor.redact(text)
+    return Redactor(toxic_words).redact(text)
 
 
 def validate_input(text):
@@ -302,15 +597,85 @@ def health_check():
         'status': 'healthy',
         'service': 'Toxicity Detection + Mental Health Crisis System',
         'detoxify_loaded': model is not None,
+        'quantization': (model.quantize or 'none') if model else None,
+        'inference_backend': model.backend if model else None,
+        # None for an inference pool that has not scored anything yet
+        'model_load_seconds': round(model.load_seconds, 3) if model and model.load_seconds is not None else None,
+        'weights_mmapped': model.mmap_weights if model else None,
         'rewriter_loaded': rewriter is not None,
+        # Load status and seconds per component; reading it loads nothing
+        'components': components.status(),
         'crisis_detector_loaded': crisis_detector is not None,
         'groq_available': rewriter.groq.is_available if rewriter else False,
+        # Cached result of the background probe; never waits on Groq
+        'groq_health': rewriter.groq.health_status() if rewriter else None,
+        'micro_batching': batcher.stats() if batcher else None,
+        # Torch threads and CPU set of the worker process that answered
+        'inference_runtime': runtime_layout(),
+        # Worker pids, restarts and requests in flight when scoring runs in a pool
+        'inference_pool': model.stats() if isinstance(model, InferencePool) else None,
         'timestamp': datetime.now().isoformat()
     })
 
 
+def build_analysis_graph(text, country, rewrite_id=None):
+    """Stage graph behind /api/analyze for one text"""
+
+    def detect_crisis_risk():
+        if crisis_detector is None:
+            return None, None
+        try:
+            crisis_risk = crisis_detector.detect_risk(text)
+            resources = None
+
+            # Attach resources if crisis detected
+            if crisis_risk['risk_level'] in ['IMMINENT', 'HIGH']:
+                resources = CrisisResources.get_resources(country)
+                logger.warning(
+                    f"⚠️ MENTAL HEALTH CRISIS DETECTED: {crisis_risk['risk_level']}")
+            return crisis_risk, resources
+
+        except Exception as e:
+            logger.error(f"Crisis detection error: {e}")
+            return {'risk_level': 'UNKNOWN', 'error': str(e)}, None
+
+    def cleaned_sentiment(redaction, sentiment):
+        cleaned_text, _ = redaction
+        # Nothing redacted: the cleaned text has the original sentiment
+        return sentiment if cleaned_text == text else analyze_sentiment(cleaned_text)
+
+    def rewrite(toxicity, redaction):
+        if toxicity['toxicity'] <= 0.5 or deferred_rewriter is None:
+            return None, None, None
+        try:
+            logger.info("🤖 Generating AI rewrite suggestion...")
+            rewrite_result = deferred_rewriter.rewrite(text, rewrite_id=rewrite_id)
+            if rewrite_result['success']:
+                logger.info(
+                    f"✅ Rewrite successful using {rewrite_result['method_used']}")
+                return (rewrite_result['rewritten_text'],
+                        rewrite_result['method_used'],
+                        rewrite_result['rewrite_id'])
+            return None, None, None
+        except Exception as e:
+            logger.error(f"Rewrite failed: {str(e)}")
+            return redaction[0], "rule_based_fallback", None
+
+    return StageGraph([
+        Stage('toxicity', lambda: score_text(text)),
+        Stage('sentiment', lambda: analyze_sentiment(text)),
+        Stage('crisis', detect_crisis_risk),
+        Stage('redaction', lambda: clean_toxic_text(text)),
+        Stage('sentiment_cleaned', cleaned_sentiment,
+              after=('redaction', 'sentiment')),
+        Stage('rewrite', rewrite, after=('toxicity', 'redaction')),
+    ])
+
+
 @app.route('/api/analyze', methods=['POST', 'OPTIONS'])
 @jwt_required(optional=True)
+@components.requires('detoxify', 'rewriter', 'crisis_detector',
+                     unless=is_preflight)
 def analyze():
     """Main analysis endpoint for toxicity detection, sentiment analysis, and crisis detection"""
 
@@ -340,69 +705,48 @@ def analyze():
 
         logger.info(f"Analyzing text of length: {len(text)}")
 
-        # Step 1: Detect toxicity
-        tox_results = model.predict(text)
-        tox_scores = {k: float(v) for k, v in tox_results.items()}
-        is_toxic = tox_scores['toxicity'] > 0.5
-
-        # Step 2: Analyze sentiment
-        sentiment_original = analyze_sentiment(text)
+        # Steps 1-5 run as a stage graph; independent stages run in parallel
+        debug = bool(data.get('debug')) or \
+            request.args.get('debug', '').lower() in ('1', 'true')
+        # The record id is chosen up front so a rewrite that finishes in the
+        # background can be found under it
+        record_oid = ObjectId()
+        graph = build_analysis_graph(
+            text, request.args.get('country', 'IN'), rewrite_id=str(record_oid))
+        try:
+            stage_run = graph.run(analyze_executor)
+        except BatchQueueFullError as e:
+            logger.warning(f"Rejecting analysis request: {e}")
+            return jsonify({
+                'success': False,
+                'error': 'Server is busy. Please retry shortly.'
+            }), 503
+        stages = stage_run.results
 
-        # Step 3: ✅ NEW - Check for mental health crisis
-        crisis_risk = None
-        mental_health_warning = False
-        crisis_resources_data = None
+        tox_scores = stages['toxicity']
+        is_toxic = tox_scores['toxicity'] > 0.5
+        sentiment_original = stages['sentiment']
+        crisis_risk, crisis_resources_data = stages['crisis']
+        mental_health_warning = crisis_risk is not None and \
+            crisis_risk['risk_level'] in ['IMMINENT', 'HIGH']
 
-        if crisis_detector is not None:
-            try:
-                crisis_risk = crisis_detector.detect_risk(text)
-                mental_health_warning = crisis_risk['risk_level'] in [
-                    'IMMINENT', 'HIGH']
-
-                # Attach resources if crisis detected
-                if mental_health_warning:
-                    country = request.args.get('country', 'IN')
-                    crisis_resources_data = CrisisResources.get_resources(
-                        country)
-                    logger.warning(
-                        f"⚠️ MENTAL HEALTH CRISIS DETECTED: {crisis_risk['risk_level']}")
-
-            except Exception as e:
-                logger.error(f"Crisis detection error: {e}")
-                crisis_risk = {'risk_level': 'UNKNOWN', 'error': str(e)}
-
-        # Step 4: Clean toxic text
+        # Redaction is computed speculatively and only applies to toxic text
         cleaned_text = text
         toxic_words_found = []
+        sentiment_cleaned = sentiment_original
 
         if is_toxic:
-            cleaned_text, toxic_words_found = clean_toxic_text(
-                text, TOXIC_WORDS)
+            cleaned_text, toxic_words_found = stages['redaction']
+            sentiment_cleaned = stages['sentiment_cleaned']
 
         unique_toxic_words = sorted(set(toxic_words_found))
-        sentiment_cleaned = analyze_sentiment(cleaned_text)
         sentiment_improvement = sentiment_cleaned['polarity'] - \
             sentiment_original['polarity']
         sentiment_improved = (sentiment_improvement > 0.1 and sentiment_cleaned['label'] in [
                               'Positive', 'Neutral'])
         flagged = [k for k, v in tox_scores.items() if v > 0.5]
 
-        # Step 5: AI Rewriting
-        rewritten_suggestion = None
-        rewrite_method = None
-
-        if is_toxic and rewriter is not None:
-            try:
-                logger.info("🤖 Generating AI rewrite suggestion...")
-                rewrite_result = rewriter.rewrite(text)
-                if rewrite_result['success']:
-                    rewritten_suggestion = rewrite_result['rewritten_text']
-                    rewrite_method = rewrite_result['method_used']
-                    logger.info(f"✅ Rewrite successful using {rewrite_method}")
-            except Exception as e:
-                logger.error(f"Rewrite failed: {str(e)}")
-                rewritten_suggestion = cleaned_text
-                rewrite_method = "rule_based_fallback"
+        rewritten_suggestion, rewrite_method, pending_rewrite_id = stages['rewrite']
 
         # Step 6: Save to database
         record_id = None
@@ -428,10 +772,16 @@ def analyze():
                     metadata={
                         'crisis_risk': crisis_risk} if crisis_risk else {},
                 ).to_document()
+                history_document['_id'] = record_oid
 
                 insert_result = history_collection.insert_one(history_document)
                 record_id = str(insert_result.inserted_id)
                 logger.info(f"✅ Analysis saved with ID: {record_id}")
+
+                # The background rewrite may have finished before the insert
+                if pending_rewrite_id:
+                    apply_deferred_rewrite(
+                        pending_rewrite_id, deferred_rewriter.get(pending_rewrite_id))
             except PyMongoError as db_error:
                 logger.error(f"Failed to persist analysis: {db_error}")
 
@@ -444,6 +794,8 @@ def analyze():
             'cleaned_text': cleaned_text,
             'rewrite_suggestion': rewritten_suggestion if rewritten_suggestion else cleaned_text,
             'rewrite_method': rewrite_method if rewrite_method else 'none',
+            'rewrite_pending': pending_rewrite_id is not None,
+            'rewrite_id': pending_rewrite_id,
             'text_length': len(text),
             'is_toxic': bool(is_toxic),
             'toxicity_scores': tox_scores,
@@ -465,6 +817,13 @@ def analyze():
         if mental_health_warning and crisis_resources_data:
             response['crisis_resources'] = crisis_resources_data
 
+        if debug:
+            response['debug'] = {
+                'stage_timings_ms': stage_run.timings_ms,
+                'pipeline_ms': stage_run.total_ms,
+                'parallel': analyze_executor is not None
+            }
+
         logger.info(
             f"Analysis complete - Toxic: {is_toxic}, Crisis: {crisis_risk['risk_level'] if crisis_risk else 'N/A'}")
         return jsonify(response), 200
@@ -481,6 +840,7 @@ def analyze():
 
 
 @app.route('/api/crisis/detect', methods=['POST'])
+@components.requires('crisis_detector')
 def detect_crisis():
     """Standalone crisis detection endpoint"""
     try:
@@ -522,10 +882,11 @@ def get_crisis_resources():
 
 
 @app.route('/api/rewrite', methods=['POST'])
+@components.requires('rewriter')
 def rewrite_text():
     """AI-powered text rewriting endpoint"""
     try:
-        if rewriter is None:
+        if deferred_rewriter is None:
             return jsonify({'error': 'Rewriter not loaded'}), 503
 
         data = request.get_json()
@@ -536,13 +897,15 @@ def rewrite_text():
             return jsonify({'error': error_msg}), 400
 
         logger.info(f"Rewriting text: {text[:50]}...")
-        result = rewriter.rewrite(text)
+        result = deferred_rewriter.rewrite(text)
 
         return jsonify({
             'success': result['success'],
             'original_text': text,
             'rewritten_text': result['rewritten_text'],
             'method_used': result['method_used'],
+            'rewrite_pending': result['pending'],
+            'rewrite_id': result['rewrite_id'],
             'error': result.get('error'),
             'timestamp': datetime.now().isoformat()
         })
@@ -552,65 +915,79 @@ def rewrite_text():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/rewrites/<rewrite_id>', methods=['GET'])
+@components.requires('rewriter')
+def get_deferred_rewrite(rewrite_id):
+    """Status of a Groq rewrite that ran over its latency budget"""
+    if deferred_rewriter is None:
+        return jsonify({'error': 'Rewriter not loaded'}), 503
+
+    try:
+        document = deferred_rewriter.get(rewrite_id)
+    except PyMongoError as db_error:
+        logger.error(f"Database error: {db_error}")
+        return jsonify({'error': f'Database query failed: {db_error}'}), 500
+
+    if document is None:
+        return jsonify({'error': 'Rewrite not found'}), 404
+
+    completed = document['status'] == 'completed'
+    return jsonify({
+        'success': True,
+        'rewrite_id': rewrite_id,
+        'status': document['status'],
+        'rewritten_text': document['rewritten_text'] if completed else document['fallback_text'],
+        'method_used': document['method_used'] if completed else 'rules',
+        'error': document['error']
+    })
+
+
 @app.route('/api/upload', methods=['POST'])
+@components.requires('detoxify')
 def upload_file():
     """File upload endpoint for batch analysis"""
     try:
         if model is None:
             return jsonify({'error': 'Model not loaded'}), 503
 
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file uploaded'}), 400
+        error = validate_upload()
+        if error:
+            return error
 
         file = request.files['file']
-
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-
-        if not allowed_file(file.filename):
-            return jsonify({'error': 'Only .txt and .pdf files allowed'}), 400
-
         filename = secure_filename(file.filename)
         file_ext = filename.rsplit('.', 1)[1].lower()
 
-        text_content = ""
-
-        if file_ext == 'txt':
-            text_content = file.read().decode('utf-8')
-
-        elif file_ext == 'pdf':
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file.read()))
-            for page in pdf_reader.pages:
-                text_content += page.extract_text() + "\n"
-
-        lines = [line.strip()
-                 for line in text_content.split('\n') if line.strip()]
+        # Lines are extracted lazily and scored chunk by chunk as they arrive
+        lines = UploadLines(file.stream, file_ext)
+        chunks = iter_line_results(
+            lines,
+            score_texts,
+            chunk_size=UPLOAD_CHUNK_SIZE,
+            executor=upload_executor
+        )
+        results = [row for rows in chunks for row in rows]
 
-        if not lines:
+        if lines.line_count == 0:
             return jsonify({'error': 'No text found in file'}), 400
 
-        results = []
-        for idx, line in enumerate(lines, 1):
-            if len(line) < 3:
-                continue
-
-            analysis = model.predict(line)
-            toxicity_score = float(analysis['toxicity'])
-            is_toxic = toxicity_score > 0.5
-
-            results.append({
-                'line_number': idx,
-                'text': line[:100] + '...' if len(line) > 100 else line,
-                'full_text': line,
-                'toxicity_score': round(toxicity_score, 3),
-                'is_toxic': is_toxic,
-                'categories': {k: round(float(v), 3) for k, v in analysis.items()}
-            })
+        # Optional rewrites of the toxic lines, packed into few Groq requests
+        # that run concurrently within REWRITE_BUDGET_SECONDS; batches over
+        # the budget get the rule-based rewrite
+        if request.form.get('rewrite', 'false').lower() == 'true' and components.ensure('rewriter'):
+            toxic_rows = [r for r in results if r['is_toxic']]
+            rewrites = deferred_rewriter.rewrite_many(
+                [r['full_text'] for r in toxic_rows],
+                max_prompt_tokens=REWRITE_BATCH_TOKENS
+            )
+            for row, rewrite in zip(toxic_rows, rewrites):
+                row['rewritten_text'] = rewrite['rewritten_text']
+                row['rewrite_method'] = rewrite['method_used']
 
         return jsonify({
             'success': True,
             'filename': filename,
-            'total_lines': len(lines),
+            'total_lines': lines.line_count,
             'analyzed_lines': len(results),
             'toxic_count': sum(1 for r in results if r['is_toxic']),
             'safe_count': sum(1 for r in results if not r['is_toxic']),
@@ -623,11 +1000,143 @@ def upload_file():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/upload/stream', methods=['POST'])
+@components.requires('detoxify')
+def upload_file_stream():
+    """Batch analysis streamed as NDJSON: one event per scored chunk of lines"""
+    if model is None:
+        return jsonify({'error': 'Model not loaded'}), 503
+
+    error = validate_upload()
+    if error:
+        return error
+
+    file = request.files['file']
+    filename = secure_filename(file.filename)
+    file_ext = filename.rsplit('.', 1)[1].lower()
+    # Request files are closed once the view returns, before the body is
+    # streamed, so keep a copy that spills to disk past 1 MB
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    shutil.copyfileobj(file.stream, spool)
+    spool.seek(0)
+    lines = UploadLines(spool, file_ext)
+
+    def events():
+        tally = {'total_lines': 0, 'analyzed_lines': 0,
+                 'toxic_count': 0, 'safe_count': 0}
+        yield {'type': 'start', 'filename': filename}
+        try:
+            chunks = iter_line_results(
+                lines,
+                score_texts,
+                chunk_size=UPLOAD_CHUNK_SIZE,
+                executor=upload_executor
+            )
+            for rows in chunks:
+                toxic = sum(1 for row in rows if row['is_toxic'])
+                tally['total_lines'] = lines.line_count
+                tally['analyzed_lines'] += len(rows)
+                tally['toxic_count'] += toxic
+                tally['safe_count'] += len(rows) - toxic
+                yield {'type': 'results', 'results': rows,
+                       'progress': round(lines.progress, 4), **tally}
+
+            tally['total_lines'] = lines.line_count
+            if lines.line_count == 0:
+                yield {'type': 'error', 'error': 'No text found in file'}
+                return
+            yield {'type': 'done', 'success': True, 'filename': filename,
+                   'timestamp': datetime.now().isoformat(), **tally}
+
+        except Exception as e:
+            # Headers are already sent, so failures are reported in-band
+            logger.error(f"Streaming upload error: {str(e)}", exc_info=True)
+            yield {'type': 'error', 'error': str(e)}
+        finally:
+            spool.close()
+
+    body = (json.dumps(event) + '\n' for event in events())
+    return Response(
+        body,
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/api/jobs', methods=['POST'])
+@jwt_required(optional=True)
+@components.requires('detoxify')
+def create_job():
+    """Queue a file for background analysis and return the job id"""
+    try:
+        if model is None:
+            return jsonify({'error': 'Model not loaded'}), 503
+
+        error = validate_upload()
+        if error:
+            return error
+
+        file = request.files['file']
+        filename = secure_filename(file.filename)
+        file_ext = filename.rsplit('.', 1)[1].lower()
+        data = file.read()
+
+        job_id = job_manager.submit(
+            filename,
+            lambda: UploadLines(io.BytesIO(data), file_ext),
+            user_id=_get_authenticated_user_id()
+        )
+        logger.info(f"📥 Queued job {job_id} for {filename}")
+
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': f'/api/jobs/{job_id}'
+        }), 202
+
+    except Exception as e:
+        logger.error(f"Job creation error: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@jwt_required(optional=True)
+def get_job(job_id):
+    """Job progress plus one page of results (?offset=&limit=)"""
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = max(1, min(500, int(request.args.get('limit', 100))))
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
+
+    try:
+        job = job_manager.get(job_id)
+        # Jobs created by a logged-in user are only visible to that user
+        if job is None or (job['user_id'] is not None
+                           and job['user_id'] != _get_authenticated_user_id()):
+            return jsonify({'error': 'Job not found'}), 404
+
+        results = job_manager.get_results(job_id, offset=offset, limit=limit)
+
+        return jsonify({
+            'success': True,
+            'job': serialize_job(job),
+            'results': results,
+            'offset': offset,
+            'limit': limit,
+            'next_offset': offset + limit if len(results) == limit else None
+        })
+
+    except Exception as e:
+        logger.error(f"Job lookup error: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Get system statistics"""
     return jsonify({
-        'toxic_words_count': len(TOXIC_WORDS),
+        'toxic_words_count': len(toxic_redactor.terms),
         'supported_categories': [
             'toxicity', 'severe_toxicity', 'obscene', 'threat',
             'insult', 'identity_attack', 'sexual_explicit'
@@ -639,7 +1148,10 @@ def get_stats():
         'rewriter_available': rewriter is not None,
         'groq_available': rewriter.groq.is_available if rewriter else False,
         'crisis_detection_available': crisis_detector is not None,
-        'crisis_risk_levels': ['LOW', 'MEDIUM', 'HIGH', 'IMMINENT']
+        'crisis_risk_levels': ['LOW', 'MEDIUM', 'HIGH', 'IMMINENT'],
+        'score_cache': score_cache.stats() if score_cache else None,
+        'rewrite_cache': rewriter.cache.stats() if rewriter and rewriter.cache else None,
+        'llm_client': rewriter.groq.client.stats() if rewriter and rewriter.groq.client else None
     })
 
 
@@ -666,10 +1178,19 @@ if __name__ == '__main__':
     print("🛡️  TOXICITY DETECTION + MENTAL HEALTH CRISIS SYSTEM")
     print("="*70)
 
-    # Load models on startup
-    detoxify_loaded = load_model()
-    rewriter_loaded = load_rewriter()
-    crisis_loaded = load_crisis_detector()
+    # Size the thread pools before warm_up() loads the model and runs it
+    apply_runtime(RuntimeConfig.for_worker(
+        0, 1,
+        intra_op_threads=INFERENCE_INTRA_OP_THREADS,
+        inter_op_threads=INFERENCE_INTER_OP_THREADS,
+        cpu_affinity=INFERENCE_CPU_AFFINITY,
+    ))
+
+    # Load models on startup (a no-op for components already loaded on import)
+    loaded = warm_up()
+    detoxify_loaded = loaded['detoxify']
+    rewriter_loaded = loaded['rewriter']
+    crisis_loaded = loaded['crisis_detector']
 
     if detoxify_loaded:
         port = int(os.environ.get('PORT', 7860))
@@ -680,8 +1201,9 @@ if __name__ == '__main__':
         print(f"📈 Stats: http://localhost:{port}/api/stats")
 
         if rewriter_loaded:
-            groq_status = "✅ Ready" if (
-                rewriter and rewriter.groq.is_available) else "⚠️  Fallback to Rules"
+            # Reachability is checked by the background probe (see /api/health)
+            groq_status = "✅ Configured" if (
+                rewriter and rewriter.groq.client) else "⚠️  Fallback to Rules"
             print(f"🤖 AI Rewriter: {groq_status}")
         else:
             print("🤖 AI Rewriter: ⚠️  Not available")
@@ -0,0 +1,107 @@
+"""Closed-loop HTTP load test against a running server.
+
+Each of --concurrency clients sends requests back to back for --duration
+seconds on its own keep-alive connection and the script reports throughput,
+latency percentiles and errors. Compare the development server with gunicorn:
+
+    python app.py
+    python benchmarks/load_test.py --url http://localhost:7860 --concurrency 16
+
+    WEB_WORKERS=4 WEB_THREADS=4 gunicorn --config gunicorn.conf.py
+    python benchmarks/load_test.py --url http://localhost:7860 --concurrency 16
+"""
+
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+TEXTS = [
+    "You are an idiot and nobody wants you here",
+    "Thanks for the thoughtful review, I learned a lot",
+    "This is the worst garbage I have ever read",
+    "Could you share the slides from today's meeting?",
+]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Client(threading.Thread):
+    def __init__(self, args, deadline, index):
+        super().__init__(daemon=True)
+        self.args = args
+        self.deadline = deadline
+        self.index = index
+        self.latencies = []
+        self.errors = 0
+
+    def connect(self):
+        url = urlsplit(self.args.url)
+        return http.client.HTTPConnection(url.hostname, url.port or 80, timeout=self.args.timeout)
+
+    def run(self):
+        connection = self.connect()
+        sent = 0
+        while time.perf_counter() < self.deadline:
+            text = TEXTS[(self.index + sent) % len(TEXTS)]
+            body = json.dumps({"text": text}) if self.args.method == "POST" else None
+            start = time.perf_counter()
+            try:
+                connection.request(
+                    self.args.method, self.args.path, body=body, headers={"Content-Type": "application/json"}
+                )
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    self.errors += 1
+                else:
+                    self.latencies.append(time.perf_counter() - start)
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                connection.close()
+                connection = self.connect()
+            sent += 1
+        connection.close()
+
+
+def main(args):
+    deadline = time.perf_counter() + args.duration
+    clients = [Client(args, deadline, index) for index in range(args.concurrency)]
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for client in clients for latency in client.latencies]
+    errors = sum(client.errors for client in clients)
+    print(f"{args.method} {args.url}{args.path} concurrency={args.concurrency} duration={elapsed:.1f}s")
+    if not latencies:
+        print(f"no successful requests, errors={errors}")
+        return
+    print(f"requests={len(latencies)} errors={errors} throughput={len(latencies) / elapsed:.1f} req/s")
+    print(
+        f"latency ms: mean {statistics.mean(latencies) * 1000:.1f} "
+        f"p50 {percentile(latencies, 0.50) * 1000:.1f} "
+        f"p95 {percentile(latencies, 0.95) * 1000:.1f} "
+        f"p99 {percentile(latencies, 0.99) * 1000:.1f} "
+        f"max {max(latencies) * 1000:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:7860")
+    parser.add_argument("--path", default="/api/analyze")
+    parser.add_argument("--method", choices=["GET", "POST"], default="POST")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    main(parser.parse_args())
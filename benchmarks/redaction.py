@@ -0,0 +1,74 @@
+"""Per-word regex loop vs the compiled single-pass lexicon for clean_toxic_text.
+
+The old implementation compiled one regex per lexicon word on every call and
+rescanned the text once per word. The Redactor compiles the lexicon once into a
+prefix-tree regex and redacts in one pass.
+
+    python benchmarks/redaction.py --terms 35 5000 --repeat 200
+"""
+
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.lexicon import Redactor  # noqa: E402
+
+BASE_TERMS = ["idiot", "moron", "stupid", "jerk", "loser", "garbage", "worthless"]
+TEXT = (
+    "Honestly you are such an idiot and a total loser, this comment section is garbage "
+    "and nobody here cares about your worthless opinion. Have a nice day anyway! "
+) * 4
+
+
+def per_word_loop(text, toxic_words):
+    cleaned_text = text
+    toxic_words_found = []
+    for word in toxic_words:
+        pattern = re.compile(re.escape(word), re.IGNORECASE)
+        if pattern.search(cleaned_text):
+            toxic_words_found.append(word)
+            cleaned_text = pattern.sub("[REDACTED]", cleaned_text)
+    return cleaned_text, toxic_words_found
+
+
+def make_lexicon(size, seed=0):
+    rng = random.Random(seed)
+    terms = list(BASE_TERMS)
+    while len(terms) < size:
+        terms.append("".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 10))))
+    return terms[:size]
+
+
+def time_calls(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(args):
+    print(f"text={len(TEXT)} chars repeat={args.repeat}")
+    print(f"{'terms':>7} {'loop ms':>10} {'compiled ms':>12} {'speedup':>8} {'compile ms':>11}")
+    for size in args.terms:
+        terms = make_lexicon(size)
+        start = time.perf_counter()
+        redactor = Redactor(terms)
+        compile_ms = (time.perf_counter() - start) * 1000
+        assert redactor.redact(TEXT)[1] == per_word_loop(TEXT, terms)[1]
+
+        loop_ms = time_calls(lambda: per_word_loop(TEXT, terms), args.repeat)
+        compiled_ms = time_calls(lambda: redactor.redact(TEXT), args.repeat)
+        print(f"{size:>7} {loop_ms:>10.3f} {compiled_ms:>12.3f} {loop_ms / compiled_ms:>7.1f}x {compile_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--terms", default=[35, 1000, 5000], type=int, nargs="+", help="lexicon sizes to compare")
+    parser.add_argument("--repeat", default=50, type=int, help="calls per measurement (default: 50)")
+    main(parser.parse_args())
@@ -0,0 +1,65 @@
+"""Per-call latency of RuleBasedRewriter: one re.sub per table entry vs the compiled single pass.
+
+The old implementation rebuilt the replacement table and ran one word-boundary
+re.sub per entry on every call. The current one compiles the table once into a
+single pattern with a lookup callback.
+
+    python benchmarks/rule_rewriter.py --repeat 200
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rewriter import NEGATIVE_INDICATORS, TOXIC_REPLACEMENTS, RuleBasedRewriter  # noqa: E402
+
+SHORT = "You stupid idiots made this crap, it is fucking garbage"
+FILLER = "The release notes were fine but the installer is garbage and the docs suck. "
+
+
+def per_entry_loop(text):
+    toxic_replacements = dict(TOXIC_REPLACEMENTS)
+    result = text
+    for toxic, replacement in toxic_replacements.items():
+        pattern = r"\b" + re.escape(toxic) + r"\b"
+        result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
+    result = re.sub(r"\s+", " ", result).strip()
+    if result:
+        result = result[0].upper() + result[1:]
+    if result and result[-1] not in ".!?":
+        result += "."
+    negative_indicators = list(NEGATIVE_INDICATORS)
+    if any(word in result.lower() for word in negative_indicators):
+        professional_starters = ["i believe", "in my opinion", "it appears", "from my perspective", "this"]
+        if not any(result.lower().startswith(starter) for starter in professional_starters):
+            result = "I believe " + result[0].lower() + result[1:]
+    return result
+
+
+def time_calls(fn, text, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(text)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(args):
+    rewriter = RuleBasedRewriter()
+    long_text = (SHORT + ". " + FILLER * (5000 // len(FILLER) + 1))[:5000]
+    print(f"rules={len(rewriter.replacements)} repeat={args.repeat}")
+    print(f"{'input':>12} {'loop ms':>10} {'compiled ms':>12} {'speedup':>8}")
+    for name, text in [("short", SHORT), ("5000 chars", long_text)]:
+        assert rewriter._comprehensive_detoxify(text) == per_entry_loop(text)
+        loop_ms = time_calls(per_entry_loop, text, args.repeat)
+        compiled_ms = time_calls(rewriter._comprehensive_detoxify, text, args.repeat)
+        print(f"{name:>12} {loop_ms:>10.3f} {compiled_ms:>12.3f} {loop_ms / compiled_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", default=200, type=int, help="calls per measurement (default: 200)")
+    main(parser.parse_args())
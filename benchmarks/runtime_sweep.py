@@ -0,0 +1,149 @@
+"""Find the fastest workers x intra-op threads split of a fixed set of cores.
+
+For every split the script starts ``workers`` processes, pins each one to a
+disjoint slice of the cores with ``threads`` torch intra-op threads (exactly
+what gunicorn.conf.py does with INFERENCE_CPU_AFFINITY=auto), and lets them
+all score batches back to back for --duration seconds. It reports the combined
+throughput and the per-batch latency percentiles; more workers with fewer
+threads usually win on throughput, fewer workers with more threads on latency.
+
+--model synthetic uses a BERT-sized transformer encoder with random weights so
+the sweep runs without downloading anything; --model detoxify loads the real
+model (--model_type or --checkpoint as in the other benchmarks).
+
+    python benchmarks/runtime_sweep.py --cores 0-7
+    python benchmarks/runtime_sweep.py --cores 0-7 --splits 1x8,2x4,4x2,8x1 --model detoxify
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.inference.runtime import RuntimeConfig, apply_runtime, available_cpus, parse_cpu_list, split_cpus  # noqa: E402
+
+TEXTS = [
+    "shut up, you liar",
+    "i am a jewish woman who is blind",
+    "This is the best thing I have read all week, thank you!",
+    "Could you share the slides from today's meeting?",
+]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def default_splits(cores):
+    """(workers, threads) pairs that use every core exactly once"""
+    return [(workers, cores // workers) for workers in range(1, cores + 1) if cores % workers == 0]
+
+
+def parse_splits(spec):
+    return [tuple(int(part) for part in split.split("x")) for split in spec.split(",")]
+
+
+def load_scorer(args):
+    """Return a function that scores one batch of --batch-size texts"""
+    import torch
+
+    texts = [TEXTS[index % len(TEXTS)] for index in range(args.batch_size)]
+    if args.model == "detoxify":
+        from detoxify import Detoxify
+
+        model = Detoxify(
+            model_type=args.model_type,
+            checkpoint=args.checkpoint,
+            huggingface_config_path=args.huggingface_config_path,
+        )
+        return lambda: model.predict_batch(texts)
+
+    layer = torch.nn.TransformerEncoderLayer(d_model=768, nhead=12, dim_feedforward=3072, batch_first=True)
+    encoder = torch.nn.TransformerEncoder(layer, num_layers=args.layers).eval()
+    inputs = torch.randn(args.batch_size, args.seq_len, 768)
+
+    def score():
+        with torch.inference_mode():
+            return encoder(inputs)
+
+    return score
+
+
+def worker(args, config, ready, results):
+    apply_runtime(config)
+    score = load_scorer(args)
+    score()  # warm-up
+    ready.wait()
+    latencies = []
+    deadline = time.perf_counter() + args.duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        score()
+        latencies.append(time.perf_counter() - start)
+    results.put(latencies)
+
+
+def run_split(args, cpus, workers, threads):
+    # spawn: every worker starts with fresh torch thread pools, like a new server process
+    ctx = mp.get_context("spawn")
+    ready = ctx.Barrier(workers)
+    results = ctx.Queue()
+    configs = [
+        RuntimeConfig(intra_op_threads=threads, inter_op_threads=args.inter_op_threads, cpu_affinity=share)
+        for share in split_cpus(cpus, workers)
+    ]
+    processes = [ctx.Process(target=worker, args=(args, config, ready, results)) for config in configs]
+    for process in processes:
+        process.start()
+    latencies = [latency for _ in processes for latency in results.get()]
+    for process in processes:
+        process.join()
+    return latencies
+
+
+def main(args):
+    cpus = parse_cpu_list(args.cores) if args.cores else available_cpus()
+    splits = parse_splits(args.splits) if args.splits else default_splits(len(cpus))
+    model = args.checkpoint or args.model_type if args.model == "detoxify" else f"synthetic x{args.layers}"
+    print(f"cores={len(cpus)} ({','.join(map(str, cpus))}) model={model} batch={args.batch_size}")
+    print(f"{'workers':>8} {'threads':>8} {'texts/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+
+    rows = []
+    for workers, threads in splits:
+        latencies = run_split(args, cpus, workers, threads)
+        throughput = len(latencies) * args.batch_size / args.duration
+        rows.append((throughput, -workers, threads))
+        print(
+            f"{workers:>8} {threads:>8} {throughput:>9.1f}"
+            f" {statistics.median(latencies) * 1000:>9.1f} {percentile(latencies, 0.95) * 1000:>9.1f}"
+        )
+
+    # ties go to fewer workers, which hold fewer model copies
+    throughput, workers, threads = max(rows)
+    print(f"best: WEB_WORKERS={-workers} INFERENCE_INTRA_OP_THREADS={threads} ({throughput:.1f} texts/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cores", default="", help="CPU list to split, e.g. 0-7 (default: every available CPU)")
+    parser.add_argument("--splits", default="", help="WORKERSxTHREADS list, e.g. 1x8,2x4 (default: all exact splits)")
+    parser.add_argument("--inter-op-threads", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of scoring per split")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--model", choices=["synthetic", "detoxify"], default="synthetic")
+    parser.add_argument("--layers", type=int, default=4, help="encoder layers of the synthetic model")
+    parser.add_argument("--seq-len", type=int, default=64, help="tokens per text for the synthetic model")
+    parser.add_argument("--model_type", default="unbiased", type=str, help="Detoxify model type (default: unbiased)")
+    parser.add_argument("--checkpoint", default=None, type=str, help="Detoxify checkpoint path instead of a model type")
+    parser.add_argument(
+        "--huggingface_config_path",
+        default=None,
+        type=str,
+        help="path to HF config and tokenizer files needed for offline model loading",
+    )
+    main(parser.parse_args())
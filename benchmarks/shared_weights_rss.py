@@ -0,0 +1,113 @@
+"""Memory per worker when several processes serve the same Detoxify model.
+
+Modes:
+    private  every worker loads its own copy of the weights through load_checkpoint
+    mmap     every worker maps the weights from the artifact store file (mmap_weights=True)
+    fork     the parent loads once and forks the workers, which inherit the weights copy-on-write
+             (what a preloading server such as gunicorn --preload does)
+
+Each worker scores a few comments, then reports RSS plus PSS and USS from
+/proc/self/smaps_rollup. PSS divides shared pages between the processes that map
+them, so the PSS total is the real memory cost of the worker group. Linux only.
+
+    python benchmarks/shared_weights_rss.py --workers 4 --mode private
+    python benchmarks/shared_weights_rss.py --workers 4 --mode mmap
+    python benchmarks/shared_weights_rss.py --workers 4 --mode fork
+"""
+
+import argparse
+import gc
+import multiprocessing as mp
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detoxify import Detoxify  # noqa: E402
+
+TEXTS = [
+    "shut up, you liar",
+    "i am a jewish woman who is blind",
+    "This is the best thing I have read all week, thank you!",
+]
+
+
+def memory_stats():
+    stats = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("VmRSS", "RssAnon", "RssFile")):
+                key, value = line.split(":")
+                stats[key] = int(value.split()[0]) / 1024
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith(("Pss:", "Private_Clean", "Private_Dirty")):
+                key, value = line.split(":")
+                stats[key] = int(value.split()[0]) / 1024
+    stats["Uss"] = stats.pop("Private_Clean") + stats.pop("Private_Dirty")
+    return stats
+
+
+def load(args, mmap_weights):
+    return Detoxify(
+        model_type=args.model_type,
+        checkpoint=args.checkpoint,
+        huggingface_config_path=args.huggingface_config_path,
+        artifact_store=mmap_weights,
+        mmap_weights=mmap_weights,
+    )
+
+
+def worker(args, model, ready, results):
+    if model is None:
+        model = load(args, mmap_weights=args.mode == "mmap")
+    model.predict_batch(TEXTS)
+    ready.wait()  # measure once every worker holds its model, so shared pages are counted fairly
+    results.put((os.getpid(), memory_stats()))
+
+
+def main(args):
+    ctx = mp.get_context("fork")
+    model = None
+    if args.mode == "fork":
+        model = load(args, mmap_weights=False)
+        gc.collect()
+        gc.freeze()
+    elif args.mode == "mmap":
+        # make sure the artifact store entry exists before the workers map it
+        load(args, mmap_weights=True)
+        gc.collect()
+
+    ready = ctx.Barrier(args.workers)
+    results = ctx.Queue()
+    workers = [ctx.Process(target=worker, args=(args, model, ready, results)) for _ in range(args.workers)]
+    for process in workers:
+        process.start()
+    rows = [results.get() for _ in workers]
+    for process in workers:
+        process.join()
+
+    print(f"mode={args.mode} workers={args.workers} model={args.checkpoint or args.model_type}")
+    print(f"{'pid':>8} {'RSS MB':>9} {'anon MB':>9} {'file MB':>9} {'PSS MB':>9} {'USS MB':>9}")
+    for pid, stats in sorted(rows):
+        print(
+            f"{pid:>8} {stats['VmRSS']:>9.1f} {stats['RssAnon']:>9.1f} {stats['RssFile']:>9.1f}"
+            f" {stats['Pss']:>9.1f} {stats['Uss']:>9.1f}"
+        )
+    print(f"{'total':>8} {sum(s['VmRSS'] for _, s in rows):>9.1f} {'':>9} {'':>9}", end="")
+    print(f" {sum(s['Pss'] for _, s in rows):>9.1f} {sum(s['Uss'] for _, s in rows):>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model_type", default="unbiased", type=str, help="model type (default: unbiased)")
+    parser.add_argument("--checkpoint", default=None, type=str, help="checkpoint path instead of a model type")
+    parser.add_argument(
+        "--huggingface_config_path",
+        default=None,
+        type=str,
+        help="path to HF config and tokenizer files needed for offline model loading",
+    )
+    parser.add_argument("--workers", default=4, type=int, help="number of worker processes (default: 4)")
+    parser.add_argument("--mode", default="private", choices=["private", "mmap", "fork"], help="weight sharing mode")
+    main(parser.parse_args())
@@ -0,0 +1,78 @@
+"""Wall time of ``import app`` in a fresh interpreter, i.e. what every worker boot pays.
+
+Each run imports app.py in a new process with MONGO_USE_MOCK=true. With
+--groq unreachable the Groq endpoint is a local socket that accepts connections
+and never answers, the worst case for anything that talks to Groq during import
+(the old warm-up request waited for the full client timeout and its retries).
+
+Components load on first use; --warm-up sets WARM_UP_ON_IMPORT=true to load
+them all during the import instead.
+
+    python benchmarks/startup.py --repeat 5
+    python benchmarks/startup.py --repeat 5 --warm-up
+    python benchmarks/startup.py --repeat 5 --groq unreachable --groq-timeout 3
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import app; print(time.perf_counter() - start)"
+
+
+def silent_server():
+    """Listening socket that completes TCP handshakes but never sends a byte."""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(64)
+    return server
+
+
+def import_env(args, groq_url):
+    env = dict(os.environ, MONGO_USE_MOCK="true", WARM_UP_ON_IMPORT=str(args.warm_up))
+    env.pop("GROQ_API_KEY", None)
+    if groq_url:
+        env.update(GROQ_API_KEY="bench", GROQ_BASE_URL=groq_url, GROQ_TIMEOUT_SECONDS=str(args.groq_timeout))
+    return env
+
+
+def time_import(env):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    process_seconds = time.perf_counter() - start
+    import_seconds = float(result.stdout.strip().splitlines()[-1])
+    return import_seconds, process_seconds
+
+
+def main(args):
+    server = silent_server() if args.groq == "unreachable" else None
+    groq_url = f"http://127.0.0.1:{server.getsockname()[1]}" if server else None
+    env = import_env(args, groq_url)
+
+    print(f"groq={args.groq} warm_up={args.warm_up} repeat={args.repeat}")
+    samples = []
+    for run in range(args.repeat):
+        import_seconds, process_seconds = time_import(env)
+        samples.append(import_seconds)
+        print(f"run {run + 1}: import {import_seconds:.3f}s, process {process_seconds:.3f}s")
+
+    print(f"import app: median {statistics.median(samples):.3f}s min {min(samples):.3f}s max {max(samples):.3f}s")
+    if server:
+        server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--groq", choices=["off", "unreachable"], default="off")
+    parser.add_argument("--warm-up", action="store_true", help="load every component during the import")
+    parser.add_argument("--groq-timeout", type=float, default=3.0, help="GROQ_TIMEOUT_SECONDS for the import")
+    main(parser.parse_args())
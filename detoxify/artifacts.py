@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import transformers
+from safetensors.torch import load_file
+
+METADATA_FILE = "detoxify_artifact.json"
+WEIGHTS_FILE = "model.safetensors"
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def has_artifacts(artifact_dir):
+    return os.path.isfile(os.path.join(artifact_dir, METADATA_FILE)) and os.path.isfile(
+        os.path.join(artifact_dir, WEIGHTS_FILE)
+    )
+
+
+def save_artifacts(model, tokenizer, class_names, artifact_dir, model_type=None, checksum=None):
+    """Writes a self-contained copy of a loaded model to artifact_dir:
+    safetensors weights, the HF config, the tokenizer files and the standardised class names.
+    The directory is assembled next to its destination and moved into place in one step,
+    so concurrent workers never see a half-written store entry.
+    """
+    parent = os.path.dirname(os.path.abspath(artifact_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=parent)
+    try:
+        model.save_pretrained(tmp_dir, safe_serialization=True)
+        tokenizer.save_pretrained(tmp_dir)
+        with open(os.path.join(tmp_dir, METADATA_FILE), "w") as f:
+            json.dump(
+                {
+                    "model_type": model_type,
+                    "checksum": checksum,
+                    "class_names": class_names,
+                    "model_name": type(model).__name__,
+                    "tokenizer_name": type(tokenizer).__name__,
+                    "weights_sha256": file_sha256(os.path.join(tmp_dir, WEIGHTS_FILE)),
+                },
+                f,
+                indent=2,
+            )
+        try:
+            os.rename(tmp_dir, artifact_dir)
+        except OSError:
+            # another process finished storing the same entry first
+            if not has_artifacts(artifact_dir):
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def load_artifacts(artifact_dir, verify=False):
+    """Loads a model stored by save_artifacts without touching the network.
+    Weights are read from the memory-mapped safetensors file rather than unpickled.
+    Returns (model, tokenizer, class_names) like load_checkpoint.
+    """
+    if not has_artifacts(artifact_dir):
+        raise FileNotFoundError(f"No stored model artifacts in {artifact_dir}")
+    with open(os.path.join(artifact_dir, METADATA_FILE)) as f:
+        metadata = json.load(f)
+    if verify and file_sha256(os.path.join(artifact_dir, WEIGHTS_FILE)) != metadata["weights_sha256"]:
+        raise ValueError(f"Stored weights in {artifact_dir} do not match their recorded checksum")
+
+    model = getattr(transformers, metadata["model_name"]).from_pretrained(
+        artifact_dir, local_files_only=True, use_safetensors=True
+    )
+    tokenizer = getattr(transformers, metadata["tokenizer_name"]).from_pretrained(artifact_dir, local_files_only=True)
+
+    return model, tokenizer, metadata["class_names"]
+
+
+def map_weights(model, artifact_dir):
+    """Re-points the model parameters at the memory-mapped safetensors file in artifact_dir.
+    The weights then live in the OS page cache instead of private process memory, so every
+    process that maps the same file shares one physical copy of them.
+    """
+    state_dict = load_file(os.path.join(artifact_dir, WEIGHTS_FILE), device="cpu")
+    result = model.load_state_dict(state_dict, strict=False, assign=True)
+    if result.unexpected_keys:
+        raise ValueError(f"Stored weights in {artifact_dir} do not fit the model: {result.unexpected_keys}")
+    return model
@@ -1,6 +1,16 @@
+import hashlib
+import os
+import re
+import time
+import warnings
+
 import torch
 import transformers
 
+from .artifacts import has_artifacts, load_artifacts, map_weights, save_artifacts
+from .export import check_backend, export_model, is_exported, load_exported_model
+from .quantization import check_quantize_mode, quantize_model
+
 
 DOWNLOAD_URL = "https://github.com/unitaryai/detoxify/releases/download/"
 MODEL_URLS = {
@@ -14,6 +24,20 @@ MODEL_URLS = {
 PRETRAINED_MODEL = None
 
 
+def get_cache_dir(cache_dir=None):
+    """Directory for derived model artifacts, defaults to $DETOXIFY_CACHE_DIR or <torch hub dir>/detoxify."""
+    return cache_dir or os.getenv("DETOXIFY_CACHE_DIR") or os.path.join(torch.hub.get_dir(), "detoxify")
+
+
+def get_tokenizer(model_type, tokenizer_name, huggingface_config_path=None):
+    return getattr(transformers, tokenizer_name).from_pretrained(
+        huggingface_config_path or model_type,
+        local_files_only=huggingface_config_path is not None,
+        # TODO: may be needed to let it work with Kaggle competition
+        # model_max_length=512,
+    )
+
+
 def get_model_and_tokenizer(
     model_type, model_name, tokenizer_name, num_classes, state_dict, huggingface_config_path=None
 ):
@@ -25,17 +49,29 @@ def get_model_and_tokenizer(
         state_dict=state_dict,
         local_files_only=huggingface_config_path is not None,
     )
-    tokenizer = getattr(transformers, tokenizer_name).from_pretrained(
+    tokenizer = get_tokenizer(model_type, tokenizer_name, huggingface_config_path)
+
+    return model, tokenizer
+
+
+def get_quantized_model_and_tokenizer(
+    model_type, model_name, tokenizer_name, num_classes, state_dict, quantize, huggingface_config_path=None
+):
+    """Builds the quantized architecture and fills it with an already quantized state dict."""
+    model_class = getattr(transformers, model_name)
+    config = model_class.config_class.from_pretrained(
         huggingface_config_path or model_type,
+        num_labels=num_classes,
         local_files_only=huggingface_config_path is not None,
-        # TODO: may be needed to let it work with Kaggle competition
-        # model_max_length=512,
     )
+    model = quantize_model(model_class(config), quantize)
+    model.load_state_dict(state_dict)
+    tokenizer = get_tokenizer(model_type, tokenizer_name, huggingface_config_path)
 
     return model, tokenizer
 
 
-def load_checkpoint(model_type="original", checkpoint=None, device="cpu", huggingface_config_path=None):
+def read_checkpoint(model_type="original", checkpoint=None, device="cpu"):
     if checkpoint is None:
         checkpoint_path = MODEL_URLS[model_type]
         loaded = torch.hub.load_state_dict_from_url(checkpoint_path, map_location=device)
@@ -46,14 +82,23 @@ def load_checkpoint(model_type="original", checkpoint=None, device="cpu", huggin
                 "Checkpoint needs to contain the config it was trained \
                     with as well as the state dict"
             )
-    class_names = loaded["config"]["dataset"]["args"]["classes"]
+    return loaded
+
+
+def get_class_names(config):
+    class_names = config["dataset"]["args"]["classes"]
     # standardise class names between models
     change_names = {
         "toxic": "toxicity",
         "identity_hate": "identity_attack",
         "severe_toxic": "severe_toxicity",
     }
-    class_names = [change_names.get(cl, cl) for cl in class_names]
+    return [change_names.get(cl, cl) for cl in class_names]
+
+
+def load_checkpoint(model_type="original", checkpoint=None, device="cpu", huggingface_config_path=None):
+    loaded = read_checkpoint(model_type=model_type, checkpoint=checkpoint, device=device)
+    class_names = get_class_names(loaded["config"])
     model, tokenizer = get_model_and_tokenizer(
         **loaded["config"]["arch"]["args"],
         state_dict=loaded["state_dict"],
@@ -63,6 +108,119 @@ def load_checkpoint(model_type="original", checkpoint=None, device="cpu", huggin
     return model, tokenizer, class_names
 
 
+def checkpoint_cache_key(model_type="original", checkpoint=None):
+    """Name identifying the source checkpoint of a derived artifact."""
+    if checkpoint is None:
+        # release file names already embed a hash of their contents
+        return os.path.splitext(os.path.basename(MODEL_URLS[model_type]))[0]
+    stat = os.stat(checkpoint)
+    key = f"{os.path.abspath(checkpoint)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return os.path.splitext(os.path.basename(checkpoint))[0] + "-" + hashlib.sha256(key.encode()).hexdigest()[:8]
+
+
+def quantized_checkpoint_path(model_type="original", checkpoint=None, quantize="int8", cache_dir=None):
+    """Cache location of a quantized state dict, keyed by the source checkpoint."""
+    name = checkpoint_cache_key(model_type, checkpoint)
+    return os.path.join(get_cache_dir(cache_dir), "quantized", f"{name}-{quantize}.pt")
+
+
+def artifact_path(model_type="original", checkpoint=None, cache_dir=None):
+    """Artifact store entry of a model, keyed by model type and checkpoint checksum."""
+    if checkpoint is None:
+        match = re.search(r"-([0-9a-f]{8})\.ckpt$", MODEL_URLS[model_type])
+        name = f"{model_type}-{match.group(1) if match else checkpoint_cache_key(model_type)}"
+    else:
+        name = "checkpoint-" + checkpoint_cache_key(checkpoint=checkpoint)
+    return os.path.join(get_cache_dir(cache_dir), "artifacts", name)
+
+
+def export_path(model_type="original", checkpoint=None, backend="onnx", cache_dir=None):
+    """Default directory of an exported graph, keyed by the source checkpoint."""
+    name = checkpoint_cache_key(model_type, checkpoint)
+    return os.path.join(get_cache_dir(cache_dir), "exports", f"{name}-{backend}")
+
+
+def load_quantized_checkpoint(
+    model_type="original", checkpoint=None, device="cpu", huggingface_config_path=None, quantize="int8", cache_dir=None
+):
+    """Like load_checkpoint, but returns a dynamically quantized model.
+    The quantized state dict is cached on disk, so later loads skip the fp32 checkpoint entirely.
+    """
+    check_quantize_mode(quantize, device)
+    cache_path = quantized_checkpoint_path(model_type, checkpoint, quantize, cache_dir)
+    if os.path.isfile(cache_path):
+        # written by us below, packed int8 weights need full unpickling
+        cached = torch.load(cache_path, map_location=device, weights_only=False)
+        model, tokenizer = get_quantized_model_and_tokenizer(
+            **cached["config"]["arch"]["args"],
+            state_dict=cached["state_dict"],
+            quantize=quantize,
+            huggingface_config_path=huggingface_config_path,
+        )
+        return model, tokenizer, get_class_names(cached["config"])
+
+    loaded = read_checkpoint(model_type=model_type, checkpoint=checkpoint, device=device)
+    model, tokenizer = get_model_and_tokenizer(
+        **loaded["config"]["arch"]["args"],
+        state_dict=loaded["state_dict"],
+        huggingface_config_path=huggingface_config_path,
+    )
+    model = quantize_model(model, quantize)
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    torch.save({"config": loaded["config"], "state_dict": model.state_dict()}, tmp_path)
+    os.replace(tmp_path, cache_path)
+
+    return model, tokenizer, get_class_names(loaded["config"])
+
+
+def load_exported_checkpoint(
+    model_type="original", checkpoint=None, device="cpu", huggingface_config_path=None, backend="onnx", export_dir=None
+):
+    """Like load_checkpoint, but runs a traced TorchScript or ONNX graph instead of the eager model.
+    If export_dir holds no export yet, the checkpoint is loaded once and exported there first.
+    """
+    check_backend(backend)
+    export_dir = export_dir or export_path(model_type, checkpoint, backend)
+    if not is_exported(export_dir, backend):
+        model, tokenizer, class_names = load_checkpoint(
+            model_type=model_type,
+            checkpoint=checkpoint,
+            device=device,
+            huggingface_config_path=huggingface_config_path,
+        )
+        export_model(model, tokenizer, class_names, export_dir, backend=backend)
+        del model
+
+    return load_exported_model(export_dir, backend)
+
+
+def load_cached_checkpoint(
+    model_type="original", checkpoint=None, device="cpu", huggingface_config_path=None, cache_dir=None
+):
+    """Like load_checkpoint, but goes through the local artifact store.
+    The first load stores weights, HF config and tokenizer files under cache_dir,
+    every later load reads them from there fully offline.
+    """
+    artifact_dir = artifact_path(model_type, checkpoint, cache_dir)
+    if not has_artifacts(artifact_dir):
+        model, tokenizer, class_names = load_checkpoint(
+            model_type=model_type,
+            checkpoint=checkpoint,
+            device=device,
+            huggingface_config_path=huggingface_config_path,
+        )
+        checksum = os.path.basename(artifact_dir).rsplit("-", 1)[-1]
+        try:
+            save_artifacts(model, tokenizer, class_names, artifact_dir, model_type=model_type, checksum=checksum)
+        except OSError as e:
+            warnings.warn(f"Could not store model artifacts in {artifact_dir}: {e}")
+        return model, tokenizer, class_names
+
+    return load_artifacts(artifact_dir)
+
+
 def load_model(model_type, checkpoint=None):
     if checkpoint is None:
         model, _, _ = load_checkpoint(model_type=model_type)
@@ -95,20 +253,93 @@ class Detoxify:
         device(str or torch.device): accepts any torch.device input or
                                      torch.device object, defaults to cpu
         huggingface_config_path: path to HF config and tokenizer files needed for offline model loading
+        quantize(str): optional quantization mode for cpu inference, only int8 is supported,
+                       defaults to None (full fp32 model)
+        cache_dir(str): where derived artifacts such as quantized weights are cached,
+                        defaults to $DETOXIFY_CACHE_DIR or <torch hub dir>/detoxify
+        backend(str): torch (eager transformers model), torchscript or onnx,
+                      graph backends run on cpu, defaults to torch
+        export_dir(str): directory of a graph exported with export_model.py,
+                         defaults to an export created on first use under cache_dir
+        artifact_store(bool): load the eager model through the local artifact store under
+                              cache_dir, which works offline after the first load, defaults to False
+        mmap_weights(bool): keep the weights memory-mapped from the artifact store file so that
+                            processes on one host share a single copy, needs artifact_store and cpu,
+                            defaults to False
     Returns:
         results(dict): dictionary of output scores for each class
     """
 
-    def __init__(self, model_type="original", checkpoint=PRETRAINED_MODEL, device="cpu", huggingface_config_path=None):
+    def __init__(
+        self,
+        model_type="original",
+        checkpoint=PRETRAINED_MODEL,
+        device="cpu",
+        huggingface_config_path=None,
+        quantize=None,
+        cache_dir=None,
+        backend="torch",
+        export_dir=None,
+        artifact_store=False,
+        mmap_weights=False,
+    ):
         super().__init__()
-        self.model, self.tokenizer, self.class_names = load_checkpoint(
-            model_type=model_type,
-            checkpoint=checkpoint,
-            device=device,
-            huggingface_config_path=huggingface_config_path,
-        )
+        start = time.perf_counter()
+        check_backend(backend)
+        if mmap_weights and (not artifact_store or quantize is not None or backend != "torch"):
+            raise ValueError("mmap_weights needs artifact_store=True with the unquantized torch backend")
+        if mmap_weights and torch.device(device).type != "cpu":
+            raise ValueError("mmap_weights is only supported on cpu")
+        if quantize is not None and backend != "torch":
+            raise ValueError("Quantization is only available with the torch backend")
+
+        if backend != "torch":
+            self.model, self.tokenizer, self.class_names = load_exported_checkpoint(
+                model_type=model_type,
+                checkpoint=checkpoint,
+                device=device,
+                huggingface_config_path=huggingface_config_path,
+                backend=backend,
+                export_dir=export_dir or export_path(model_type, checkpoint, backend, cache_dir),
+            )
+        elif quantize is None and artifact_store:
+            self.model, self.tokenizer, self.class_names = load_cached_checkpoint(
+                model_type=model_type,
+                checkpoint=checkpoint,
+                device=device,
+                huggingface_config_path=huggingface_config_path,
+                cache_dir=cache_dir,
+            )
+            if mmap_weights:
+                artifact_dir = artifact_path(model_type, checkpoint, cache_dir)
+                if has_artifacts(artifact_dir):
+                    map_weights(self.model, artifact_dir)
+                else:
+                    warnings.warn(f"No stored weights to map in {artifact_dir}, keeping them in process memory")
+                    mmap_weights = False
+        elif quantize is None:
+            self.model, self.tokenizer, self.class_names = load_checkpoint(
+                model_type=model_type,
+                checkpoint=checkpoint,
+                device=device,
+                huggingface_config_path=huggingface_config_path,
+            )
+        else:
+            self.model, self.tokenizer, self.class_names = load_quantized_checkpoint(
+                model_type=model_type,
+                checkpoint=checkpoint,
+                device=device,
+                huggingface_config_path=huggingface_config_path,
+                quantize=quantize,
+                cache_dir=cache_dir,
+            )
+        self.quantize = quantize
+        self.backend = backend
+        self.mmap_weights = mmap_weights
         self.device = device
         self.model.to(self.device)
+        # cold start time, from the constructor call until the model is ready on its device
+        self.load_seconds = time.perf_counter() - start
 
     @torch.no_grad()
     def predict(self, text):
@@ -125,6 +356,43 @@ class Detoxify:
             )
         return results
 
+    @torch.no_grad()
+    def predict_batch(self, texts, batch_size=32):
+        """Predict a list of comments in length-sorted buckets.
+
+        Inputs are ordered by token length and split into buckets of
+        `batch_size`, so each forward pass only pads up to the longest comment
+        in its own bucket instead of the longest comment overall. Scores are
+        returned in the original input order, always as lists.
+        Args:
+            texts(list of str): comments to score
+            batch_size(int): maximum number of comments per forward pass
+        Returns:
+            results(dict): dictionary of lists of output scores for each class
+        """
+        if isinstance(texts, str):
+            raise ValueError("predict_batch expects a list of strings, use predict for a single string")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        texts = list(texts)
+        if not texts:
+            return {cla: [] for cla in self.class_names}
+
+        self.model.eval()
+        lengths = [len(ids) for ids in self.tokenizer(texts, truncation=True)["input_ids"]]
+        order = sorted(range(len(texts)), key=lambda idx: lengths[idx])
+
+        scores = torch.empty(len(texts), len(self.class_names))
+        for start in range(0, len(order), batch_size):
+            bucket = order[start : start + batch_size]
+            inputs = self.tokenizer(
+                [texts[idx] for idx in bucket], return_tensors="pt", truncation=True, padding=True
+            ).to(self.model.device)
+            out = self.model(**inputs)[0]
+            scores[bucket] = torch.sigmoid(out[:, : len(self.class_names)]).cpu()
+
+        return {cla: scores[:, i].tolist() for i, cla in enumerate(self.class_names)}
+
 
 def toxic_bert():
     return load_model("original")
@@ -0,0 +1,167 @@
+import abc
+import inspect
+import json
+import os
+
+import torch
+import transformers
+
+BACKENDS = ("torch", "torchscript", "onnx")
+GRAPH_FILES = {
+    "torchscript": "model.pt",
+    "onnx": "model.onnx",
+}
+METADATA_FILE = "detoxify_export.json"
+# positional order of the transformer forward() arguments for all supported architectures
+INPUT_NAMES = ("input_ids", "attention_mask", "token_type_ids")
+
+
+def check_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported backend {backend!r}, expected one of {list(BACKENDS)}")
+
+
+class _LogitsModule(torch.nn.Module):
+    """Positional-argument wrapper so the traced graph only returns the logits tensor."""
+
+    def __init__(self, model, input_names):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *inputs):
+        return self.model(**dict(zip(self.input_names, inputs)), return_dict=False)[0]
+
+
+def export_model(model, tokenizer, class_names, export_dir, backend="onnx"):
+    """Traces a loaded Detoxify transformer into a TorchScript or ONNX graph.
+    The graph, the tokenizer files and the class names are written to export_dir,
+    which is everything load_exported_model needs to run without the eager model.
+    Sequence length and batch size stay dynamic in the exported graph.
+    """
+    check_backend(backend)
+    if backend == "torch":
+        raise ValueError("The torch backend runs the eager model and has nothing to export")
+
+    os.makedirs(export_dir, exist_ok=True)
+    model = model.cpu().eval()
+    sample = tokenizer(
+        ["an example comment to trace the graph with", "a shorter one"],
+        return_tensors="pt",
+        truncation=True,
+        padding=True,
+    )
+    input_names = [name for name in INPUT_NAMES if name in sample]
+    example_inputs = tuple(sample[name] for name in input_names)
+    wrapper = _LogitsModule(model, input_names).eval()
+    graph_path = os.path.join(export_dir, GRAPH_FILES[backend])
+
+    with torch.no_grad():
+        if backend == "torchscript":
+            traced = torch.jit.trace(wrapper, example_inputs, check_trace=False)
+            torch.jit.save(traced, graph_path)
+        else:
+            dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+            dynamic_axes["logits"] = {0: "batch"}
+            kwargs = {}
+            # newer torch releases default to the dynamo exporter, keep the TorchScript based one
+            if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+                kwargs["dynamo"] = False
+            torch.onnx.export(
+                wrapper,
+                example_inputs,
+                graph_path,
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+                **kwargs,
+            )
+
+    tokenizer.save_pretrained(export_dir)
+    with open(os.path.join(export_dir, METADATA_FILE), "w") as f:
+        json.dump(
+            {
+                "backend": backend,
+                "class_names": class_names,
+                "input_names": input_names,
+                "tokenizer_name": type(tokenizer).__name__,
+            },
+            f,
+            indent=2,
+        )
+    return graph_path
+
+
+def is_exported(export_dir, backend):
+    return os.path.isfile(os.path.join(export_dir, METADATA_FILE)) and os.path.isfile(
+        os.path.join(export_dir, GRAPH_FILES[backend])
+    )
+
+
+class GraphModel(abc.ABC):
+    """Minimal stand-in for the transformers model used by Detoxify.predict:
+    called with tokenizer outputs as keyword arguments, returns a tuple whose first item is the logits.
+    Exported graphs always run on cpu.
+    """
+
+    device = torch.device("cpu")
+
+    def __init__(self, input_names):
+        self.input_names = input_names
+
+    def eval(self):
+        return self
+
+    def to(self, device):
+        if torch.device(device).type != "cpu":
+            raise ValueError("Exported graph backends only run on cpu")
+        return self
+
+    def __call__(self, **inputs):
+        return (self.run([inputs[name] for name in self.input_names]),)
+
+    @abc.abstractmethod
+    def run(self, inputs):
+        """Runs the graph on positional input tensors and returns the logits."""
+
+
+class TorchScriptModel(GraphModel):
+    def __init__(self, graph_path, input_names):
+        super().__init__(input_names)
+        module = torch.jit.load(graph_path, map_location="cpu").eval()
+        # freezing inlines the weights as constants and folds ops, like onnxruntime's graph optimisations
+        self.module = torch.jit.optimize_for_inference(module)
+
+    def run(self, inputs):
+        return self.module(*inputs)
+
+
+class OnnxModel(GraphModel):
+    def __init__(self, graph_path, input_names):
+        super().__init__(input_names)
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("The onnx backend needs onnxruntime, install it with `pip install onnxruntime`") from e
+        self.session = onnxruntime.InferenceSession(graph_path, providers=["CPUExecutionProvider"])
+
+    def run(self, inputs):
+        feeds = {name: tensor.cpu().numpy() for name, tensor in zip(self.input_names, inputs)}
+        return torch.from_numpy(self.session.run(["logits"], feeds)[0])
+
+
+def load_exported_model(export_dir, backend):
+    """Loads a graph written by export_model, returning (model, tokenizer, class_names) like load_checkpoint."""
+    check_backend(backend)
+    if not is_exported(export_dir, backend):
+        raise FileNotFoundError(f"No {backend} export found in {export_dir}")
+
+    with open(os.path.join(export_dir, METADATA_FILE)) as f:
+        metadata = json.load(f)
+    graph_path = os.path.join(export_dir, GRAPH_FILES[backend])
+    model_class = TorchScriptModel if backend == "torchscript" else OnnxModel
+    model = model_class(graph_path, metadata["input_names"])
+    tokenizer = getattr(transformers, metadata["tokenizer_name"]).from_pretrained(export_dir, local_files_only=True)
+
+    return model, tokenizer, metadata["class_names"]
@@ -0,0 +1,80 @@
+import argparse
+
+import torch
+
+QUANTIZATION_DTYPES = {
+    "int8": torch.qint8,
+}
+
+
+def check_quantize_mode(quantize, device="cpu"):
+    if quantize not in QUANTIZATION_DTYPES:
+        raise ValueError(f"Unsupported quantization mode {quantize!r}, expected one of {sorted(QUANTIZATION_DTYPES)}")
+    if torch.device(device).type != "cpu":
+        raise ValueError("Dynamic quantization is only supported on cpu")
+
+
+def quantize_model(model, quantize="int8"):
+    """Applies dynamic quantization to every linear layer of the transformer and its classification head.
+    Weights are stored as int8 and activations are quantized on the fly, so no calibration data is needed.
+    """
+    check_quantize_mode(quantize)
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=QUANTIZATION_DTYPES[quantize])
+
+
+def score_drift(reference, candidate, texts, batch_size=32):
+    """Parity check between two Detoxify models, e.g. fp32 and int8.
+    Returns the maximum absolute score difference over texts for each class.
+    """
+    if reference.class_names != candidate.class_names:
+        raise ValueError("Models predict different classes and cannot be compared")
+    expected = reference.predict_batch(texts, batch_size=batch_size)
+    actual = candidate.predict_batch(texts, batch_size=batch_size)
+    return {
+        cla: max((abs(a - b) for a, b in zip(expected[cla], actual[cla])), default=0.0) for cla in reference.class_names
+    }
+
+
+if __name__ == "__main__":
+    from detoxify import Detoxify
+
+    parser = argparse.ArgumentParser(description="Report the score drift of a quantized Detoxify model against fp32")
+    parser.add_argument(
+        "--model_type",
+        default="unbiased",
+        type=str,
+        help="model type to compare (default: unbiased)",
+    )
+    parser.add_argument(
+        "--quantize",
+        default="int8",
+        type=str,
+        help="quantization mode (default: int8)",
+    )
+    parser.add_argument(
+        "--input",
+        default=None,
+        type=str,
+        help="txt file with one comment per line to compare on (default: a few built-in examples)",
+    )
+    args = parser.parse_args()
+
+    if args.input is not None:
+        with open(args.input) as f:
+            texts = [line for line in f.read().splitlines() if line.strip()]
+    else:
+        texts = [
+            "shut up, you liar",
+            "i am a jewish woman who is blind",
+            "This is the best thing I have read all week, thank you!",
+            "you are an idiot and everyone hates you",
+        ]
+
+    drift = score_drift(
+        Detoxify(args.model_type),
+        Detoxify(args.model_type, quantize=args.quantize),
+        texts,
+    )
+    for cla, value in drift.items():
+        print(f"{cla:20s} max drift: {value:.5f}")
@@ -0,0 +1,78 @@
+import argparse
+
+from detoxify import Detoxify
+from detoxify.detoxify import MODEL_URLS, export_path, load_checkpoint
+from detoxify.export import export_model, load_exported_model
+from detoxify.quantization import score_drift
+
+
+def main(args):
+    """Exports a Detoxify checkpoint to a TorchScript or ONNX graph usable with Detoxify(backend=...)."""
+    export_dir = args.save_to or export_path(args.model_type, args.checkpoint, args.backend)
+    model, tokenizer, class_names = load_checkpoint(
+        model_type=args.model_type,
+        checkpoint=args.checkpoint,
+        huggingface_config_path=args.huggingface_config_path,
+    )
+    graph_path = export_model(model, tokenizer, class_names, export_dir, backend=args.backend)
+    print(f"Exported {args.backend} graph to {graph_path}")
+
+    if args.verify:
+        eager = Detoxify(
+            model_type=args.model_type,
+            checkpoint=args.checkpoint,
+            huggingface_config_path=args.huggingface_config_path,
+        )
+        graph = Detoxify(
+            model_type=args.model_type,
+            checkpoint=args.checkpoint,
+            backend=args.backend,
+            export_dir=export_dir,
+        )
+        texts = [
+            "shut up, you liar",
+            "i am a jewish woman who is blind",
+            "This is the best thing I have read all week, thank you!",
+        ]
+        for cla, value in score_drift(eager, graph, texts).items():
+            print(f"{cla:20s} max drift: {value:.6f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--model_type",
+        default="original",
+        choices=list(MODEL_URLS),
+        help="released model to export (default: original)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        type=str,
+        help="path to a converted checkpoint to export instead of a released model",
+    )
+    parser.add_argument(
+        "--huggingface_config_path",
+        default=None,
+        type=str,
+        help="path to HF config and tokenizer files for offline loading",
+    )
+    parser.add_argument(
+        "--backend",
+        default="onnx",
+        choices=["onnx", "torchscript"],
+        help="graph format to export to (default: onnx)",
+    )
+    parser.add_argument(
+        "--save_to",
+        default=None,
+        type=str,
+        help="directory to write the export to (default: the Detoxify cache directory)",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="compare scores of the exported graph against the eager model",
+    )
+    main(parser.parse_args())
@@ -0,0 +1,90 @@
+"""gunicorn settings for serving app.py in production.
+
+    gunicorn --config gunicorn.conf.py
+
+WEB_WORKERS processes each run WEB_THREADS request threads. The app is built
+once in the master (PRELOAD_APP, default on) and the workers inherit the loaded
+model copy-on-write. What cannot cross a fork is created per worker on first
+use: the micro-batching threads, the Groq client's event loop and health probe,
+and the SQLite rewrite cache connection. Every worker runs one warm-up forward
+pass before it accepts connections.
+
+Each worker holds a slot 0..WEB_WORKERS-1 (a restarted worker takes over the
+slot of the one it replaces) that picks its share of the CPUs:
+
+    INFERENCE_INTRA_OP_THREADS  torch intra-op threads per worker
+                                (default: the worker's share of the CPUs)
+    INFERENCE_INTER_OP_THREADS  torch inter-op threads per worker (default: torch's)
+    INFERENCE_CPU_AFFINITY      empty: no pinning; "auto": pin each worker to a
+                                disjoint slice of the CPUs; a CPU list such as
+                                "0-7": pin to slices of those CPUs
+
+With INFERENCE_POOL_WORKERS > 0 each web worker scores through its own pool of
+that many model processes, which take the web worker's CPUs and split them the
+same way. The worker's warm-up starts its pool; the master never runs one. Run
+WEB_WORKERS=1 with more WEB_THREADS to scale request handling and model
+replicas independently.
+
+benchmarks/runtime_sweep.py measures which workers x threads split is fastest
+for a given number of cores.
+"""
+
+import os
+
+
+def free_slot(workers, taken):
+    """Lowest worker slot not held by a live worker"""
+    free = sorted(set(range(workers)) - set(taken))
+    return free[0] if free else len(taken) % workers
+
+
+wsgi_app = "app:create_app()"
+bind = f"0.0.0.0:{os.getenv('PORT', '7860')}"
+
+workers = int(os.getenv("WEB_WORKERS", "2"))
+threads = int(os.getenv("WEB_THREADS", "4"))
+worker_class = "gthread"
+preload_app = os.getenv("PRELOAD_APP", "True").lower() == "true"
+
+# Model loading can take a while on a cold start
+timeout = int(os.getenv("WEB_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+intra_op_threads = int(os.getenv("INFERENCE_INTRA_OP_THREADS", "0"))
+inter_op_threads = int(os.getenv("INFERENCE_INTER_OP_THREADS", "0"))
+cpu_affinity = os.getenv("INFERENCE_CPU_AFFINITY", "")
+
+accesslog = "-"
+errorlog = "-"
+
+
+def pre_fork(server, worker):
+    taken = [getattr(live, "cpu_slot", None) for live in server.WORKERS.values()]
+    worker.cpu_slot = free_slot(server.num_workers, [slot for slot in taken if slot is not None])
+
+
+def post_fork(server, worker):
+    from src.inference.runtime import RuntimeConfig, apply_runtime
+
+    config = RuntimeConfig.for_worker(
+        worker.cpu_slot,
+        server.num_workers,
+        intra_op_threads=intra_op_threads,
+        inter_op_threads=inter_op_threads,
+        cpu_affinity=cpu_affinity,
+    )
+    layout = apply_runtime(config)
+    server.log.info(
+        f"Worker {worker.pid} (slot {worker.cpu_slot}): intra-op threads {layout['intra_op_threads']}, "
+        f"inter-op threads {layout['inter_op_threads']}, cpus {layout['cpu_affinity']}"
+    )
+
+
+def post_worker_init(worker):
+    # Runs after the app is loaded and before the worker accepts connections
+    from app import warm_up_inference
+
+    seconds = warm_up_inference()
+    if seconds is None:
+        worker.log.warning(f"Worker {worker.pid}: no model loaded, skipping inference warm-up")
@@ -6,42 +6,80 @@ Ultra-fast professional text rewriting with comprehensive toxic word coverage
 from dotenv import load_dotenv
 load_dotenv() 
 
-from groq import Groq
+import json
 import logging
 import os
 import re
+import time
+from concurrent.futures import wait
+
+from src.lexicon import compile_lexicon
+from src.llm.client import get_shared_client
 
 logger = logging.getLogger(__name__)
 
+WHITESPACE = re.compile(r'\s+')
+
+# Rough token estimate for packing batch prompts (about 4 characters per token)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Approximate token count of text"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
 
 # ============================================
 # GROQ API REWRITER (PRIMARY) ⚡
 # ============================================
 
 class GroqRewriter:
-    def __init__(self, api_key=None):
-        """Initialize Groq with API key"""
+    MODEL = 'llama-3.1-8b-instant'
+    # Bump when the prompt or sampling settings change so cached rewrites are not reused
+    PROMPT_VERSION = '1'
+    BATCH_MAX_COMPLETION_TOKENS = 8192
+
+    def __init__(self, api_key=None, base_url=None, timeout=None, llm_client=None):
+        """Initialize Groq with API key
+
+        Args:
+            base_url (str): API endpoint (default: GROQ_BASE_URL or the Groq cloud)
+            timeout (float): per-request timeout in seconds (default: GROQ_TIMEOUT_SECONDS or 10)
+            llm_client (LLMClient): client to use instead of the process-wide
+                one shared by every Groq caller with the same key and endpoint
+        """
         self.api_key = api_key or os.getenv('GROQ_API_KEY')
-        self.client = None
-        self.is_available = False
+        self.base_url = base_url or os.getenv('GROQ_BASE_URL') or None
+        self.timeout = timeout or float(os.getenv('GROQ_TIMEOUT_SECONDS', '10'))
+        self.client = llm_client
+
+        if self.client is None and self.api_key and self.api_key != 'YOUR_API_KEY_HERE':
+            self.client = get_shared_client(
+                self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_concurrency=int(os.getenv('GROQ_MAX_CONCURRENCY', '16')),
+                max_retries=int(os.getenv('GROQ_MAX_RETRIES', '3')),
+                health_interval=float(os.getenv('GROQ_HEALTH_INTERVAL_SECONDS', '30'))
+            )
 
-        if self.api_key and self.api_key != 'YOUR_API_KEY_HERE':
-            try:
-                self.client = Groq(api_key=self.api_key)
+        if self.client is not None:
+            logger.info("✅ Groq API client configured")
 
-                # Test connection with minimal request
-                test_response = self.client.chat.completions.create(
-                    model="llama-3.1-8b-instant",
-                    messages=[{"role": "user", "content": "test"}],
-                    max_tokens=5
-                )
+    @property
+    def is_available(self):
+        """Configured, and not reported down by the latest background health probe"""
+        return self.client is not None and not self._health().is_down
 
-                self.is_available = True
-                logger.info("✅ Groq API initialized successfully")
+    def health_status(self):
+        """Cached result of the latest health probe (None without an API key)"""
+        return self._health().status() if self.client is not None else None
 
-            except Exception as e:
-                logger.warning(f"⚠️ Groq initialization failed: {str(e)}")
-                self.is_available = False
+    def _health(self):
+        # Availability is probed in the background, never on the startup path. The
+        # probe starts with the first read, so a preloading gunicorn master never runs it
+        self.client.health.start()
+        return self.client.health
 
     def rewrite(self, toxic_text):
         """Rewrite toxic text using Groq API"""
@@ -55,14 +93,14 @@ Original: "{toxic_text}"
 
 Professional version (output ONLY the rewritten text):"""
 
-            response = self.client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[{"role": "user", "content": prompt}],
+            content = self.client.complete(
+                [{"role": "user", "content": prompt}],
+                model=self.MODEL,
                 max_tokens=300,
                 temperature=0.5
             )
 
-            rewritten = response.choices[0].message.content.strip()
+            rewritten = content.strip()
             rewritten = rewritten.strip('"\'')
 
             logger.info(f"✅ Groq rewrite successful")
@@ -72,17 +110,211 @@ Professional version (output ONLY the rewritten text):"""
             logger.error(f"❌ Groq rewrite failed: {str(e)}")
             raise
 
+    def rewrite_batch(self, toxic_texts, max_tokens=None):
+        """Rewrite several texts with one Groq request
+
+        The texts are sent as a JSON object of numbered items and the model
+        is asked to answer with the same ids. Returns one rewritten string per
+        input, or None for items missing from an answer that could not be
+        parsed. Errors from the API call itself are raised.
+        """
+        if not self.is_available:
+            raise Exception("Groq API not available")
+
+        items = {str(number): text for number, text in enumerate(toxic_texts, 1)}
+        prompt = (
+            'Rewrite each toxic feedback item below into professional, constructive '
+            'language while preserving its core message. Remove all profanity, '
+            'insults, and offensive language.\n\n'
+            'Items (JSON object of id -> text):\n'
+            f'{json.dumps(items, ensure_ascii=False)}\n\n'
+            'Reply with ONLY a JSON object mapping every id to its professional version.'
+        )
+
+        if max_tokens is None:
+            max_tokens = min(self.BATCH_MAX_COMPLETION_TOKENS,
+                             sum(2 * estimate_tokens(text) + 16 for text in toxic_texts))
+        content = self.client.complete(
+            [{"role": "user", "content": prompt}],
+            model=self.MODEL,
+            max_tokens=max_tokens,
+            temperature=0.5
+        )
+        return parse_batch_reply(content, len(items))
+
+
+def pack_batches(texts, max_tokens):
+    """Split texts into consecutive groups whose estimated prompt size fits max_tokens
+
+    A text that alone exceeds max_tokens forms its own group.
+    """
+    batch, size = [], 0
+    for text in texts:
+        # Item id and JSON punctuation cost a few tokens on top of the text
+        tokens = estimate_tokens(text) + 4
+        if batch and size + tokens > max_tokens:
+            yield batch
+            batch, size = [], 0
+        batch.append(text)
+        size += tokens
+    if batch:
+        yield batch
+
+
+def parse_batch_reply(content, count):
+    """Extract the per-item rewrites from a batch reply
+
+    Accepts the JSON object optionally wrapped in prose or a code fence.
+    Returns a list of ``count`` strings, with None for every id that is
+    missing, empty or not a string.
+    """
+    outputs = [None] * count
+    start, end = content.find('{'), content.rfind('}')
+    if start == -1 or end < start:
+        return outputs
+    try:
+        parsed = json.loads(content[start:end + 1])
+    except ValueError:
+        return outputs
+    if not isinstance(parsed, dict):
+        return outputs
+
+    for number in range(1, count + 1):
+        value = parsed.get(str(number))
+        if isinstance(value, str) and value.strip().strip('"\''):
+            outputs[number - 1] = value.strip().strip('"\'')
+    return outputs
+
 
 # ============================================
 # ENHANCED RULE-BASED REWRITER (FALLBACK) 🔄
 # ============================================
 
+# Default rule tables. A JSON file with any of the keys "replacements",
+# "negative_indicators" and "professional_starters" can replace them.
+TOXIC_REPLACEMENTS = {
+    # Strong profanity - FIXED
+    'fuck': 'very',
+    'fucking': 'very',
+    'fucked': 'flawed',
+    'fck': 'very',
+    'f*ck': 'very',
+    'shit': 'poor',
+    'shitty': 'subpar',
+    'sh*t': 'poor',
+    'bullshit': 'substandard',
+    'bs': 'substandard',
+    'damn': 'darn',  # FIXED: was empty, now has value
+    'damned': 'unfortunate',
+    'hell': 'heck',
+    'ass': 'rear',  # FIXED: was empty
+    'arse': 'rear',
+    'asshole': 'person',  # Singular
+    'assholes': 'people',  # FIXED: Added plural
+    'bastard': 'person',
+    'bastards': 'individuals',
+    'bitch': 'person',
+    'bitches': 'people',
+    'piss': 'annoy',
+    'pissed': 'frustrated',
+
+    # Intelligence insults - COMPLETE
+    'stupid': 'inexperienced',
+    'idiot': 'individual',
+    'idiots': 'team members',
+    'moron': 'person',
+    'morons': 'individuals',
+    'dumb': 'uninformed',
+    'dumbass': 'person',
+    'fool': 'person',
+    'fools': 'individuals',
+    'retard': 'person',
+    'retarded': 'limited',
+    'imbecile': 'person',
+    'dimwit': 'person',
+
+    # Quality insults
+    'garbage': 'substandard',
+    'trash': 'inadequate',
+    'crap': 'unsatisfactory',
+    'crappy': 'poor quality',
+    'rubbish': 'inadequate',
+    'junk': 'subpar',
+    'worthless': 'of limited value',
+    'useless': 'ineffective',
+    'pathetic': 'disappointing',
+    'terrible': 'below expectations',
+    'awful': 'concerning',
+    'horrible': 'problematic',
+    'horrendous': 'very poor',
+    'abysmal': 'very poor',
+    'worst': 'least effective',
+    'lousy': 'poor',
+    'crummy': 'inadequate',
+    'disgusting': 'unpleasant',
+
+    # Behavioral insults
+    'lazy': 'unmotivated',
+    'incompetent': 'inexperienced',
+    'amateur': 'beginner',
+    'joke': 'less serious',
+    'clown': 'person',
+    'clowns': 'individuals',
+    'loser': 'person',
+    'losers': 'individuals',
+
+    # Verbs/actions
+    'sucks': 'needs improvement',
+    'sucking': 'performing poorly',
+    'hate': 'dislike',
+    'hating': 'disliking',
+    'despise': 'dislike',
+    'detest': 'dislike',
+}
+
+# Words that get professional framing added to the rewrite
+NEGATIVE_INDICATORS = [
+    'substandard', 'inadequate', 'disappointing', 'needs improvement',
+    'inexperienced', 'below expectations', 'poor', 'subpar',
+    'ineffective', 'concerning', 'problematic', 'limited',
+    'uninformed', 'unmotivated', 'flawed', 'unpleasant'
+]
+
+PROFESSIONAL_STARTERS = [
+    'i believe', 'in my opinion', 'it appears', 'from my perspective', 'this']
+
+
+def load_rule_tables(path=None):
+    """Load rule tables from a JSON file, falling back to the defaults per key"""
+    tables = {}
+    if path:
+        with open(path, encoding='utf-8') as f:
+            tables = json.load(f)
+
+    return {
+        'replacements': tables.get('replacements', TOXIC_REPLACEMENTS),
+        'negative_indicators': tables.get('negative_indicators', NEGATIVE_INDICATORS),
+        'professional_starters': tables.get('professional_starters', PROFESSIONAL_STARTERS),
+    }
+
+
 class RuleBasedRewriter:
     """Enhanced rule-based detoxification - FIXED version"""
 
-    def __init__(self):
+    def __init__(self, rules_path=None):
+        tables = load_rule_tables(rules_path)
+
+        # Compiled once: every replacement is applied in a single regex pass
+        self.replacements = {
+            k.lower(): v for k, v in tables['replacements'].items()}
+        self.replacement_pattern = compile_lexicon(
+            self.replacements, whole_words=True)
+        self.negative_pattern = compile_lexicon(tables['negative_indicators'])
+        self.professional_starters = tuple(
+            s.lower() for s in tables['professional_starters'])
         self.is_available = True
-        logger.info("✅ Rule-based rewriter initialized")
+        logger.info(
+            f"✅ Rule-based rewriter initialized ({len(self.replacements)} rules)")
 
     def rewrite(self, toxic_text):
         """Rewrite toxic text using comprehensive rule-based approach"""
@@ -94,100 +326,18 @@ class RuleBasedRewriter:
             logger.error(f"❌ Rule-based rewrite failed: {str(e)}")
             return toxic_text
 
+    def _replace(self, match):
+        word = match.group(0)
+        return self.replacements.get(word.lower(), word)
+
     def _comprehensive_detoxify(self, text):
         """FIXED: Comprehensive toxic word replacement"""
 
-        # UPDATED toxic word replacements - FIXED ISSUES
-        toxic_replacements = {
-            # Strong profanity - FIXED
-            'fuck': 'very',
-            'fucking': 'very',
-            'fucked': 'flawed',
-            'fck': 'very',
-            'f*ck': 'very',
-            'shit': 'poor',
-            'shitty': 'subpar',
-            'sh*t': 'poor',
-            'bullshit': 'substandard',
-            'bs': 'substandard',
-            'damn': 'darn',  # FIXED: was empty, now has value
-            'damned': 'unfortunate',
-            'hell': 'heck',
-            'ass': 'rear',  # FIXED: was empty
-            'arse': 'rear',
-            'asshole': 'person',  # Singular
-            'assholes': 'people',  # FIXED: Added plural
-            'bastard': 'person',
-            'bastards': 'individuals',
-            'bitch': 'person',
-            'bitches': 'people',
-            'piss': 'annoy',
-            'pissed': 'frustrated',
-
-            # Intelligence insults - COMPLETE
-            'stupid': 'inexperienced',
-            'idiot': 'individual',
-            'idiots': 'team members',
-            'moron': 'person',
-            'morons': 'individuals',
-            'dumb': 'uninformed',
-            'dumbass': 'person',
-            'fool': 'person',
-            'fools': 'individuals',
-            'retard': 'person',
-            'retarded': 'limited',
-            'imbecile': 'person',
-            'dimwit': 'person',
-
-            # Quality insults
-            'garbage': 'substandard',
-            'trash': 'inadequate',
-            'crap': 'unsatisfactory',
-            'crappy': 'poor quality',
-            'rubbish': 'inadequate',
-            'junk': 'subpar',
-            'worthless': 'of limited value',
-            'useless': 'ineffective',
-            'pathetic': 'disappointing',
-            'terrible': 'below expectations',
-            'awful': 'concerning',
-            'horrible': 'problematic',
-            'horrendous': 'very poor',
-            'abysmal': 'very poor',
-            'worst': 'least effective',
-            'lousy': 'poor',
-            'crummy': 'inadequate',
-            'disgusting': 'unpleasant',
-
-            # Behavioral insults
-            'lazy': 'unmotivated',
-            'incompetent': 'inexperienced',
-            'amateur': 'beginner',
-            'joke': 'less serious',
-            'clown': 'person',
-            'clowns': 'individuals',
-            'loser': 'person',
-            'losers': 'individuals',
-
-            # Verbs/actions
-            'sucks': 'needs improvement',
-            'sucking': 'performing poorly',
-            'hate': 'dislike',
-            'hating': 'disliking',
-            'despise': 'dislike',
-            'detest': 'dislike',
-        }
-
-        # Process text
-        result = text
-
-        # Replace toxic words using regex for whole words only
-        for toxic, replacement in toxic_replacements.items():
-            pattern = r'\b' + re.escape(toxic) + r'\b'
-            result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
+        # Replace toxic whole words in one pass
+        result = self.replacement_pattern.sub(self._replace, text)
 
         # Clean up multiple spaces
-        result = re.sub(r'\s+', ' ', result)
+        result = WHITESPACE.sub(' ', result)
         result = result.strip()
 
         # Capitalize first letter
@@ -198,19 +348,9 @@ class RuleBasedRewriter:
         if result and result[-1] not in '.!?':
             result += '.'
 
-        # Add professional framing for negative feedback
-        negative_indicators = [
-            'substandard', 'inadequate', 'disappointing', 'needs improvement',
-            'inexperienced', 'below expectations', 'poor', 'subpar',
-            'ineffective', 'concerning', 'problematic', 'limited',
-            'uninformed', 'unmotivated', 'flawed', 'unpleasant'
-        ]
-
         # Only add framing if it contains negative words
-        if any(word in result.lower() for word in negative_indicators):
-            professional_starters = [
-                'i believe', 'in my opinion', 'it appears', 'from my perspective', 'this']
-            if not any(result.lower().startswith(starter) for starter in professional_starters):
+        if self.negative_pattern.search(result):
+            if not result.lower().startswith(self.professional_starters):
                 result = "I believe " + result[0].lower() + result[1:]
 
         return result
@@ -221,24 +361,126 @@ class RuleBasedRewriter:
 # ============================================
 
 class HybridRewriter:
-    def __init__(self, api_key=None, groq_api_key=None, prefer_local=False):
+    def __init__(self, api_key=None, groq_api_key=None, prefer_local=False, rules_path=None,
+                 groq_base_url=None, cache=None):
         """
         Initialize hybrid rewriter with Groq and Rule-based fallback
 
         Args:
             groq_api_key (str): Groq API key
             prefer_local (bool): Use rule-based method (default: False to use Groq)
+            rules_path (str): JSON file with rule-based replacement tables
+            groq_base_url (str): Groq-compatible API endpoint
+            cache (RewriteCache): optional cache of Groq rewrites
         """
-        self.groq = GroqRewriter(api_key or groq_api_key)
-        self.rule_based = RuleBasedRewriter()
+        self.groq = GroqRewriter(api_key or groq_api_key, base_url=groq_base_url)
+        self.rule_based = RuleBasedRewriter(rules_path)
         self.prefer_local = prefer_local
+        self.cache = cache
 
         logger.info("🚀 Hybrid Rewriter initialized")
         logger.info(
-            f"   - Groq API: {'✅ Ready' if self.groq.is_available else '❌ Unavailable'}")
+            f"   - Groq API: {'✅ Ready' if self.groq.client is not None else '❌ Unavailable'}")
         logger.info(f"   - Rule-based: ✅ Ready")
         logger.info(f"   - Prefer Local: {prefer_local}")
 
+    def _cache_version(self):
+        return f"{self.groq.MODEL}:{self.groq.PROMPT_VERSION}"
+
+    def rewrite_with_groq(self, toxic_text):
+        """Rewrite with Groq, reusing a cached result for the same normalized text"""
+        if self.cache is None:
+            return self.groq.rewrite(toxic_text)
+        return self.cache.get_or_compute(
+            toxic_text, 'groq', self._cache_version(), lambda: self.groq.rewrite(toxic_text))
+
+    def rewrite_many(self, toxic_texts, max_prompt_tokens=2000, executor=None, budget_seconds=None):
+        """
+        Rewrite many texts with as few Groq requests as possible
+
+        Distinct texts are packed into batch prompts of about max_prompt_tokens
+        each. Items missing from a batch reply, and all items of a failed
+        request, fall back to the rule-based rewriter one by one.
+
+        With an executor the batches run concurrently on it; any batch not done
+        after budget_seconds falls back to the rule-based rewriter at once and
+        keeps running in the background, where its answer still fills the cache.
+
+        Returns:
+            list: one result per input, shaped like rewrite()
+        """
+        texts = list(toxic_texts)
+        if self.prefer_local or not self.groq.is_available:
+            return [self._rule_based_result(text) for text in texts]
+
+        version = self._cache_version()
+        outcomes = {}
+        uncached = []
+        for text in dict.fromkeys(texts):
+            cached = self.cache.get(text, 'groq', version) if self.cache else None
+            if cached is not None:
+                outcomes[text] = self._groq_result(cached)
+            else:
+                uncached.append(text)
+
+        batches = list(pack_batches(uncached, max_prompt_tokens))
+        if executor is None:
+            answers = [self._rewrite_batch(batch, version) for batch in batches]
+        else:
+            futures = [executor.submit(self._rewrite_batch, batch, version) for batch in batches]
+            wait(futures, timeout=budget_seconds)
+            over_budget = (None, f'Groq batch over the {budget_seconds}s rewrite budget')
+            answers = [future.result() if future.done() else over_budget for future in futures]
+            skipped = sum(not future.done() for future in futures)
+            if skipped:
+                logger.info(f"{skipped} Groq batches over the rewrite budget, using rule-based fallback")
+
+        for batch, (outputs, error) in zip(batches, answers):
+            outputs = outputs or [None] * len(batch)
+            for text, output in zip(batch, outputs):
+                if output is None:
+                    outcomes[text] = self._rule_based_result(text, error)
+                else:
+                    outcomes[text] = self._groq_result(output)
+
+        return [dict(outcomes[text]) for text in texts]
+
+    def _rewrite_batch(self, batch, version):
+        """One Groq request for a batch; returns (outputs or None, error) and caches the answers"""
+        start = time.perf_counter()
+        try:
+            outputs = self.groq.rewrite_batch(batch)
+        except Exception as e:
+            logger.warning(f"⚠️ Groq batch of {len(batch)} failed, using rule-based fallback")
+            return None, str(e)
+        seconds = (time.perf_counter() - start) / len(batch)
+        if self.cache:
+            for text, output in zip(batch, outputs):
+                if output is not None:
+                    self.cache.set(text, 'groq', version, output, seconds)
+        return outputs, 'Missing from Groq batch reply'
+
+    @staticmethod
+    def _groq_result(rewritten):
+        return {'rewritten_text': rewritten, 'method_used': 'groq', 'success': True, 'error': None}
+
+    def _rule_based_result(self, toxic_text, error=None):
+        try:
+            return {
+                'rewritten_text': self.rule_based.rewrite(toxic_text),
+                'method_used': 'rules',
+                'success': True,
+                'error': error
+            }
+        except Exception as e:
+            logger.error(f"❌ All rewriting methods failed: {str(e)}")
+            return {
+                'rewritten_text': toxic_text,
+                'method_used': 'failed',
+                'success': False,
+                'error': f"All methods failed: {str(e)}"
+            }
+
     def rewrite(self, toxic_text):
         """
         Intelligently rewrite toxic text using best available method
@@ -257,7 +499,7 @@ class HybridRewriter:
         # Try Groq first ONLY if prefer_local is False AND Groq is available
         if not self.prefer_local and self.groq.is_available:
             try:
-                result['rewritten_text'] = self.groq.rewrite(toxic_text)
+                result['rewritten_text'] = self.rewrite_with_groq(toxic_text)
                 result['method_used'] = 'groq'
                 result['success'] = True
                 return result
@@ -266,16 +508,7 @@ class HybridRewriter:
                 result['error'] = str(e)
 
         # Use rule-based rewriter as fallback
-        try:
-            result['rewritten_text'] = self.rule_based.rewrite(toxic_text)
-            result['method_used'] = 'rules'
-            result['success'] = True
-            return result
-        except Exception as e:
-            logger.error(f"❌ All rewriting methods failed: {str(e)}")
-            result['error'] = f"All methods failed: {str(e)}"
-            result['method_used'] = 'failed'
-            return result
+        return self._rule_based_result(toxic_text, result['error'])
 
 
 # ============================================
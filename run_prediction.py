@@ -1,4 +1,6 @@
 import argparse
+import csv
+import json
 import os
 
 import pandas as pd
@@ -20,17 +22,123 @@ def load_input_text(input_obj):
     return text
 
 
-def run(model_name, input_obj, dest_file, from_ckpt, device="cpu"):
+def iter_input_lines(input_file, offset=0):
+    """Lazily yields (line, end_offset) pairs from a txt file, starting at byte offset.
+    end_offset is the byte position right after the line, so a run can resume from it."""
+
+    with open(input_file, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            offset += len(raw)
+            yield raw.decode("utf-8").rstrip("\r\n"), offset
+
+
+def iter_chunks(iterable, chunk_size):
+    """Groups an iterable into lists of at most chunk_size items."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load_stream_checkpoint(checkpoint_file, input_file):
+    """Returns the saved progress for input_file, or None if there is nothing to resume."""
+    if not os.path.isfile(checkpoint_file):
+        return None
+    with open(checkpoint_file) as f:
+        state = json.load(f)
+    if state.get("input_file") != os.path.abspath(input_file):
+        raise ValueError(f"Checkpoint {checkpoint_file} belongs to a different input file: {state.get('input_file')}")
+    return state
+
+
+def save_stream_checkpoint(checkpoint_file, state):
+    """Atomically writes the streaming progress so a crash never leaves a half-written checkpoint."""
+    tmp_file = checkpoint_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_file, checkpoint_file)
+
+
+def stream_predictions(
+    model, input_file, dest_file, chunk_size=1024, batch_size=32, output_format=None, resume=False, checkpoint_file=None
+):
+    """Scores a txt file chunk by chunk and appends rows to dest_file as each chunk completes.
+    Only one chunk of lines and scores is held in memory at a time. After every chunk the
+    input byte offset and output size are saved to checkpoint_file (default: dest_file + ".ckpt"),
+    so a run started with resume=True continues after the last completed chunk.
+    Output is CSV, or JSON lines if output_format is "jsonl" or dest_file ends in .jsonl.
+    Returns the total number of lines scored.
+    """
+    if not input_file.endswith(".txt"):
+        raise ValueError("Invalid file type: only txt files supported.")
+    if output_format is None:
+        output_format = "jsonl" if dest_file.endswith(".jsonl") else "csv"
+    if output_format not in ("csv", "jsonl"):
+        raise ValueError("Invalid output format: must be csv or jsonl.")
+    checkpoint_file = checkpoint_file or dest_file + ".ckpt"
+
+    state = load_stream_checkpoint(checkpoint_file, input_file) if resume else None
+    if state is None:
+        state = {"input_file": os.path.abspath(input_file), "input_offset": 0, "output_size": 0, "lines_done": 0}
+        open(dest_file, "w").close()
+
+    with open(dest_file, "r+", newline="", encoding="utf-8") as out:
+        # drop anything written after the last checkpoint, e.g. by a run that was killed mid-chunk
+        out.truncate(state["output_size"])
+        out.seek(state["output_size"])
+        writer = csv.writer(out)
+
+        for chunk in iter_chunks(iter_input_lines(input_file, state["input_offset"]), chunk_size):
+            text = [line for line, _ in chunk]
+            res = model.predict_batch(text, batch_size=batch_size)
+            class_names = list(res)
+
+            if output_format == "csv" and state["output_size"] == 0:
+                writer.writerow(["input_text"] + class_names)
+            for i, line in enumerate(text):
+                scores = [round(res[cla][i], 5) for cla in class_names]
+                if output_format == "csv":
+                    writer.writerow([line] + scores)
+                else:
+                    out.write(json.dumps({"input_text": line, **dict(zip(class_names, scores))}) + "\n")
+
+            out.flush()
+            os.fsync(out.fileno())
+            state["input_offset"] = chunk[-1][1]
+            state["output_size"] = out.tell()
+            state["lines_done"] += len(chunk)
+            save_stream_checkpoint(checkpoint_file, state)
+            print(f"Scored {state['lines_done']} lines")
+
+    if os.path.isfile(checkpoint_file):
+        os.remove(checkpoint_file)
+    return state["lines_done"]
+
+
+def load_detoxify(model_name, from_ckpt, device="cpu"):
+    """Loads the Detoxify model either by name or from a checkpoint path."""
+    if model_name is not None:
+        return Detoxify(model_name, device=device)
+    return Detoxify(checkpoint=from_ckpt, device=device)
+
+
+def run(model_name, input_obj, dest_file, from_ckpt, device="cpu", batch_size=32):
     """Loads model from checkpoint or from model name and runs inference on the input_obj.
+    Lists of texts are scored in length-sorted batches of batch_size.
     Displays results as a pandas DataFrame object.
     If a dest_file is given, it saves the results to a txt file.
     """
     text = load_input_text(input_obj)
-    if model_name is not None:
-        model = Detoxify(model_name, device=device)
+    model = load_detoxify(model_name, from_ckpt, device=device)
+    if isinstance(text, str):
+        res = model.predict(text)
     else:
-        model = Detoxify(checkpoint=from_ckpt, device=device)
-    res = model.predict(text)
+        res = model.predict_batch(text, batch_size=batch_size)
 
     res_df = pd.DataFrame(
         res,
@@ -70,12 +178,40 @@ if __name__ == "__main__":
         type=str,
         help="Option to load from the checkpoint path (default: False)",
     )
+    parser.add_argument(
+        "--batch_size",
+        default=32,
+        type=int,
+        help="number of texts per forward pass when scoring a txt file (default: 32)",
+    )
     parser.add_argument(
         "--save_to",
         default=None,
         type=str,
         help="destination path to output model results to (default: None)",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="score a txt file in bounded chunks, writing rows to --save_to as they complete",
+    )
+    parser.add_argument(
+        "--chunk_size",
+        default=1024,
+        type=int,
+        help="number of lines read and scored per chunk in streaming mode (default: 1024)",
+    )
+    parser.add_argument(
+        "--output_format",
+        default=None,
+        choices=["csv", "jsonl"],
+        help="streaming output format (default: inferred from --save_to, csv unless it ends in .jsonl)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue an interrupted streaming run from its checkpoint file",
+    )
 
     args = parser.parse_args()
 
@@ -95,10 +231,24 @@ if __name__ == "__main__":
     if args.from_ckpt_path is not None:
         assert os.path.isfile(args.from_ckpt_path)
 
-    run(
-        args.model_name,
-        args.input,
-        args.save_to,
-        args.from_ckpt_path,
-        device=args.device,
-    )
+    if args.stream:
+        if args.save_to is None or not os.path.isfile(args.input):
+            raise ValueError("Streaming mode needs a txt file as --input and a --save_to destination.")
+        stream_predictions(
+            load_detoxify(args.model_name, args.from_ckpt_path, device=args.device),
+            args.input,
+            args.save_to,
+            chunk_size=args.chunk_size,
+            batch_size=args.batch_size,
+            output_format=args.output_format,
+            resume=args.resume,
+        )
+    else:
+        run(
+            args.model_name,
+            args.input,
+            args.save_to,
+            args.from_ckpt_path,
+            device=args.device,
+            batch_size=args.batch_size,
+        )
@@ -0,0 +1,155 @@
+"""Small thread-safe caching primitives shared by the scoring and rewriting layers."""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Protocol, Tuple
+
+
+class CacheBackend(Protocol):
+    """Interface for an optional shared cache tier (e.g. one visible to every worker)."""
+
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        ...
+
+
+class LRUCache:
+    """In-process LRU cache whose entries also expire after ``ttl_seconds``."""
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        ttl_seconds: Optional[float] = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss or an expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Insert or refresh an entry, evicting the least recently used one when full."""
+        expires_at = self._clock() + self.ttl_seconds if self.ttl_seconds is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and the current hit ratio."""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["max_size"] = self.max_size
+        stats["ttl_seconds"] = self.ttl_seconds
+        return stats
+
+
+class SqliteCacheBackend:
+    """Persistent cache tier in a local SQLite file; values must be JSON-serializable.
+
+    Each process opens its own connection on first use: SQLite connections must
+    not be carried across ``fork()``, and a backend built in a preloading gunicorn
+    master is shared by every worker forked from it.
+    """
+
+    def __init__(self, path: str, table: str = "cache", clock: Callable[[], float] = time.time) -> None:
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table!r}")
+        self.path = path
+        self.table = table
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = self._conn
+        if conn is None or self._pid != os.getpid():
+            with self._open_lock:
+                if self._conn is None or self._pid != os.getpid():
+                    # A connection inherited from the parent is left alone: even
+                    # closing it could release the parent's file locks
+                    self._lock = threading.Lock()
+                    self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                    with self._conn:
+                        self._conn.execute(
+                            f"CREATE TABLE IF NOT EXISTS {self.table} "
+                            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                        )
+                    self._pid = os.getpid()
+                conn = self._conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        conn = self._connection()
+        with self._lock:
+            row = conn.execute(f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= self._clock():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        conn = self._connection()
+        with self._lock, conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), self._clock() + ttl_seconds),
+            )
+
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed."""
+        conn = self._connection()
+        with self._lock, conn:
+            cursor = conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (self._clock(),))
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Close this process's connection; the next call opens a new one."""
+        with self._open_lock:
+            if self._conn is None or self._pid != os.getpid():
+                return
+            with self._lock:
+                self._conn.close()
+            self._conn, self._pid = None, None
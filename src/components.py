@@ -0,0 +1,115 @@
+"""Application components initialized once, on first use or in an explicit warm-up."""
+
+from __future__ import annotations
+
+import functools
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LOADED = "loaded"
+FAILED = "failed"
+
+
+@dataclass
+class Component:
+    """A named subsystem; ``loader`` imports and initializes it and returns True on success."""
+
+    name: str
+    loader: Callable[[], bool]
+    status: str = PENDING
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+    loaded_at: Optional[str] = None
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class ComponentRegistry:
+    """Runs each component's loader at most once per process and records how long it took.
+
+    A loader that fails (returns False or raises) is not retried on later use,
+    so requests do not each pay for a broken load; :meth:`reload` tries again.
+    """
+
+    def __init__(self) -> None:
+        self._components: Dict[str, Component] = {}
+
+    def register(self, name: str, loader: Callable[[], bool]) -> None:
+        if name in self._components:
+            raise ValueError(f"Component {name!r} is already registered")
+        self._components[name] = Component(name, loader)
+
+    def __getitem__(self, name: str) -> Component:
+        return self._components[name]
+
+    def ensure(self, name: str) -> bool:
+        """Load ``name`` unless that was already attempted; return whether it is loaded."""
+        component = self._components[name]
+        if component.status == PENDING:
+            with component.lock:
+                if component.status == PENDING:
+                    self._load(component)
+        return component.status == LOADED
+
+    def reload(self, name: str) -> bool:
+        component = self._components[name]
+        with component.lock:
+            self._load(component)
+        return component.status == LOADED
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """Load the named components (default: all, in registration order) now."""
+        return {name: self.ensure(name) for name in (names or list(self._components))}
+
+    def requires(
+        self, *names: str, unless: Optional[Callable[[], bool]] = None
+    ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Decorator that ensures ``names`` are loaded before the wrapped function runs.
+
+        Calls for which ``unless()`` is true run without loading anything.
+        """
+
+        def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+            @functools.wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if unless is None or not unless():
+                    for name in names:
+                        self.ensure(name)
+                return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-component status, load time in seconds and error, without loading anything."""
+        return {
+            name: {
+                "status": component.status,
+                "seconds": component.seconds,
+                "error": component.error,
+                "loaded_at": component.loaded_at,
+            }
+            for name, component in self._components.items()
+        }
+
+    @staticmethod
+    def _load(component: Component) -> None:
+        start = time.perf_counter()
+        try:
+            loaded = bool(component.loader())
+            error = None if loaded else "loader reported failure"
+        except Exception as exc:
+            logger.error(f"Component {component.name} failed to load: {exc}", exc_info=True)
+            loaded, error = False, str(exc)
+        component.seconds = round(time.perf_counter() - start, 3)
+        component.error = error
+        component.loaded_at = datetime.utcnow().isoformat()
+        component.status = LOADED if loaded else FAILED
+        logger.info(f"Component {component.name} {component.status} in {component.seconds:.2f}s")
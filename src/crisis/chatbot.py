@@ -2,8 +2,13 @@
 Conversational crisis support bot with escalation logic.
 """
 
-from groq import Groq
 import logging
+from typing import Dict, List, Optional
+
+from src.llm.client import LLMClient, get_shared_client
+
+from .detector import CrisisDetector
+from .resources import CrisisResources
 
 logger = logging.getLogger(__name__)
 
@@ -13,8 +18,11 @@ class CrisisChatbot:
     Follows evidence-based crisis intervention protocols.
     """
     
-    def __init__(self, groq_api_key: str):
-        self.client = Groq(api_key=groq_api_key)
+    MODEL = 'llama-3.1-8b-instant'
+
+    def __init__(self, groq_api_key: str, llm_client: Optional[LLMClient] = None):
+        # Shares the pooled client of every other Groq caller using this key
+        self.client = llm_client or get_shared_client(groq_api_key)
         self.detector = CrisisDetector()
     
     def respond(self, user_message: str, conversation_history: List[Dict], user_context: Dict) -> Dict:
@@ -49,18 +57,16 @@ class CrisisChatbot:
         prompt = self._build_crisis_prompt(user_message, risk, response_type)
         
         try:
-            completion = self.client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[
+            bot_message = self.client.complete(
+                [
                     {"role": "system", "content": self._get_system_prompt()},
                     *conversation_history,
                     {"role": "user", "content": prompt}
                 ],
+                model=self.MODEL,
                 temperature=0.7,
                 max_tokens=300
             )
-            
-            bot_message = completion.choices[0].message.content
         except Exception as e:
             logger.error(f"Groq error: {e}")
             bot_message = self._fallback_response(risk['risk_level'])
@@ -76,6 +82,30 @@ class CrisisChatbot:
             'next_action': risk['recommended_action']
         }
     
+    def _build_crisis_prompt(self, user_message: str, risk: Dict, response_type: str) -> str:
+        """User turn annotated with the assessed risk so the reply matches it"""
+        guidance = {
+            'high_risk': 'The user shows signs of serious distress. Respond with care, '
+                         'gently ask about their safety and encourage contacting a crisis line.',
+            'medium_risk': 'The user seems to be struggling. Validate their feelings and '
+                           'offer one practical coping strategy.',
+            'supportive': 'Respond warmly and supportively.'
+        }[response_type]
+
+        return f"""{user_message}
+
+[Assessment: risk level {risk['risk_level']}. {guidance}]"""
+
+    def _fallback_response(self, risk_level: str) -> str:
+        """Canned reply used when the LLM cannot be reached"""
+        if risk_level == 'HIGH':
+            return ("I'm really sorry you're going through this. You don't have to face it alone - "
+                    "please consider reaching out to a crisis line or someone you trust right now.")
+        if risk_level == 'MEDIUM':
+            return ("That sounds really hard. I'm here to listen. Would you like to tell me more "
+                    "about what's been going on?")
+        return "Thank you for sharing that with me. How are you feeling right now?"
+
     def _get_system_prompt(self) -> str:
         """System prompt for crisis counseling"""
         return """You are a compassionate mental health support assistant trained in crisis intervention.
@@ -48,8 +48,32 @@ class CrisisDetector:
     def __init__(self):
         """Initialize detector - keyword-mode only for Phase 1"""
         self.classifier = None
+        self._compile_patterns()
         logger.info("Crisis detector initialized (keyword-mode)")
 
+    def _compile_patterns(self):
+        """Compile every tier into one scanner with a named group per pattern"""
+        self._tiers = {}
+        alternatives = []
+        lookaheads = []
+        for tier, patterns in (('imminent', self.IMMINENT_DANGER_KEYWORDS),
+                               ('high', self.HIGH_RISK_KEYWORDS),
+                               ('medium', self.MEDIUM_RISK_KEYWORDS)):
+            self._tiers[tier] = []
+            for index, pattern in enumerate(patterns):
+                name = f'{tier}_{index}'
+                self._tiers[tier].append((name, pattern))
+                # Only the named groups are needed, inner groups need not capture
+                body = re.sub(r'(?<!\\)\((?!\?)', '(?:', pattern)
+                alternatives.append(f'(?:{body})')
+                lookaheads.append(f'(?:(?=(?P<{name}>{body})))?')
+
+        # The leading lookahead skips positions where no pattern starts. At the
+        # others, each optional lookahead records its pattern if it starts there,
+        # so patterns with overlapping matches are all found in one scan.
+        self._scanner = re.compile(
+            '(?=' + '|'.join(alternatives) + ')' + ''.join(lookaheads))
+
     def detect_risk(self, text: str, conversation_history: List[str] = None) -> Dict:
         """
         Perform risk assessment using keyword matching only
@@ -78,30 +102,31 @@ class CrisisDetector:
         """Rule-based keyword detection"""
         text_lower = text.lower()
 
-        # Check imminent danger first
-        for pattern in self.IMMINENT_DANGER_KEYWORDS:
-            if re.search(pattern, text_lower):
-                return {
-                    'level': 'IMMINENT',
-                    'triggers': [pattern],
-                    'confidence': 0.95
-                }
-
-        # Check high risk
-        high_matches = []
-        for pattern in self.HIGH_RISK_KEYWORDS:
-            if re.search(pattern, text_lower):
-                high_matches.append(pattern)
-
-        if len(high_matches) >= 1:
-            return {'level': 'HIGH', 'triggers': high_matches, 'confidence': 0.85}
-
-        # Check medium risk
-        medium_matches = []
-        for pattern in self.MEDIUM_RISK_KEYWORDS:
-            if re.search(pattern, text_lower):
-                medium_matches.append(pattern)
+        matched = set()
+        for match in self._scanner.finditer(text_lower):
+            matched.update(
+                name for name, value in match.groupdict().items() if value is not None)
+
+        if not matched:
+            return {'level': 'LOW', 'triggers': [], 'confidence': 0.5}
+
+        triggers = {
+            tier: [pattern for name, pattern in patterns if name in matched]
+            for tier, patterns in self._tiers.items()
+        }
+
+        # Imminent danger takes precedence; its first pattern is the trigger
+        if triggers['imminent']:
+            return {
+                'level': 'IMMINENT',
+                'triggers': triggers['imminent'][:1],
+                'confidence': 0.95
+            }
+
+        if len(triggers['high']) >= 1:
+            return {'level': 'HIGH', 'triggers': triggers['high'], 'confidence': 0.85}
 
+        medium_matches = triggers['medium']
         if len(medium_matches) >= 2:
             return {'level': 'MEDIUM', 'triggers': medium_matches, 'confidence': 0.65}
         elif len(medium_matches) == 1:
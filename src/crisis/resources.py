@@ -3,9 +3,7 @@ Geo-located crisis hotlines and resources.
 """
 
 from typing import Dict, List
-from geopy.geocoders import Nominatim
-import phonenumbers
-from datetime import datetime  # ← ADD THIS LINE
+from datetime import datetime
 
 
 class CrisisResources:
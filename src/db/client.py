@@ -2,12 +2,17 @@
 
 from __future__ import annotations
 
+import logging
 import os
-from typing import Optional
+import threading
+from typing import Any, Optional
 
 import mongomock
 from pymongo import MongoClient
 from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
 
 # Cached client instance (real or mock depending on configuration)
 _client: Optional[MongoClient] = None
@@ -38,4 +43,22 @@ def get_database(uri: str, database_name: str):
 def get_collection(uri: str, database_name: str, collection_name: str) -> Collection:
     """Return a collection handle from the configured database."""
     database = get_database(uri, database_name)
-    return database[collection_name]
\ No newline at end of file
+    return database[collection_name]
+
+
+def create_index_in_background(collection: Collection, keys: Any, **kwargs: Any) -> threading.Thread:
+    """Create an index on a daemon thread so startup never waits for the server.
+
+    Index creation is idempotent; failures are logged and the collection stays
+    usable without the index.
+    """
+
+    def create() -> None:
+        try:
+            collection.create_index(keys, **kwargs)
+        except PyMongoError as exc:
+            logger.warning(f"Could not create index {keys!r} on {collection.name}: {exc}")
+
+    thread = threading.Thread(target=create, name=f"create-index-{collection.name}", daemon=True)
+    thread.start()
+    return thread
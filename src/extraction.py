@@ -0,0 +1,57 @@
+"""Lazy line extraction from uploaded .txt and .pdf files."""
+
+from __future__ import annotations
+
+import io
+from typing import BinaryIO, Iterator
+
+SUPPORTED_EXTENSIONS = ("txt", "pdf")
+
+
+class UploadLines:
+    """Iterable over the stripped, non-empty lines of an uploaded file.
+
+    Text files are read line by line and PDFs page by page, so only the
+    current line or page is held in memory and consumers receive the first
+    lines before the rest of the file has been extracted. ``line_count`` and
+    ``progress`` (fraction of the input consumed) update as lines are yielded.
+    """
+
+    def __init__(self, stream: BinaryIO, file_ext: str, encoding: str = "utf-8") -> None:
+        if file_ext not in SUPPORTED_EXTENSIONS:
+            raise ValueError(f"Unsupported file type: {file_ext}")
+        self.stream = stream
+        self.file_ext = file_ext
+        self.encoding = encoding
+        self.line_count = 0
+        self.progress = 0.0
+
+    def __iter__(self) -> Iterator[str]:
+        pieces = self._iter_pdf_pages() if self.file_ext == "pdf" else self._iter_text_lines()
+        for piece in pieces:
+            for line in piece.split("\n"):
+                line = line.strip()
+                if line:
+                    self.line_count += 1
+                    yield line
+        self.progress = 1.0
+
+    def _iter_text_lines(self) -> Iterator[str]:
+        start = self.stream.tell()
+        size = self.stream.seek(0, io.SEEK_END) - start
+        self.stream.seek(start)
+        for raw in self.stream:
+            if size:
+                self.progress = min(1.0, (self.stream.tell() - start) / size)
+            yield raw.decode(self.encoding)
+
+    def _iter_pdf_pages(self) -> Iterator[str]:
+        # Imported on first PDF so text-only workers never load it
+        import PyPDF2
+
+        reader = PyPDF2.PdfReader(self.stream)
+        page_count = len(reader.pages)
+        for number, page in enumerate(reader.pages, 1):
+            text = page.extract_text() or ""
+            self.progress = number / page_count
+            yield text
@@ -0,0 +1,15 @@
+"""Serving-side inference utilities for the moderation API."""
+
+from .batcher import BatchQueueFullError, MicroBatcher
+from .cache import MongoCacheBackend, ScoreCache
+from .pool import InferencePool, InferencePoolError, InferenceWorkerError
+
+__all__ = [
+    "BatchQueueFullError",
+    "InferencePool",
+    "InferencePoolError",
+    "InferenceWorkerError",
+    "MicroBatcher",
+    "MongoCacheBackend",
+    "ScoreCache",
+]
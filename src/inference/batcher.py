@@ -0,0 +1,201 @@
+"""Dynamic micro-batching in front of a Detoxify-style predictor."""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ``predict_fn`` receives a list of texts and returns ``{class_name: [score, ...]}``
+# exactly like ``Detoxify.predict`` does for list input.
+PredictFn = Callable[[List[str]], Dict[str, Any]]
+
+_STOP = object()
+
+
+class BatchQueueFullError(RuntimeError):
+    """Raised when the micro-batcher queue is at capacity."""
+
+
+def split_scores(results: Dict[str, Any], count: int) -> List[Dict[str, float]]:
+    """Turn a ``{class: [scores]}`` mapping into one score dict per input text."""
+    # Detoxify squeezes single-item batches down to plain floats.
+    per_class = {name: values if isinstance(values, list) else [values] for name, values in results.items()}
+    return [{name: float(values[i]) for name, values in per_class.items()} for i in range(count)]
+
+
+class MicroBatcher:
+    """Collect concurrent single-text requests and score them in one forward pass.
+
+    A background thread waits for the first queued request, then keeps
+    collecting for up to ``max_wait_ms`` or until ``max_batch_size`` texts are
+    pending, runs ``predict_fn`` once on the whole group and resolves every
+    caller's future with its own score dict. With ``workers`` > 1 that many
+    threads collect and score batches concurrently, for a ``predict_fn`` that
+    can run several batches at once (an ``InferencePool`` with several
+    replicas). A batcher used in a forked child (a gunicorn worker of a
+    preloading master) starts its own threads and queue there on first use.
+    """
+
+    def __init__(
+        self,
+        predict_fn: PredictFn,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 256,
+        workers: int = 1,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms cannot be negative")
+        if max_queue_size < 1:
+            raise ValueError("max_queue_size must be at least 1")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue_size = max_queue_size
+        self.workers = workers
+
+        self._closed = threading.Event()
+        self._fork_lock = threading.Lock()
+        self._start()
+
+    def _start(self) -> None:
+        """Create the queue and worker threads for this process."""
+        self._pid = os.getpid()
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=self.max_queue_size)
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "batches": 0, "batched_texts": 0, "largest_batch": 0, "rejected": 0}
+        self._workers = [
+            threading.Thread(target=self._run, name=f"micro-batcher-{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def _restart_after_fork(self) -> None:
+        # Only the forking thread survives a fork: the parent's batching threads
+        # are gone and its queue and locks may be in any state
+        if self._pid != os.getpid():
+            with self._fork_lock:
+                if self._pid != os.getpid():
+                    self._start()
+
+    def submit(self, text: str) -> "Future[Dict[str, float]]":
+        """Queue ``text`` for scoring and return a future for its score dict."""
+        if self._closed.is_set():
+            raise RuntimeError("MicroBatcher is closed")
+        self._restart_after_fork()
+
+        future: "Future[Dict[str, float]]" = Future()
+        try:
+            self._queue.put_nowait((text, future))
+        except queue.Full as exc:
+            with self._stats_lock:
+                self._stats["rejected"] += 1
+            raise BatchQueueFullError(f"Inference queue is full ({self.max_queue_size} pending requests)") from exc
+
+        with self._stats_lock:
+            self._stats["requests"] += 1
+        return future
+
+    def predict(self, text: str, timeout: Optional[float] = None) -> Dict[str, float]:
+        """Score a single text, blocking until its batch has been processed."""
+        return self.submit(text).result(timeout=timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Stop accepting requests and wait for queued work to drain."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        # One sentinel per thread; each thread stops at the first one it takes
+        for _ in self._workers:
+            self._queue.put(_STOP)
+        for worker in self._workers:
+            worker.join(timeout)
+
+        # Anything that slipped in after close() will never be scheduled.
+        stops = 0
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stops += 1  # a thread still busy with its last batch has yet to take it
+            elif item[1].set_running_or_notify_cancel():
+                item[1].set_exception(RuntimeError("MicroBatcher is closed"))
+        for _ in range(stops):
+            self._queue.put(_STOP)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters describing batching behaviour so far."""
+        self._restart_after_fork()
+        with self._stats_lock:
+            stats = dict(self._stats)
+        batches = stats["batches"]
+        stats["mean_batch_size"] = round(stats["batched_texts"] / batches, 2) if batches else 0.0
+        stats["queue_depth"] = self._queue.qsize()
+        stats["max_batch_size"] = self.max_batch_size
+        stats["max_wait_ms"] = self.max_wait * 1000.0
+        stats["max_queue_size"] = self.max_queue_size
+        stats["workers"] = len(self._workers)
+        return stats
+
+    def _collect(self) -> Tuple[List[Tuple[str, Future]], bool]:
+        """Block for the first request, then gather more until the batch is full or the wait expires."""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if batch:
+                self._process(batch)
+
+    def _process(self, batch: List[Tuple[str, Future]]) -> None:
+        live = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+        if not live:
+            return
+
+        texts = [text for text, _ in live]
+        try:
+            scores = split_scores(self.predict_fn(texts), len(texts))
+        except Exception as exc:
+            logger.error(f"Batched inference failed for {len(texts)} texts: {exc}")
+            for _, future in live:
+                future.set_exception(exc)
+            return
+
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["batched_texts"] += len(texts)
+            self._stats["largest_batch"] = max(self._stats["largest_batch"], len(texts))
+
+        for (_, future), text_scores in zip(live, scores):
+            future.set_result(text_scores)
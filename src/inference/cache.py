@@ -0,0 +1,133 @@
+"""Content-hash cache for toxicity scores."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from pymongo.collection import Collection
+
+from src.cache import CacheBackend, LRUCache
+from src.db.client import create_index_in_background
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+Scores = Dict[str, float]
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for cache keys: NFC unicode, single spaces, no outer whitespace."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class MongoCacheBackend:
+    """Shared cache tier stored in a MongoDB collection, visible to every worker."""
+
+    def __init__(self, collection: Collection) -> None:
+        self.collection = collection
+        # MongoDB drops expired documents itself; reads also check expiry.
+        create_index_in_background(self.collection, "expires_at", expireAfterSeconds=0)
+
+    def get(self, key: str) -> Optional[Any]:
+        document = self.collection.find_one({"_id": key})
+        if document is None or document["expires_at"] <= datetime.utcnow():
+            return None
+        return document["value"]
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self.collection.replace_one(
+            {"_id": key},
+            {"_id": key, "value": value, "expires_at": datetime.utcnow() + timedelta(seconds=ttl_seconds)},
+            upsert=True,
+        )
+
+
+class ScoreCache:
+    """Toxicity score cache keyed on normalized text hash plus model identity.
+
+    Lookups go to the in-process LRU first and then to the optional shared
+    backend; shared hits are promoted into the LRU. Backend failures are
+    logged and treated as misses so scoring never depends on the cache.
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        max_size: int = 10000,
+        ttl_seconds: float = 3600.0,
+        shared_backend: Optional[CacheBackend] = None,
+    ) -> None:
+        self.model_id = model_id
+        self.ttl_seconds = ttl_seconds
+        self.local = LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.shared = shared_backend
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "local_hits": 0, "shared_hits": 0, "shared_errors": 0}
+
+    def key(self, text: str) -> str:
+        payload = f"{self.model_id}\x00{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, text: str) -> Optional[Scores]:
+        """Return cached scores for ``text`` or None."""
+        key = self.key(text)
+        scores = self.local.get(key)
+        tier = "local_hits"
+        if scores is None and self.shared is not None:
+            scores = self._shared_get(key)
+            tier = "shared_hits"
+            if scores is not None:
+                self.local.set(key, scores)
+
+        with self._lock:
+            if scores is None:
+                self._stats["misses"] += 1
+            else:
+                self._stats["hits"] += 1
+                self._stats[tier] += 1
+        return dict(scores) if scores is not None else None
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[Scores]]:
+        return [self.get(text) for text in texts]
+
+    def set(self, text: str, scores: Scores) -> None:
+        key = self.key(text)
+        scores = {name: float(value) for name, value in scores.items()}
+        self.local.set(key, scores)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, scores, self.ttl_seconds)
+            except Exception as exc:
+                self._record_shared_error(exc)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return overall and per-tier hit counters with the hit ratio."""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["size"] = len(self.local)
+        stats["max_size"] = self.local.max_size
+        stats["ttl_seconds"] = self.ttl_seconds
+        stats["shared_backend"] = type(self.shared).__name__ if self.shared is not None else None
+        stats["model_id"] = self.model_id
+        return stats
+
+    def _shared_get(self, key: str) -> Optional[Scores]:
+        try:
+            return self.shared.get(key)
+        except Exception as exc:
+            self._record_shared_error(exc)
+            return None
+
+    def _record_shared_error(self, exc: Exception) -> None:
+        logger.warning(f"Shared score cache unavailable: {exc}")
+        with self._lock:
+            self._stats["shared_errors"] += 1
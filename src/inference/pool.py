@@ -0,0 +1,374 @@
+"""Detoxify-style models served from dedicated worker processes."""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .runtime import RuntimeConfig, apply_runtime
+
+logger = logging.getLogger(__name__)
+
+# Builds the model inside a worker process. It is pickled to the worker, so it
+# must be importable there: a class or module-level function, or a
+# functools.partial of one (e.g. ``partial(Detoxify, "unbiased")``).
+ModelFactory = Callable[[], Any]
+
+# Workers start from a fresh interpreter on every platform: nothing of the web
+# process (threads, locks, an imported torch) is copied into them
+_CONTEXT = multiprocessing.get_context("spawn")
+
+
+class InferencePoolError(RuntimeError):
+    """Raised when the pool cannot start or has no worker left to take a request."""
+
+
+class InferenceWorkerError(InferencePoolError):
+    """Raised for requests in flight on a worker process that died."""
+
+
+def load_detoxify(*args: Any, **kwargs: Any) -> Any:
+    """Model factory that imports Detoxify in the worker, so the web process never imports torch for it."""
+    from detoxify import Detoxify
+
+    return Detoxify(*args, **kwargs)
+
+
+def serve_worker(conn: Connection) -> None:
+    """Entry point of a worker process: build the model, then answer requests until told to stop."""
+    factory, config, warm_up_text, attributes = conn.recv()
+    try:
+        apply_runtime(config)
+        start = time.perf_counter()
+        model = factory()
+        if warm_up_text:
+            model.predict(warm_up_text)
+        info = {
+            "pid": os.getpid(),
+            "load_seconds": round(time.perf_counter() - start, 3),
+            "attributes": {name: getattr(model, name, None) for name in attributes},
+        }
+    except Exception as exc:
+        conn.send(("failed", f"{type(exc).__name__}: {exc}"))
+        return
+    conn.send(("ready", info))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:  # the web process went away
+            return
+        if message is None:
+            return
+        request_id, method, args, kwargs = message
+        try:
+            reply = (request_id, True, getattr(model, method)(*args, **kwargs))
+        except Exception as exc:
+            reply = (request_id, False, _picklable(exc))
+        conn.send(reply)
+
+
+def _picklable(exc: Exception) -> Exception:
+    try:
+        pickle.loads(pickle.dumps(exc))
+        return exc
+    except Exception:
+        return RuntimeError(f"{type(exc).__name__}: {exc}")
+
+
+class _Worker:
+    """Parent-side handle of one worker process: its connection, process and requests in flight."""
+
+    def __init__(self, slot: int, process: BaseProcess, conn: Connection) -> None:
+        self.slot = slot
+        self.process = process
+        self.conn = conn
+        self.info: Dict[str, Any] = {}
+        self.pending: Dict[int, Future] = {}
+        self.requests = 0
+        self.send_lock = threading.Lock()
+        self.reader: Optional[threading.Thread] = None
+
+    def submit(self, request_id: int, method: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Future:
+        future: Future = Future()
+        with self.send_lock:
+            self.pending[request_id] = future
+            self.requests += 1
+            try:
+                self.conn.send((request_id, method, args, kwargs))
+            except (OSError, ValueError) as exc:
+                self.pending.pop(request_id, None)
+                raise InferenceWorkerError(f"Inference worker {self.slot} is gone: {exc}") from exc
+        return future
+
+    def fail_pending(self, error: Exception) -> None:
+        with self.send_lock:
+            pending, self.pending = self.pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+
+class InferencePool:
+    """Serve a model from ``workers`` separate processes, each holding its own replica.
+
+    Callers in any thread use :meth:`predict` and :meth:`predict_batch` as
+    they would on the model itself; every call goes to the worker with the
+    fewest requests in flight and blocks until that worker replies. The forward
+    pass runs outside the calling process, the number of replicas is
+    independent of the number of request threads, and a worker that crashes
+    fails only its in-flight requests and is started again.
+
+    Each worker is pinned and threaded with ``RuntimeConfig.for_worker(slot,
+    workers, ...)``. ``attributes`` are read from the model once a worker has
+    loaded it and are then available on the pool (``pool.backend``). Without
+    an explicit :meth:`start` the workers start with the first request of
+    each process, so a pool built in a preloading gunicorn master runs
+    workers only in the forked children.
+
+    A pool that fails to start raises :class:`InferencePoolError` at once for
+    the next ``retry_seconds`` instead of launching every worker again, and a
+    crashed worker that cannot be started again is retried on the same
+    schedule; the wait doubles after each consecutive failure, up to
+    ``max_retry_seconds``.
+    """
+
+    def __init__(
+        self,
+        factory: ModelFactory,
+        workers: int = 2,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        cpu_affinity: str = "",
+        attributes: Sequence[str] = (),
+        warm_up_text: Optional[str] = None,
+        timeout: Optional[float] = None,
+        start_timeout: float = 300.0,
+        retry_seconds: float = 5.0,
+        max_retry_seconds: float = 300.0,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.factory = factory
+        self.workers = workers
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.cpu_affinity = cpu_affinity
+        self.attributes = tuple(attributes)
+        self.warm_up_text = warm_up_text
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+
+        self.model_attributes: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._workers: List[Optional[_Worker]] = []
+        self._pid: Optional[int] = None
+        self._closed = False
+        # (pid, consecutive failures, monotonic time of the next attempt, error) of the last failed start
+        self._start_failure: Optional[Tuple[int, int, float, str]] = None
+        self._stats = {"requests": 0, "worker_exits": 0, "restarts": 0, "failed_restarts": 0}
+
+    def __getattr__(self, name: str) -> Any:
+        if name in self.__dict__.get("attributes", ()):
+            return self.model_attributes.get(name)
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def start(self) -> "InferencePool":
+        """Start every worker and wait until each has loaded the model."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return self
+            failure = self._start_failure if self._start_failure and self._start_failure[0] == os.getpid() else None
+            if failure is not None and time.monotonic() < failure[2]:
+                raise InferencePoolError(f"{failure[3]} (next start attempt in {failure[2] - time.monotonic():.0f}s)")
+            for inherited in self._workers:
+                # Forked from a process with a running pool: drop our copies of
+                # its connections so its workers still see EOF when it exits
+                if inherited is not None:
+                    inherited.conn.close()
+            self._pid, self._closed = os.getpid(), False
+            self._workers = [None] * self.workers
+            launched = [self._launch(slot) for slot in range(self.workers)]
+            try:
+                for worker in launched:
+                    self._await_ready(worker)
+            except InferencePoolError as exc:
+                for worker in launched:
+                    self._stop(worker, timeout=0)
+                self._pid = None
+                failures = failure[1] + 1 if failure else 1
+                self._start_failure = (os.getpid(), failures, time.monotonic() + self._backoff(failures), str(exc))
+                raise
+            self._workers, self._start_failure = launched, None
+        logger.info(f"Inference pool ready: {self.workers} workers, pids {[w.info['pid'] for w in launched]}")
+        return self
+
+    def predict(self, *args: Any, **kwargs: Any) -> Any:
+        return self._call("predict", args, kwargs)
+
+    def predict_batch(self, *args: Any, **kwargs: Any) -> Any:
+        return self._call("predict_batch", args, kwargs)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the workers; requests still in flight fail with InferencePoolError."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked copy: the workers belong to the parent process
+                self._workers, self._pid = [], None
+                return
+            self._closed = True
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            if worker is not None:
+                self._stop(worker, timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-worker pids and load, plus request and restart counters, for this process's pool."""
+        with self._lock:
+            stats = dict(self._stats)
+            live = [w for w in self._workers if w is not None] if self._pid == os.getpid() else []
+        stats["workers"] = self.workers
+        stats["live_workers"] = len(live)
+        stats["in_flight"] = sum(len(w.pending) for w in live)
+        stats["worker_pids"] = [w.info.get("pid") for w in live]
+        stats["load_seconds"] = [w.info.get("load_seconds") for w in live]
+        return stats
+
+    def _call(self, method: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        if self._closed and self._pid == os.getpid():
+            raise InferencePoolError("Inference pool is closed")
+        if self._pid != os.getpid():
+            self.start()
+        with self._lock:
+            live = [w for w in self._workers if w is not None]
+            if not live:
+                raise InferencePoolError("No inference worker is running")
+            worker = min(live, key=lambda w: (len(w.pending), w.requests))
+            self._stats["requests"] += 1
+        future = worker.submit(next(self._ids), method, args, kwargs)
+        return future.result(timeout=self.timeout)
+
+    def _launch(self, slot: int) -> _Worker:
+        config = RuntimeConfig.for_worker(
+            slot,
+            self.workers,
+            intra_op_threads=self.intra_op_threads,
+            inter_op_threads=self.inter_op_threads,
+            cpu_affinity=self.cpu_affinity,
+        )
+        parent_conn, child_conn = _CONTEXT.Pipe()
+        process = _CONTEXT.Process(
+            target=serve_worker, args=(child_conn,), name=f"inference-worker-{slot}", daemon=True
+        )
+        process.start()
+        # Only the worker may hold its end, so its exit shows up here as EOF
+        child_conn.close()
+        worker = _Worker(slot, process, parent_conn)
+        parent_conn.send((self.factory, config, self.warm_up_text, self.attributes))
+        return worker
+
+    def _await_ready(self, worker: _Worker) -> None:
+        try:
+            if not worker.conn.poll(self.start_timeout):
+                raise InferencePoolError(f"Inference worker {worker.slot} did not load within {self.start_timeout}s")
+            status, payload = worker.conn.recv()
+        except (EOFError, OSError) as exc:
+            raise InferencePoolError(f"Inference worker {worker.slot} exited while loading") from exc
+        if status != "ready":
+            raise InferencePoolError(f"Inference worker {worker.slot} failed to load the model: {payload}")
+        worker.info = payload
+        self.model_attributes = payload["attributes"]
+        worker.reader = threading.Thread(
+            target=self._read, args=(worker,), name=f"inference-pool-{worker.slot}", daemon=True
+        )
+        worker.reader.start()
+
+    def _read(self, worker: _Worker) -> None:
+        """Resolve futures as replies arrive; when the worker dies, fail its requests and replace it."""
+        while True:
+            try:
+                request_id, ok, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            with worker.send_lock:
+                future = worker.pending.pop(request_id, None)
+            if future is None or future.done():
+                continue
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(payload)
+
+        worker.process.join()
+        returncode = worker.process.exitcode
+        with self._lock:
+            current = self._pid == os.getpid() and worker in self._workers
+            if current:
+                self._workers[worker.slot] = None
+                self._stats["worker_exits"] += 1
+        if not current:
+            worker.fail_pending(InferencePoolError("Inference pool is closed"))
+            return
+
+        logger.error(f"Inference worker {worker.slot} (pid {worker.info.get('pid')}) exited with code {returncode}")
+        worker.fail_pending(InferenceWorkerError(f"Inference worker {worker.slot} exited with code {returncode}"))
+        worker.conn.close()
+        self._restart(worker.slot)
+
+    def _restart(self, slot: int) -> None:
+        failures = 0
+        while True:
+            with self._lock:
+                if self._closed or self._pid != os.getpid():
+                    return
+            worker = self._launch(slot)
+            try:
+                self._await_ready(worker)
+                break
+            except InferencePoolError as exc:
+                self._stop(worker, timeout=0)
+                failures += 1
+                delay = self._backoff(failures)
+                with self._lock:
+                    self._stats["failed_restarts"] += 1
+                logger.error(f"Could not restart inference worker {slot}: {exc}; next attempt in {delay:.0f}s")
+                time.sleep(delay)
+        with self._lock:
+            if self._closed or self._pid != os.getpid():
+                restarted = False
+            else:
+                self._workers[slot] = worker
+                self._stats["restarts"] += 1
+                restarted = True
+        if not restarted:
+            self._stop(worker, timeout=0)
+            return
+        logger.info(f"Inference worker {slot} restarted as pid {worker.info['pid']}")
+
+    def _backoff(self, failures: int) -> float:
+        return min(self.max_retry_seconds, self.retry_seconds * 2 ** (failures - 1))
+
+    @staticmethod
+    def _stop(worker: _Worker, timeout: float) -> None:
+        try:
+            with worker.send_lock:
+                worker.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        worker.process.join(timeout)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+        worker.conn.close()
@@ -0,0 +1,126 @@
+"""Torch thread pools and CPU affinity for inference worker processes."""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def parse_cpu_list(spec: str) -> Tuple[int, ...]:
+    """Parse a Linux-style CPU list such as ``"0-3,8,10-11"``."""
+    cpus = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    return tuple(sorted(cpus))
+
+
+def available_cpus() -> Tuple[int, ...]:
+    """CPUs this process may run on (its affinity mask where the OS supports one)."""
+    if hasattr(os, "sched_getaffinity"):
+        return tuple(sorted(os.sched_getaffinity(0)))
+    return tuple(range(os.cpu_count() or 1))
+
+
+def split_cpus(cpus: Sequence[int], parts: int) -> List[Tuple[int, ...]]:
+    """Split ``cpus`` into ``parts`` contiguous sets whose sizes differ by at most one.
+
+    With more parts than CPUs, the CPUs are handed out round-robin, one each.
+    """
+    if parts < 1:
+        raise ValueError("parts must be at least 1")
+    cpus = list(cpus)
+    if parts >= len(cpus):
+        return [(cpus[index % len(cpus)],) for index in range(parts)]
+    size, extra = divmod(len(cpus), parts)
+    sets, start = [], 0
+    for index in range(parts):
+        end = start + size + (1 if index < extra else 0)
+        sets.append(tuple(cpus[start:end]))
+        start = end
+    return sets
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    """Thread counts and CPU set for one process; 0 or an empty set keeps the torch/OS default."""
+
+    intra_op_threads: int = 0
+    inter_op_threads: int = 0
+    cpu_affinity: Tuple[int, ...] = ()
+
+    @classmethod
+    def for_worker(
+        cls,
+        slot: int,
+        workers: int,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        cpu_affinity: str = "",
+    ) -> "RuntimeConfig":
+        """Share of the machine for worker ``slot`` out of ``workers`` on one host.
+
+        ``cpu_affinity`` is ``""`` (no pinning), ``"auto"`` (split this process's
+        CPUs between the workers) or a CPU list such as ``"0-7"`` that is split
+        the same way. Without an explicit ``intra_op_threads`` each worker gets
+        as many threads as it has CPUs, so workers never oversubscribe cores.
+        """
+        cpus = available_cpus() if cpu_affinity in ("", "auto") else parse_cpu_list(cpu_affinity)
+        share = split_cpus(cpus, workers)[slot % workers]
+        return cls(
+            intra_op_threads=intra_op_threads or len(share),
+            inter_op_threads=inter_op_threads,
+            cpu_affinity=share if cpu_affinity else (),
+        )
+
+
+def apply_runtime(config: RuntimeConfig) -> Dict[str, Any]:
+    """Pin the process and size the torch thread pools; return the resulting layout.
+
+    Call it before the first forward pass: torch only accepts the inter-op
+    thread count before any inter-op work has started, and a refused setting
+    is logged rather than raised.
+    """
+    if config.cpu_affinity:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, config.cpu_affinity)
+        else:
+            logger.warning("CPU affinity is not supported on this platform")
+
+    if config.intra_op_threads or config.inter_op_threads:
+        import torch
+
+        if config.intra_op_threads:
+            torch.set_num_threads(config.intra_op_threads)
+        if config.inter_op_threads:
+            try:
+                torch.set_num_interop_threads(config.inter_op_threads)
+            except RuntimeError as exc:
+                logger.warning(f"Could not set inter-op threads: {exc}")
+
+    layout = runtime_layout()
+    logger.info(
+        f"Inference runtime: intra-op {layout['intra_op_threads']}, inter-op {layout['inter_op_threads']}, "
+        f"cpus {layout['cpu_affinity']}"
+    )
+    return layout
+
+
+def runtime_layout() -> Dict[str, Any]:
+    """Current thread and CPU layout of this process; thread counts are None until torch is imported."""
+    torch = sys.modules.get("torch")
+    return {
+        "pid": os.getpid(),
+        "cpu_count": os.cpu_count(),
+        "cpu_affinity": list(available_cpus()),
+        "intra_op_threads": torch.get_num_threads() if torch else None,
+        "inter_op_threads": torch.get_num_interop_threads() if torch else None,
+    }
@@ -0,0 +1,119 @@
+"""Bulk scoring of many texts with deduplication, caching and batched inference."""
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .cache import ScoreCache
+
+Scores = Dict[str, float]
+PredictBatchFn = Callable[..., Dict[str, List[float]]]
+ScoreFn = Callable[[List[str]], List[Scores]]
+Row = Dict[str, Any]
+
+
+def _predict_chunk(predict_batch: PredictBatchFn, texts: List[str], batch_size: int) -> List[Scores]:
+    batch_scores = predict_batch(texts, batch_size=batch_size)
+    return [{name: float(values[i]) for name, values in batch_scores.items()} for i in range(len(texts))]
+
+
+def score_texts(
+    texts: Sequence[str],
+    predict_batch: PredictBatchFn,
+    cache: Optional[ScoreCache] = None,
+    batch_size: int = 32,
+    executor: Optional[Executor] = None,
+    chunk_size: int = 256,
+) -> List[Scores]:
+    """Score ``texts`` and return one score dict per input, in input order.
+
+    Identical texts are scored once, cached texts are not scored at all, and
+    the remaining unique texts go through ``predict_batch`` (normally
+    ``Detoxify.predict_batch``). With an ``executor`` the misses are split into
+    chunks of ``chunk_size`` texts that are scored concurrently.
+    """
+    positions: Dict[str, List[int]] = {}
+    for index, text in enumerate(texts):
+        positions.setdefault(text, []).append(index)
+    unique = list(positions)
+
+    unique_scores: List[Optional[Scores]] = cache.get_many(unique) if cache is not None else [None] * len(unique)
+    missing = [i for i, scores in enumerate(unique_scores) if scores is None]
+
+    if missing:
+        missing_texts = [unique[i] for i in missing]
+        if executor is not None and len(missing_texts) > chunk_size:
+            chunks = [missing_texts[start : start + chunk_size] for start in range(0, len(missing_texts), chunk_size)]
+            futures = [executor.submit(_predict_chunk, predict_batch, chunk, batch_size) for chunk in chunks]
+            predicted = [scores for future in futures for scores in future.result()]
+        else:
+            predicted = _predict_chunk(predict_batch, missing_texts, batch_size)
+
+        for i, scores in zip(missing, predicted):
+            unique_scores[i] = scores
+            if cache is not None:
+                cache.set(unique[i], scores)
+
+    results: List[Any] = [None] * len(texts)
+    for text, scores in zip(unique, unique_scores):
+        for index in positions[text]:
+            results[index] = dict(scores)
+    return results
+
+
+def line_result(line_number: int, line: str, scores: Scores, threshold: float = 0.5) -> Dict[str, Any]:
+    """Per-line entry of a file analysis, as returned by the upload and job endpoints."""
+    toxicity_score = float(scores["toxicity"])
+    return {
+        "line_number": line_number,
+        "text": line[:100] + "..." if len(line) > 100 else line,
+        "full_text": line,
+        "toxicity_score": round(toxicity_score, 3),
+        "is_toxic": toxicity_score > threshold,
+        "categories": {name: round(float(value), 3) for name, value in scores.items()},
+    }
+
+
+def _score_rows(score_fn: ScoreFn, chunk: List[Tuple[int, str]], threshold: float) -> List[Row]:
+    scores = score_fn([line for _, line in chunk])
+    return [line_result(number, line, s, threshold) for (number, line), s in zip(chunk, scores)]
+
+
+def iter_line_results(
+    lines: Iterable[str],
+    score_fn: ScoreFn,
+    chunk_size: int = 256,
+    min_line_length: int = 3,
+    threshold: float = 0.5,
+    executor: Optional[Executor] = None,
+    prefetch: int = 2,
+) -> Iterator[List[Row]]:
+    """Number ``lines`` as they arrive and yield their ``line_result`` rows one chunk at a time.
+
+    Lines shorter than ``min_line_length`` are numbered but not scored. With an
+    ``executor`` up to ``prefetch`` chunks are scored in the background while
+    the next lines are extracted; chunks are still yielded in order.
+    """
+    pending: Deque[Any] = deque()
+    chunk: List[Tuple[int, str]] = []
+
+    def flush() -> Iterator[List[Row]]:
+        if executor is None:
+            yield _score_rows(score_fn, chunk, threshold)
+            return
+        pending.append(executor.submit(_score_rows, score_fn, list(chunk), threshold))
+        while len(pending) > prefetch:
+            yield pending.popleft().result()
+
+    for number, line in enumerate(lines, 1):
+        if len(line) >= min_line_length:
+            chunk.append((number, line))
+        if len(chunk) >= chunk_size:
+            yield from flush()
+            chunk = []
+    if chunk:
+        yield from flush()
+    while pending:
+        yield pending.popleft().result()
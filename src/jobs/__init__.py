@@ -0,0 +1 @@
+"""Background batch analysis jobs."""
@@ -0,0 +1,177 @@
+"""Background processing of uploaded files as batch analysis jobs."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+
+from src.db.client import create_index_in_background
+from src.extraction import UploadLines
+from src.inference.scoring import ScoreFn, iter_line_results
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class JobManager:
+    """Runs file analysis jobs on a worker pool and persists their state.
+
+    Job documents hold the status, counters and extraction progress. Lines
+    are extracted and scored one chunk at a time and each chunk's results go
+    to a separate collection, so partial results are readable while a job
+    runs and large files never hit the document size limit.
+    """
+
+    def __init__(
+        self,
+        jobs: Collection,
+        results: Collection,
+        score_fn: ScoreFn,
+        max_workers: int = 2,
+        chunk_size: int = 256,
+        min_line_length: int = 3,
+    ) -> None:
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.jobs = jobs
+        self.results = results
+        self.score_fn = score_fn
+        self.chunk_size = chunk_size
+        self.min_line_length = min_line_length
+        create_index_in_background(self.results, [("job_id", ASCENDING), ("line_number", ASCENDING)])
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        filename: str,
+        open_lines: Callable[[], UploadLines],
+        user_id: Optional[Any] = None,
+    ) -> str:
+        """Queue a job and return its id; ``open_lines`` runs on the worker."""
+        job_id = uuid.uuid4().hex
+        now = datetime.utcnow()
+        self.jobs.insert_one(
+            {
+                "_id": job_id,
+                "status": QUEUED,
+                "filename": filename,
+                "user_id": user_id,
+                "total_lines": None,
+                "analyzed_lines": None,
+                "processed_lines": 0,
+                "progress": 0.0,
+                "toxic_count": 0,
+                "safe_count": 0,
+                "error": None,
+                "created_at": now,
+                "updated_at": now,
+                "completed_at": None,
+            }
+        )
+        future = self._executor.submit(self._run, job_id, open_lines)
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._forget(job_id))
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.find_one({"_id": job_id})
+
+    def get_results(self, job_id: str, offset: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """Return a page of per-line results ordered by line number."""
+        cursor = (
+            self.results.find({"job_id": job_id}, {"_id": False, "job_id": False})
+            .sort("line_number", ASCENDING)
+            .skip(offset)
+            .limit(limit)
+        )
+        return list(cursor)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> None:
+        """Block until a job submitted by this manager has finished."""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout=timeout)
+
+    def close(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job_id: str, open_lines: Callable[[], UploadLines]) -> None:
+        try:
+            lines = open_lines()
+            self._set(job_id, status=RUNNING)
+
+            chunks = iter_line_results(
+                lines, self.score_fn, chunk_size=self.chunk_size, min_line_length=self.min_line_length
+            )
+            for rows in chunks:
+                self.results.insert_many([{"job_id": job_id, **row} for row in rows])
+                toxic = sum(1 for row in rows if row["is_toxic"])
+                self.jobs.update_one(
+                    {"_id": job_id},
+                    {
+                        "$inc": {"processed_lines": len(rows), "toxic_count": toxic, "safe_count": len(rows) - toxic},
+                        "$set": {
+                            "total_lines": lines.line_count,
+                            "progress": round(lines.progress, 4),
+                            "updated_at": datetime.utcnow(),
+                        },
+                    },
+                )
+
+            if lines.line_count == 0:
+                raise ValueError("No text found in file")
+            job = self.jobs.find_one({"_id": job_id}, {"processed_lines": True})
+            self._set(
+                job_id,
+                status=COMPLETED,
+                total_lines=lines.line_count,
+                analyzed_lines=job["processed_lines"],
+                progress=1.0,
+                completed_at=datetime.utcnow(),
+            )
+            logger.info(f"Job {job_id} completed ({job['processed_lines']} lines)")
+        except Exception as exc:
+            logger.error(f"Job {job_id} failed: {exc}", exc_info=True)
+            self._set(job_id, status=FAILED, error=str(exc), completed_at=datetime.utcnow())
+
+    def _set(self, job_id: str, **fields: Any) -> None:
+        fields["updated_at"] = datetime.utcnow()
+        self.jobs.update_one({"_id": job_id}, {"$set": fields})
+
+    def _forget(self, job_id: str) -> None:
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+
+def serialize_job(document: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-safe view of a job document; ``progress`` is the fraction of the file processed."""
+    return {
+        "id": document["_id"],
+        "status": document["status"],
+        "filename": document["filename"],
+        "total_lines": document["total_lines"],
+        "analyzed_lines": document["analyzed_lines"],
+        "processed_lines": document["processed_lines"],
+        "progress": document["progress"],
+        "toxic_count": document["toxic_count"],
+        "safe_count": document["safe_count"],
+        "error": document["error"],
+        "created_at": document["created_at"].isoformat(),
+        "updated_at": document["updated_at"].isoformat(),
+        "completed_at": document["completed_at"].isoformat() if document["completed_at"] else None,
+    }
@@ -0,0 +1,133 @@
+"""Word lists compiled into single-pass matchers, with optional hot reload from a file."""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def load_lexicon(path: str) -> List[str]:
+    """Read one term per line, skipping blank lines and ``#`` comments."""
+    with open(path, encoding="utf-8") as f:
+        terms = [line.strip() for line in f]
+    return [term for term in terms if term and not term.startswith("#")]
+
+
+def trie_regex(terms: Iterable[str]) -> str:
+    """Regex source matching any of ``terms``, factored into a prefix tree.
+
+    Shared prefixes are matched once, so the cost per text position depends
+    on the term length rather than the number of terms. At each position the
+    longest term wins ("asshole" rather than "ass").
+    """
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    if not trie:
+        return "(?!)"
+    return build(trie)
+
+
+def compile_lexicon(terms: Iterable[str], whole_words: bool = False) -> Pattern[str]:
+    """Case-insensitive pattern matching any of ``terms``, longest match first.
+
+    With ``whole_words`` a term only matches between ``\\b`` word boundaries.
+    """
+    source = trie_regex({term.lower() for term in terms})
+    if whole_words:
+        source = rf"\b(?:{source})\b"
+    return re.compile(source, re.IGNORECASE)
+
+
+class Redactor:
+    """Replaces every lexicon term in a text in a single regex pass.
+
+    Terms match as case-insensitive substrings. With ``path`` the lexicon is
+    loaded from that file and reloaded when its modification time changes,
+    checked at most every ``reload_interval`` seconds. A file that cannot be
+    read keeps the previous lexicon in place.
+    """
+
+    def __init__(
+        self,
+        terms: Iterable[str] = (),
+        path: Optional[str] = None,
+        placeholder: str = "[REDACTED]",
+        reload_interval: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = path
+        self.placeholder = placeholder
+        self.reload_interval = reload_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._checked_at = clock()
+        self._set_terms(list(terms))
+        if path is not None:
+            self.reload()
+
+    @property
+    def terms(self) -> List[str]:
+        return list(self._state[0])
+
+    def redact(self, text: str) -> Tuple[str, List[str]]:
+        """Return the redacted text and the distinct terms found, in lexicon order."""
+        self._maybe_reload()
+        _, pattern, canonical = self._state
+        found: Dict[str, int] = {}
+
+        def replace(match: "re.Match[str]") -> str:
+            term, index = canonical.get(match.group(0).lower(), (match.group(0), len(canonical)))
+            found[term] = index
+            return self.placeholder
+
+        cleaned = pattern.sub(replace, text)
+        return cleaned, sorted(found, key=found.__getitem__)
+
+    def reload(self) -> bool:
+        """Load the lexicon file if it changed since the last load; return True if it was reloaded."""
+        if self.path is None:
+            return False
+        with self._lock:
+            self._checked_at = self._clock()
+            try:
+                mtime = os.stat(self.path).st_mtime
+                if mtime == self._mtime:
+                    return False
+                terms = load_lexicon(self.path)
+            except OSError as exc:
+                logger.warning(f"Could not load lexicon {self.path}: {exc}")
+                return False
+            self._set_terms(terms)
+            self._mtime = mtime
+        logger.info(f"Loaded {len(terms)} terms from {self.path}")
+        return True
+
+    def _maybe_reload(self) -> None:
+        if self.path is not None and self._clock() - self._checked_at >= self.reload_interval:
+            self.reload()
+
+    def _set_terms(self, terms: List[str]) -> None:
+        canonical: Dict[str, Tuple[str, int]] = {}
+        for index, term in enumerate(terms):
+            canonical.setdefault(term.lower(), (term, index))
+        # One tuple so readers always see a matching pattern and term list
+        self._state = (terms, compile_lexicon(terms), canonical)
@@ -0,0 +1,14 @@
+"""Shared client layer for hosted LLM APIs."""
+
+from .client import CircuitBreaker, CircuitOpenError, LLMClient, LLMClientError, LLMTimeoutError, get_shared_client
+from .health import HealthProber
+
+__all__ = [
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "HealthProber",
+    "LLMClient",
+    "LLMClientError",
+    "LLMTimeoutError",
+    "get_shared_client",
+]
@@ -0,0 +1,321 @@
+"""Shared async Groq client with pooled connections, a concurrency cap, retries and a circuit breaker."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple
+
+import httpx
+from groq import APIConnectionError, APIStatusError, AsyncGroq, DefaultAsyncHttpxClient
+
+from .health import HealthProber
+
+logger = logging.getLogger(__name__)
+
+Messages = List[Dict[str, str]]
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class LLMClientError(RuntimeError):
+    """Raised when the client cannot produce an answer (see also CircuitOpenError)."""
+
+
+class CircuitOpenError(LLMClientError):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+class LLMTimeoutError(LLMClientError):
+    """Raised when one attempt, including its wait for a free connection, outlasts the client timeout."""
+
+
+class CircuitBreaker:
+    """Stops calls after ``failure_threshold`` consecutive failures.
+
+    Once open, calls are rejected for ``reset_seconds``; after that a single
+    trial call is let through (half-open) and its outcome closes or reopens
+    the circuit.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Return True if a call may go ahead now."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(f"LLM circuit breaker opened after {self._failures} failures")
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Connection errors, timeouts, rate limits and server errors are worth retrying."""
+    if isinstance(exc, (APIConnectionError, LLMTimeoutError)):
+        return True
+    return isinstance(exc, APIStatusError) and (exc.status_code == 429 or exc.status_code >= 500)
+
+
+class LLMClient:
+    """Chat completions over one pooled ``AsyncGroq`` client.
+
+    The client lives on a private event loop thread, so synchronous callers
+    (Flask views, worker pools) use :meth:`complete` and coroutines use
+    :meth:`acomplete`; both share the same keep-alive connection pool. At most
+    ``max_concurrency`` requests are in flight, retryable errors are retried up
+    to ``max_retries`` times with full-jitter exponential backoff, and calls
+    that still fail feed a :class:`CircuitBreaker`. ``health`` probes the API
+    every ``health_interval`` seconds once started. The loop thread and the
+    connection pool are created by the first request of each process, so a
+    preloading gunicorn master never runs them and its forked workers start
+    their own.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        timeout: float = 10.0,
+        max_concurrency: int = 16,
+        max_retries: int = 3,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        breaker: Optional[CircuitBreaker] = None,
+        health_interval: float = 30.0,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self._api_key = api_key
+        self._base_url = base_url
+        self._stats = {"requests": 0, "failures": 0, "retries": 0, "rejected": 0, "timeouts": 0}
+        self._stats_lock = threading.Lock()
+        self._inflight = 0
+        self._start_lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.health = HealthProber(self.ping, interval=health_interval, name="llm-health")
+
+    def _start(self) -> None:
+        """Create the event loop thread and the connection pool for this process."""
+        # Locks may have been held by the parent's threads at fork time
+        self._stats_lock = threading.Lock()
+        self._inflight = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-client", daemon=True)
+        self._thread.start()
+        # Created on the loop thread by the first request: before Python 3.10 a
+        # semaphore binds to the event loop current where it is constructed
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._client = AsyncGroq(
+            api_key=self._api_key,
+            base_url=self._base_url,
+            timeout=self.timeout,
+            # Retries are handled here so they respect the breaker and the semaphore
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=60.0,
+                )
+            ),
+        )
+        self._pid = os.getpid()
+
+    def complete(self, messages: Messages, model: str, **params: Any) -> str:
+        """Blocking chat completion; returns the message content of the first choice.
+
+        Raises LLMClientError if no answer arrives within :meth:`deadline`.
+        """
+        return self._wait(self._complete(messages, model, params), self.deadline())
+
+    async def acomplete(self, messages: Messages, model: str, **params: Any) -> str:
+        """Chat completion for coroutines running on any event loop."""
+        if asyncio.get_running_loop() is self._loop:
+            return await self._complete(messages, model, params)
+        return await asyncio.wrap_future(self._call_soon(self._complete(messages, model, params)))
+
+    def ping(self) -> None:
+        """Cheap authenticated request (the model list); raises if the API is unreachable."""
+        self._wait(self._list_models(), self.timeout)
+
+    def deadline(self) -> float:
+        """Longest a blocking :meth:`complete` waits: every attempt timing out plus the longest backoffs."""
+        return self.timeout * (self.max_retries + 1) + self.backoff_max * self.max_retries
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["inflight"] = self._inflight
+        stats["max_concurrency"] = self.max_concurrency
+        stats["circuit"] = self.breaker.state
+        return stats
+
+    def close(self) -> None:
+        self.health.stop()
+        if self._pid != os.getpid() or self._loop.is_closed():
+            return
+        try:
+            self._wait(self._client.close(), self.timeout)
+        except LLMClientError as exc:
+            logger.warning(f"LLM client did not close cleanly: {exc}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(self.timeout)
+        if not self._thread.is_alive():
+            self._loop.close()
+
+    def _call_soon(self, coroutine: Coroutine[Any, Any, Any]) -> Future:
+        if self._pid != os.getpid():
+            with self._start_lock:
+                if self._pid != os.getpid():
+                    # First request of this process; after a fork the parent's
+                    # loop thread is gone and its connections belong to the parent
+                    self._start()
+        if not self._thread.is_alive():
+            coroutine.close()
+            raise LLMClientError("LLM client event loop is not running")
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def _wait(self, coroutine: Coroutine[Any, Any, Any], timeout: float) -> Any:
+        """Run ``coroutine`` on the loop thread and block for at most ``timeout`` seconds."""
+        future = self._call_soon(coroutine)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self._count("timeouts")
+            raise LLMClientError(f"No answer from the LLM client within {timeout:.1f}s") from None
+
+    async def _complete(self, messages: Messages, model: str, params: Dict[str, Any]) -> str:
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+        attempt = 0
+        while True:
+            try:
+                content = await self._attempt(messages, model, params)
+            except asyncio.CancelledError:
+                # The blocking caller gave up (see _wait): count it against the
+                # service, which also frees the breaker's half-open trial slot
+                self._count("failures")
+                self.breaker.record_failure()
+                raise
+            except Exception as exc:
+                if is_retryable(exc) and attempt < self.max_retries:
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+                    attempt += 1
+                    self._count("retries")
+                    logger.info(f"LLM request failed ({exc}), retry {attempt} in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                self._count("failures")
+                if is_retryable(exc):
+                    self.breaker.record_failure()
+                else:
+                    # The service answered; a rejected request says nothing about its health
+                    self.breaker.record_success()
+                raise
+            self.breaker.record_success()
+            return content
+
+    async def _attempt(self, messages: Messages, model: str, params: Dict[str, Any]) -> str:
+        # The clock starts before the wait for a free connection, so every attempt,
+        # queueing included, fits in the ``timeout`` that deadline() budgets for it
+        try:
+            return await asyncio.wait_for(self._request(messages, model, params), self.timeout)
+        except asyncio.TimeoutError:
+            raise LLMTimeoutError(f"No answer from the LLM API within {self.timeout:.1f}s") from None
+
+    async def _request(self, messages: Messages, model: str, params: Dict[str, Any]) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            self._count("requests")
+            with self._stats_lock:
+                self._inflight += 1
+            try:
+                response = await self._client.chat.completions.create(model=model, messages=messages, **params)
+            finally:
+                with self._stats_lock:
+                    self._inflight -= 1
+        return response.choices[0].message.content or ""
+
+    async def _list_models(self) -> None:
+        await self._client.models.list()
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+
+_shared: Dict[Tuple[str, Optional[str]], LLMClient] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_client(api_key: str, base_url: Optional[str] = None, **settings: Any) -> LLMClient:
+    """Return the process-wide client for ``api_key`` and ``base_url``, creating it on first use.
+
+    ``settings`` are passed to :class:`LLMClient` only when the client is created.
+    """
+    with _shared_lock:
+        client = _shared.get((api_key, base_url))
+        if client is None:
+            client = _shared[(api_key, base_url)] = LLMClient(api_key, base_url=base_url, **settings)
+        return client
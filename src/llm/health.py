@@ -0,0 +1,114 @@
+"""Background availability probing with a cached result."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN = "unknown"
+UP = "up"
+DOWN = "down"
+
+
+class HealthProber:
+    """Runs ``check`` every ``interval`` seconds on a daemon thread and caches the outcome.
+
+    ``check`` succeeds by returning and fails by raising. Until the first probe
+    finishes the status is ``unknown``, so callers never wait on the remote
+    service just to read it. A started prober read in a forked child (a
+    gunicorn worker of a preloading master) starts probing again there, since
+    the parent's thread does not survive the fork.
+    """
+
+    def __init__(self, check: Callable[[], Any], interval: float = 30.0, name: str = "health-probe") -> None:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.check = check
+        self.interval = interval
+        self.name = name
+        self._lock = threading.Lock()
+        self._fork_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pid = os.getpid()
+        self._status: Dict[str, Any] = self._unknown()
+
+    @property
+    def is_down(self) -> bool:
+        self._restart_after_fork()
+        return self._status["status"] == DOWN
+
+    def start(self) -> None:
+        """Start probing in the background; calling it again is a no-op."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def probe(self) -> Dict[str, Any]:
+        """Run the check on the calling thread, cache and return the new status."""
+        start = time.perf_counter()
+        try:
+            self.check()
+            error = None
+        except Exception as exc:
+            error = str(exc) or type(exc).__name__
+        latency_ms = round((time.perf_counter() - start) * 1000, 3)
+
+        with self._lock:
+            failures = self._status["consecutive_failures"] + 1 if error else 0
+            if error and failures == 1:
+                logger.warning(f"{self.name} failed: {error}")
+            elif not error and self._status["status"] == DOWN:
+                logger.info(f"{self.name} recovered")
+            # Replaced as a whole so readers never see a half-updated status
+            self._status = {
+                "status": DOWN if error else UP,
+                "checked_at": datetime.utcnow().isoformat(),
+                "latency_ms": latency_ms,
+                "error": error,
+                "consecutive_failures": failures,
+            }
+            return dict(self._status)
+
+    def status(self) -> Dict[str, Any]:
+        """Return the cached status without contacting the service."""
+        self._restart_after_fork()
+        return dict(self._status)
+
+    @staticmethod
+    def _unknown() -> Dict[str, Any]:
+        return {"status": UNKNOWN, "checked_at": None, "latency_ms": None, "error": None, "consecutive_failures": 0}
+
+    def _restart_after_fork(self) -> None:
+        if self._pid == os.getpid() or self._thread is None or self._stop.is_set():
+            return
+        with self._fork_lock:
+            if self._pid == os.getpid():
+                return
+            # Locks may have been held by the parent's threads at fork time
+            self._lock = threading.Lock()
+            self._stop = threading.Event()
+            self._status = self._unknown()
+            self._thread = None
+            self.start()
+
+    def _loop(self) -> None:
+        delay = 0.0
+        while not self._stop.wait(delay):
+            self.probe()
+            delay = self.interval
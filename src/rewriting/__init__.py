@@ -0,0 +1 @@
+"""Serving-side helpers around the hybrid rewriter."""
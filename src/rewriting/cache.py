@@ -0,0 +1,157 @@
+"""Cache of rewrite results shared by identical requests."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from src.cache import CacheBackend, LRUCache
+from src.inference.cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """One upstream call that concurrent identical lookups wait on."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.seconds = 0.0
+
+
+class RewriteCache:
+    """Rewrite results keyed on normalized input text, method and prompt version.
+
+    Lookups go to the in-process LRU first and then to the optional persistent
+    backend; persistent hits are promoted into the LRU. On a miss only one
+    caller runs ``compute`` per key, and concurrent callers for the same key
+    wait for its result instead of issuing their own upstream call. Each hit
+    adds the latency of the original call to ``saved_seconds``.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 2000,
+        ttl_seconds: float = 86400.0,
+        persistent_backend: Optional[CacheBackend] = None,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.local = LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.persistent = persistent_backend
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _Flight] = {}
+        self._stats: Dict[str, Any] = {
+            "hits": 0,
+            "misses": 0,
+            "local_hits": 0,
+            "persistent_hits": 0,
+            "coalesced": 0,
+            "persistent_errors": 0,
+            "saved_seconds": 0.0,
+        }
+
+    @staticmethod
+    def key(text: str, method: str, prompt_version: str) -> str:
+        payload = f"{method}\x00{prompt_version}\x00{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get_or_compute(self, text: str, method: str, prompt_version: str, compute: Callable[[], str]) -> str:
+        """Return the cached rewrite of ``text`` or run ``compute`` once to produce it.
+
+        Exceptions from ``compute`` are raised to every caller waiting on that
+        call and nothing is cached.
+        """
+        key = self.key(text, method, prompt_version)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry["text"]
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            with self._lock:
+                self._stats["saved_seconds"] += flight.seconds
+            return flight.value
+
+        try:
+            start = time.perf_counter()
+            flight.value = compute()
+            flight.seconds = time.perf_counter() - start
+            self._store(key, {"text": flight.value, "seconds": round(flight.seconds, 6)})
+            return flight.value
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def get(self, text: str, method: str, prompt_version: str) -> Optional[str]:
+        """Return the cached rewrite of ``text`` or None; counts towards the hit counters."""
+        entry = self._lookup(self.key(text, method, prompt_version))
+        return entry["text"] if entry is not None else None
+
+    def set(self, text: str, method: str, prompt_version: str, rewritten: str, seconds: float = 0.0) -> None:
+        """Store a rewrite produced elsewhere; ``seconds`` is its upstream latency."""
+        self._store(self.key(text, method, prompt_version), {"text": rewritten, "seconds": round(seconds, 6)})
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit counters per tier, the hit ratio and the upstream latency saved by hits."""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["inflight"] = len(self._inflight)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["saved_seconds"] = round(stats["saved_seconds"], 3)
+        stats["size"] = len(self.local)
+        stats["max_size"] = self.local.max_size
+        stats["ttl_seconds"] = self.ttl_seconds
+        stats["persistent_backend"] = type(self.persistent).__name__ if self.persistent is not None else None
+        return stats
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.local.get(key)
+        tier = "local_hits"
+        if entry is None and self.persistent is not None:
+            entry = self._persistent_call(self.persistent.get, key)
+            tier = "persistent_hits"
+            if entry is not None:
+                self.local.set(key, entry)
+
+        with self._lock:
+            if entry is None:
+                self._stats["misses"] += 1
+            else:
+                self._stats["hits"] += 1
+                self._stats[tier] += 1
+                self._stats["saved_seconds"] += entry["seconds"]
+        return entry
+
+    def _store(self, key: str, entry: Dict[str, Any]) -> None:
+        self.local.set(key, entry)
+        if self.persistent is not None:
+            self._persistent_call(self.persistent.set, key, entry, self.ttl_seconds)
+
+    def _persistent_call(self, method: Callable[..., Any], *args: Any) -> Any:
+        try:
+            return method(*args)
+        except Exception as exc:
+            logger.warning(f"Persistent rewrite cache unavailable: {exc}")
+            with self._lock:
+                self._stats["persistent_errors"] += 1
+            return None
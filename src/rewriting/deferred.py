@@ -0,0 +1,138 @@
+"""LLM rewrites with a latency budget, finished in the background when they run over."""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+
+from src.db.client import create_index_in_background
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class DeferredRewriter:
+    """Races the Groq rewrite of a HybridRewriter against ``budget_seconds``.
+
+    A Groq result inside the budget is returned as usual. Past the budget the
+    rule-based rewrite is returned straight away with ``pending=True`` and a
+    ``rewrite_id``; the Groq call keeps running on the worker pool and its
+    outcome is stored in ``collection`` under that id and passed to
+    ``on_complete(rewrite_id, document)``.
+    """
+
+    def __init__(
+        self,
+        rewriter: Any,
+        collection: Collection,
+        budget_seconds: float = 1.5,
+        max_workers: int = 8,
+        ttl_seconds: float = 86400.0,
+        on_complete: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    ) -> None:
+        self.rewriter = rewriter
+        self.collection = collection
+        self.budget_seconds = budget_seconds
+        self.ttl_seconds = ttl_seconds
+        self.on_complete = on_complete
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-rewrite")
+        create_index_in_background(self.collection, "expires_at", expireAfterSeconds=0)
+
+    def rewrite(self, text: str, rewrite_id: Optional[str] = None) -> Dict[str, Any]:
+        """Rewrite ``text`` within the budget; same keys as HybridRewriter.rewrite plus pending/rewrite_id."""
+        if self.rewriter.prefer_local or not self.rewriter.groq.is_available:
+            return {**self.rewriter.rewrite(text), "pending": False, "rewrite_id": None}
+
+        future = self._executor.submit(self.rewriter.rewrite_with_groq, text)
+        try:
+            rewritten = future.result(timeout=self.budget_seconds)
+            return self._result(rewritten, "groq")
+        except FutureTimeoutError:
+            rewrite_id = rewrite_id or uuid.uuid4().hex
+            fallback = self.rewriter.rule_based.rewrite(text)
+            self._store_pending(rewrite_id, fallback)
+            future.add_done_callback(lambda done: self._finish(rewrite_id, done))
+            logger.info(f"Groq rewrite over {self.budget_seconds}s budget, deferred as {rewrite_id}")
+            return self._result(fallback, "rules", pending=True, rewrite_id=rewrite_id)
+        except Exception as exc:
+            logger.warning(f"Groq failed, using rule-based fallback: {exc}")
+            return self._result(self.rewriter.rule_based.rewrite(text), "rules", error=str(exc))
+
+    def rewrite_many(self, texts: Sequence[str], max_prompt_tokens: int = 2000) -> List[Dict[str, Any]]:
+        """Batched HybridRewriter.rewrite_many within the same budget for all batches together.
+
+        Batches still running at the deadline get the rule-based rewrite; their
+        Groq answers only fill the rewrite cache, nothing is stored as pending.
+        """
+        return self.rewriter.rewrite_many(
+            texts, max_prompt_tokens=max_prompt_tokens, executor=self._executor, budget_seconds=self.budget_seconds
+        )
+
+    def get(self, rewrite_id: str) -> Optional[Dict[str, Any]]:
+        return self.collection.find_one({"_id": rewrite_id})
+
+    def close(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    @staticmethod
+    def _result(
+        rewritten: str,
+        method: str,
+        error: Optional[str] = None,
+        pending: bool = False,
+        rewrite_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        return {
+            "rewritten_text": rewritten,
+            "method_used": method,
+            "success": True,
+            "error": error,
+            "pending": pending,
+            "rewrite_id": rewrite_id,
+        }
+
+    def _store_pending(self, rewrite_id: str, fallback: str) -> None:
+        now = datetime.utcnow()
+        try:
+            self.collection.replace_one(
+                {"_id": rewrite_id},
+                {
+                    "_id": rewrite_id,
+                    "status": PENDING,
+                    "fallback_text": fallback,
+                    "rewritten_text": None,
+                    "method_used": None,
+                    "error": None,
+                    "created_at": now,
+                    "completed_at": None,
+                    "expires_at": now + timedelta(seconds=self.ttl_seconds),
+                },
+                upsert=True,
+            )
+        except PyMongoError as exc:
+            logger.error(f"Could not store pending rewrite {rewrite_id}: {exc}")
+
+    def _finish(self, rewrite_id: str, future: Future) -> None:
+        try:
+            update = {"status": COMPLETED, "rewritten_text": future.result(), "method_used": "groq"}
+        except Exception as exc:
+            logger.warning(f"Deferred Groq rewrite {rewrite_id} failed: {exc}")
+            update = {"status": FAILED, "error": str(exc)}
+        update["completed_at"] = datetime.utcnow()
+
+        try:
+            self.collection.update_one({"_id": rewrite_id}, {"$set": update})
+            if self.on_complete is not None:
+                self.on_complete(rewrite_id, self.get(rewrite_id))
+        except Exception as exc:
+            logger.error(f"Could not record deferred rewrite {rewrite_id}: {exc}")
@@ -1246,23 +1246,39 @@ async function uploadFile() {
   if (uploadProgress) uploadProgress.style.display = "block";
   if (fileResults) fileResults.style.display = "none";
   if (uploadBtn) uploadBtn.disabled = true;
+  setUploadProgressText("Analyzing your file...");
 
   const formData = new FormData();
   formData.append("file", fileInput.files[0]);
 
   try {
-    const response = await fetch("/api/upload", {
+    const response = await fetch("/api/upload/stream", {
       method: "POST",
       body: formData,
       headers: authToken ? { Authorization: `Bearer ${authToken}` } : {},
     });
 
-    const data = await response.json();
-
-    if (response.ok) {
-      displayFileResults(data);
-    } else {
+    if (!response.ok) {
+      const data = await response.json();
       showError(data.error || "Upload failed");
+      return;
+    }
+
+    // NDJSON: one event per line, rendered as each scored chunk arrives
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+      const { value, done } = await reader.read();
+      buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+
+      const lines = buffer.split("\n");
+      buffer = lines.pop();
+      for (const line of lines) {
+        if (line.trim()) handleUploadEvent(JSON.parse(line));
+      }
+      if (done) break;
     }
   } catch (error) {
     showError("Error uploading file: " + error.message);
@@ -1272,27 +1288,40 @@ async function uploadFile() {
   }
 }
 
-function displayFileResults(data) {
+function handleUploadEvent(event) {
+  if (event.type === "start") {
+    beginFileResults(event.filename);
+  } else if (event.type === "results") {
+    appendFileResults(event.results);
+    updateFileStats(event);
+    setUploadProgressText(
+      `Analyzed ${event.analyzed_lines} lines (${Math.round(
+        event.progress * 100
+      )}%)...`
+    );
+  } else if (event.type === "done") {
+    updateFileStats(event);
+  } else if (event.type === "error") {
+    showError(event.error || "Upload failed");
+  }
+}
+
+function setUploadProgressText(text) {
+  const label = document.querySelector("#uploadProgress p");
+  if (label) label.textContent = text;
+}
+
+function beginFileResults(filename) {
   const resultsDiv = document.getElementById("fileResults");
   const statsDiv = document.getElementById("fileStats");
   const tableDiv = document.getElementById("resultsTable");
 
   if (!resultsDiv || !statsDiv || !tableDiv) return;
 
-  const toxicPercent = ((data.toxic_count / data.analyzed_lines) * 100).toFixed(
-    1
-  );
-
-  statsDiv.innerHTML = `
-    <div class="stat-card">
-      <strong>File:</strong> ${escapeHtml(data.filename)}<br>
-      <strong>Total Lines:</strong> ${data.analyzed_lines}<br>
-      <strong>Toxic:</strong> ${data.toxic_count} (${toxicPercent}%)<br>
-      <strong>Safe:</strong> ${data.analyzed_lines - data.toxic_count}
-    </div>
-  `;
+  statsDiv.dataset.filename = filename;
+  updateFileStats({ analyzed_lines: 0, toxic_count: 0 });
 
-  let tableHTML = `
+  tableDiv.innerHTML = `
     <table class="results-table">
       <thead>
         <tr>
@@ -1302,14 +1331,42 @@ function displayFileResults(data) {
           <th>Status</th>
         </tr>
       </thead>
-      <tbody>
+      <tbody></tbody>
+    </table>
   `;
 
-  data.results.forEach((result) => {
+  resultsDiv.style.display = "block";
+  resultsDiv.scrollIntoView({ behavior: "smooth", block: "start" });
+}
+
+function updateFileStats(data) {
+  const statsDiv = document.getElementById("fileStats");
+  if (!statsDiv) return;
+
+  const toxicPercent = data.analyzed_lines
+    ? ((data.toxic_count / data.analyzed_lines) * 100).toFixed(1)
+    : "0.0";
+
+  statsDiv.innerHTML = `
+    <div class="stat-card">
+      <strong>File:</strong> ${escapeHtml(statsDiv.dataset.filename || "")}<br>
+      <strong>Total Lines:</strong> ${data.analyzed_lines}<br>
+      <strong>Toxic:</strong> ${data.toxic_count} (${toxicPercent}%)<br>
+      <strong>Safe:</strong> ${data.analyzed_lines - data.toxic_count}
+    </div>
+  `;
+}
+
+function appendFileResults(results) {
+  const tbody = document.querySelector("#resultsTable tbody");
+  if (!tbody) return;
+
+  let rowsHTML = "";
+  results.forEach((result) => {
     const statusClass = result.is_toxic ? "status-toxic" : "status-safe";
     const statusText = result.is_toxic ? "⚠️ Toxic" : "✅ Safe";
 
-    tableHTML += `
+    rowsHTML += `
       <tr>
         <td>${result.line_number}</td>
         <td class="text-preview">${escapeHtml(result.text)}</td>
@@ -1319,11 +1376,7 @@ function displayFileResults(data) {
     `;
   });
 
-  tableHTML += "</tbody></table>";
-  tableDiv.innerHTML = tableHTML;
-
-  resultsDiv.style.display = "block";
-  resultsDiv.scrollIntoView({ behavior: "smooth", block: "start" });
+  tbody.insertAdjacentHTML("beforeend", rowsHTML);
 }
 
 function exportResults() {
@@ -0,0 +1,40 @@
+import argparse
+
+from detoxify.artifacts import load_artifacts
+from detoxify.detoxify import MODEL_URLS, artifact_path, load_cached_checkpoint
+
+
+def main(args):
+    """Downloads released models into the local artifact store so later loads work offline."""
+    unknown = sorted(set(args.model_types) - set(MODEL_URLS))
+    if unknown:
+        raise ValueError(f"Unknown model types {unknown}, expected any of {list(MODEL_URLS)}")
+
+    for model_type in args.model_types:
+        load_cached_checkpoint(model_type=model_type, cache_dir=args.cache_dir)
+        stored_at = artifact_path(model_type, cache_dir=args.cache_dir)
+        if args.verify:
+            load_artifacts(stored_at, verify=True)
+        print(f"{model_type}: {stored_at}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "model_types",
+        nargs="*",
+        default=["unbiased"],
+        help=f"model types to store, any of {list(MODEL_URLS)} (default: unbiased)",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        default=None,
+        type=str,
+        help="cache directory holding the artifact store (default: $DETOXIFY_CACHE_DIR or <torch hub dir>/detoxify)",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="check stored weights against their recorded sha256",
+    )
+    main(parser.parse_args())
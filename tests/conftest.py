@@ -0,0 +1,137 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import torch
+from transformers import BertConfig, BertForSequenceClassification, BertTokenizer
+
+TINY_CLASSES = ["toxicity", "insult", "threat"]
+TINY_VOCAB = [
+    "[PAD]",
+    "[UNK]",
+    "[CLS]",
+    "[SEP]",
+    "[MASK]",
+    "you",
+    "are",
+    "a",
+    "liar",
+    "nice",
+    "day",
+    "shut",
+    "up",
+    "the",
+]
+
+
+@pytest.fixture
+def tiny_checkpoint(tmp_path):
+    """A randomly initialised BERT checkpoint in the Detoxify format that loads fully offline.
+
+    Returns the checkpoint path and the directory holding the HF config and tokenizer files.
+    """
+    torch.manual_seed(0)
+    hf_dir = tmp_path / "hf"
+    hf_dir.mkdir()
+    (hf_dir / "vocab.txt").write_text("\n".join(TINY_VOCAB) + "\n")
+    BertTokenizer(str(hf_dir / "vocab.txt")).save_pretrained(hf_dir)
+
+    config = BertConfig(
+        vocab_size=len(TINY_VOCAB),
+        hidden_size=16,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=32,
+        max_position_embeddings=64,
+        num_labels=len(TINY_CLASSES),
+    )
+    config.save_pretrained(hf_dir)
+    model = BertForSequenceClassification(config)
+
+    checkpoint_path = tmp_path / "tiny.ckpt"
+    torch.save(
+        {
+            "config": {
+                "arch": {
+                    "args": {
+                        "model_type": str(hf_dir),
+                        "model_name": "BertForSequenceClassification",
+                        "tokenizer_name": "BertTokenizer",
+                        "num_classes": len(TINY_CLASSES),
+                    }
+                },
+                "dataset": {"args": {"classes": TINY_CLASSES}},
+            },
+            "state_dict": model.state_dict(),
+        },
+        checkpoint_path,
+    )
+    return str(checkpoint_path), str(hf_dir)
+
+
+class _StubGroqHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        server.requests.append(body)
+        time.sleep(server.delay)
+
+        status, content = server.reply(body)
+        if status == 200:
+            payload = {
+                "id": f"chatcmpl-{len(server.requests)}",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                ],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }
+        else:
+            payload = {"error": {"message": content, "type": "invalid_request_error"}}
+
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        # Model list, used by health probes; not recorded in ``requests``
+        status = 200 if self.server.healthy else 503
+        data = json.dumps({"object": "list", "data": [{"id": "llama-3.1-8b-instant", "object": "model"}]})
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data.encode("utf-8"))
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def groq_stub():
+    """A local HTTP server speaking the Groq chat completions API.
+
+    Set ``delay`` (seconds) and ``reply`` (request body -> (status, content)) to
+    shape responses; received request bodies are collected in ``requests``.
+    ``healthy = False`` makes the model list (health probes) fail. Pass
+    ``base_url`` to the Groq client.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubGroqHandler)
+    server.daemon_threads = True
+    server.delay = 0.0
+    server.requests = []
+    server.healthy = True
+    server.reply = lambda body: (200, "Please reconsider your wording.")
+    server.base_url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
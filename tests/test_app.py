@@ -0,0 +1,383 @@
+import io
+import json
+import os
+import runpy
+import sqlite3
+import time
+
+os.environ.setdefault("MONGO_USE_MOCK", "true")
+
+import mongomock
+import pytest
+
+import app as app_module
+from rewriter import HybridRewriter
+from src.cache import SqliteCacheBackend
+from src.rewriting.deferred import DeferredRewriter
+
+CLASSES = ["toxicity", "severe_toxicity", "obscene", "threat", "insult", "identity_attack", "sexual_explicit"]
+
+
+class FakeDetoxify:
+    """Scores texts containing 'idiot' as toxic without loading a transformer."""
+
+    def __init__(self):
+        self.scored = []
+
+    def _scores(self, text):
+        toxicity = 0.9 if "idiot" in text.lower() else 0.1
+        return {cla: toxicity if cla in ("toxicity", "insult") else 0.01 for cla in CLASSES}
+
+    def predict(self, text):
+        if isinstance(text, list):  # like Detoxify, a list is scored as a batch
+            return self.predict_batch(text)
+        self.scored.append(text)
+        return self._scores(text)
+
+    def predict_batch(self, texts, batch_size=32):
+        self.scored.extend(texts)
+        scores = [self._scores(text) for text in texts]
+        return {cla: [s[cla] for s in scores] for cla in CLASSES}
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    # Real rewriter and crisis detector (no network), fake model instead of loading Detoxify
+    app_module.components.warm_up(["rewriter", "crisis_detector"])
+    monkeypatch.setattr(app_module.components["detoxify"], "status", "loaded")
+    model = FakeDetoxify()
+    monkeypatch.setattr(app_module, "model", model)
+    monkeypatch.setattr(app_module, "batcher", None)
+    monkeypatch.setattr(app_module, "score_cache", None)
+    return model
+
+
+@pytest.fixture
+def client(fake_model):
+    app_module.app.config["TESTING"] = True
+    return app_module.app.test_client()
+
+
+def upload(client, content, filename="comments.txt"):
+    return client.post(
+        "/api/upload",
+        data={"file": (io.BytesIO(content.encode("utf-8")), filename)},
+        content_type="multipart/form-data",
+    )
+
+
+def test_upload_scores_each_distinct_line_once(client, fake_model):
+    response = upload(client, "you idiot\nhello world\n\nyou idiot\nok\n")
+    assert response.status_code == 200
+    data = response.get_json()
+
+    assert sorted(fake_model.scored) == ["hello world", "you idiot"]
+    assert data["total_lines"] == 4
+    assert data["analyzed_lines"] == 3
+    assert data["toxic_count"] == 2
+    assert data["safe_count"] == 1
+    assert [r["line_number"] for r in data["results"]] == [1, 2, 3]
+    first = data["results"][0]
+    assert first["full_text"] == "you idiot"
+    assert first["is_toxic"] is True
+    assert first["toxicity_score"] == 0.9
+    assert set(first["categories"]) == set(CLASSES)
+
+
+def test_upload_can_rewrite_toxic_lines_in_bulk(client, monkeypatch):
+    rewriter = HybridRewriter(prefer_local=True)
+    monkeypatch.setattr(app_module, "rewriter", rewriter)
+    monkeypatch.setattr(
+        app_module, "deferred_rewriter", DeferredRewriter(rewriter, mongomock.MongoClient()["test"]["rewrites"])
+    )
+    response = client.post(
+        "/api/upload",
+        data={"file": (io.BytesIO(b"you idiot\nhello world\n"), "comments.txt"), "rewrite": "true"},
+        content_type="multipart/form-data",
+    )
+    results = response.get_json()["results"]
+
+    assert results[0]["rewritten_text"] == "You individual."
+    assert results[0]["rewrite_method"] == "rules"
+    assert "rewritten_text" not in results[1]
+
+
+def test_upload_rejects_other_file_types(client):
+    response = upload(client, "hello", filename="comments.csv")
+    assert response.status_code == 400
+
+
+def test_job_endpoints_report_progress_and_page_results(client):
+    response = client.post(
+        "/api/jobs",
+        data={"file": (io.BytesIO(b"you idiot\nhello world\nthanks a lot\n"), "comments.txt")},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+    app_module.job_manager.wait(job_id, timeout=10)
+
+    data = client.get(f"/api/jobs/{job_id}?limit=2").get_json()
+    assert data["job"]["status"] == "completed"
+    assert data["job"]["toxic_count"] == 1
+    assert [r["line_number"] for r in data["results"]] == [1, 2]
+    assert data["next_offset"] == 2
+
+    data = client.get(f"/api/jobs/{job_id}?offset=2&limit=2").get_json()
+    assert [r["full_text"] for r in data["results"]] == ["thanks a lot"]
+    assert data["next_offset"] is None
+
+    assert client.get("/api/jobs/unknown").status_code == 404
+
+
+def test_streaming_upload_emits_chunks_and_running_tally(client, monkeypatch):
+    monkeypatch.setattr(app_module, "UPLOAD_CHUNK_SIZE", 2)
+    response = client.post(
+        "/api/upload/stream",
+        data={"file": (io.BytesIO(b"you idiot\nhello world\nok\nanother idiot\n"), "comments.txt")},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert [event["type"] for event in events] == ["start", "results", "results", "done"]
+    assert [r["line_number"] for r in events[1]["results"]] == [1, 2]
+    assert (events[1]["toxic_count"], events[1]["safe_count"]) == (1, 1)
+    assert [r["line_number"] for r in events[2]["results"]] == [4]
+    done = events[-1]
+    assert (done["total_lines"], done["analyzed_lines"], done["toxic_count"]) == (4, 3, 2)
+
+
+def test_streaming_upload_reports_empty_file_in_band(client):
+    response = upload(client, "\n\n", filename="empty.txt")
+    assert response.status_code == 400
+
+    response = client.post(
+        "/api/upload/stream",
+        data={"file": (io.BytesIO(b"\n\n"), "empty.txt")},
+        content_type="multipart/form-data",
+    )
+    events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert events[-1] == {"type": "error", "error": "No text found in file"}
+
+
+def test_analyze_runs_stage_graph_and_reports_debug_timings(client):
+    response = client.post("/api/analyze?debug=1", json={"text": "you are an idiot"})
+    assert response.status_code == 200
+    data = response.get_json()
+
+    assert data["is_toxic"] is True
+    assert data["cleaned_text"] == "you are an [REDACTED]"
+    assert data["toxic_words_found"] == ["idiot"]
+    assert set(data["debug"]["stage_timings_ms"]) == {
+        "toxicity",
+        "sentiment",
+        "crisis",
+        "redaction",
+        "sentiment_cleaned",
+        "rewrite",
+    }
+
+    data = client.post("/api/analyze", json={"text": "what a lovely day"}).get_json()
+    assert data["is_toxic"] is False
+    assert data["cleaned_text"] == "what a lovely day"
+    assert data["sentiment_cleaned"] == data["sentiment_original"]
+    assert data["rewrite_method"] == "none"
+    assert "debug" not in data
+
+
+def test_slow_rewrite_is_deferred_and_retrievable(client, monkeypatch, groq_stub):
+    hybrid = HybridRewriter(groq_api_key="test-key", groq_base_url=groq_stub.base_url)
+    deferred = DeferredRewriter(hybrid, mongomock.MongoClient()["db"]["rewrites"], budget_seconds=0.05)
+    monkeypatch.setattr(app_module, "deferred_rewriter", deferred)
+    groq_stub.delay = 0.3
+
+    data = client.post("/api/analyze", json={"text": "you are an idiot"}).get_json()
+    assert data["rewrite_pending"] is True
+    assert data["rewrite_method"] == "rules"
+
+    deferred.close()
+    data = client.get(f"/api/rewrites/{data['rewrite_id']}").get_json()
+    assert data["status"] == "completed"
+    assert data["method_used"] == "groq"
+    assert data["rewritten_text"] == "Please reconsider your wording."
+    assert client.get("/api/rewrites/unknown").status_code == 404
+
+
+def test_health_reports_component_load_times(client, monkeypatch):
+    monkeypatch.setattr(app_module, "model", None)
+    health = client.get("/api/health").get_json()
+    components = health["components"]
+    assert health["inference_runtime"]["pid"] == os.getpid()
+    assert set(components) == {"detoxify", "rewriter", "crisis_detector"}
+    assert components["rewriter"]["status"] == "loaded"
+    assert components["rewriter"]["seconds"] >= 0
+
+
+def test_create_app_loads_components_and_warm_up_runs_inference(fake_model, monkeypatch):
+    monkeypatch.setattr(app_module.gc, "freeze", lambda: None)
+    assert app_module.create_app() is app_module.app
+    assert all(c["status"] == "loaded" for c in app_module.components.status().values())
+
+    assert app_module.warm_up_inference() >= 0
+    assert fake_model.scored == ["warm up"]
+
+
+requires_fork = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+
+
+def run_in_fork(fn):
+    """Run ``fn`` in a forked child, as gunicorn runs a worker of a preloading master, and return its result."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            payload = {"result": fn()}
+        except BaseException as exc:
+            payload = {"error": repr(exc)}
+        os.write(write_fd, json.dumps(payload).encode())
+        os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        payload = json.loads(pipe.read())
+    os.waitpid(pid, 0)
+    assert "error" not in payload, payload["error"]
+    return payload["result"]
+
+
+@requires_fork
+def test_forked_worker_scores_and_rewrites_after_create_app(fake_model, monkeypatch, groq_stub, tmp_path):
+    fake_model.load_seconds = 0.0
+    monkeypatch.setattr("detoxify.Detoxify", lambda *args, **kwargs: fake_model)
+    monkeypatch.setenv("GROQ_API_KEY", "fork-key")
+    monkeypatch.setenv("GROQ_BASE_URL", groq_stub.base_url)
+    monkeypatch.setattr(app_module.gc, "freeze", lambda: None)
+    monkeypatch.setattr(app_module, "BATCH_TIMEOUT_SECONDS", 5)
+    monkeypatch.setattr(app_module, "REWRITE_CACHE_PATH", str(tmp_path / "rewrites.sqlite"))
+    for name in ("rewriter", "deferred_rewriter"):
+        monkeypatch.setattr(app_module, name, getattr(app_module, name))
+    for name in ("detoxify", "rewriter"):
+        monkeypatch.setattr(app_module.components[name], "status", "pending")
+    app_module.create_app()
+    groq = app_module.rewriter.groq
+
+    def wait_for_health():
+        deadline = time.monotonic() + 5
+        while groq.health_status()["status"] == "unknown" and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return groq.health_status()["status"]
+
+    def worker():
+        return {
+            "toxicity": app_module.score_text("you idiot")["toxicity"],
+            # A text of its own per process misses the in-memory tier and reaches SQLite
+            "rewritten": app_module.rewriter.rewrite_with_groq(f"you idiot {os.getpid()}"),
+            "health": wait_for_health(),
+        }
+
+    expected = {"toxicity": 0.9, "rewritten": "Please reconsider your wording.", "health": "up"}
+    try:
+        # Loading the app starts no LLM thread: a preloading master forks a clean process
+        assert groq.client._loop is None and groq.client.health._thread is None
+        assert run_in_fork(worker) == expected
+
+        # Workers forked from a process whose threads and connections are in use open their own
+        assert wait_for_health() == "up"
+        assert worker() == expected
+        assert run_in_fork(worker) == expected
+
+        with sqlite3.connect(str(tmp_path / "rewrites.sqlite")) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM rewrites").fetchone()[0] == 3
+    finally:
+        app_module.batcher.close()
+
+
+@requires_fork
+def test_forked_worker_opens_its_own_sqlite_connection(tmp_path):
+    backend = SqliteCacheBackend(str(tmp_path / "cache.sqlite"), table="rewrites")
+    backend.set("from parent", "a", ttl_seconds=60)
+    parent_conn = backend._conn
+
+    def worker():
+        backend.set("from child", "b", ttl_seconds=60)
+        return {"read": backend.get("from parent"), "own_connection": backend._conn is not parent_conn}
+
+    try:
+        assert run_in_fork(worker) == {"read": "a", "own_connection": True}
+        assert backend.get("from child") == "b"
+        assert backend._conn is parent_conn
+    finally:
+        backend.close()
+
+
+def test_gunicorn_config_assigns_worker_slots(monkeypatch):
+    monkeypatch.setenv("WEB_WORKERS", "3")
+    monkeypatch.setenv("WEB_THREADS", "8")
+    monkeypatch.setenv("INFERENCE_CPU_AFFINITY", "auto")
+    monkeypatch.delenv("INFERENCE_INTRA_OP_THREADS", raising=False)
+    config = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(__file__)), "gunicorn.conf.py"))
+
+    assert config["wsgi_app"] == "app:create_app()"
+    assert (config["workers"], config["threads"]) == (3, 8)
+    assert (config["cpu_affinity"], config["intra_op_threads"]) == ("auto", 0)
+    assert config["free_slot"](3, []) == 0
+    assert config["free_slot"](3, [0, 2]) == 1
+    assert config["free_slot"](2, [0, 1]) == 0
+
+
+def test_model_can_run_in_an_inference_pool(fake_model, monkeypatch):
+    from tests.test_inference_pool import fake_detoxify
+
+    monkeypatch.setattr(app_module, "INFERENCE_POOL_WORKERS", 1)
+    monkeypatch.setattr(app_module, "load_detoxify", fake_detoxify)
+    monkeypatch.setattr(app_module, "model", None)
+    assert app_module.load_model()
+    try:
+        assert isinstance(app_module.model, app_module.InferencePool)
+        scores = app_module.score_text("hello")
+        assert scores["toxicity"] == 0.05
+        assert scores["pid"] != os.getpid()
+
+        health = app_module.app.test_client().get("/api/health").get_json()
+        assert health["inference_backend"] == "fake"
+        assert health["inference_pool"]["live_workers"] == 1
+    finally:
+        app_module.batcher.close()
+        app_module.model.close()
+
+
+@requires_fork
+def test_forked_worker_starts_its_own_inference_pool(fake_model, monkeypatch):
+    from tests.test_inference_pool import fake_detoxify
+
+    monkeypatch.setattr(app_module, "INFERENCE_POOL_WORKERS", 1)
+    monkeypatch.setattr(app_module, "load_detoxify", fake_detoxify)
+    monkeypatch.setattr(app_module, "model", None)
+    monkeypatch.setattr(app_module, "BATCH_TIMEOUT_SECONDS", 30)
+    assert app_module.load_model()
+
+    def worker():
+        scores = app_module.score_text("hello from a fork")
+        return {
+            "scored_in_worker": scores["pid"] != os.getpid(),
+            "live_workers": app_module.model.stats()["live_workers"],
+        }
+
+    try:
+        # Loading the model starts no worker process here, in the "master"
+        assert app_module.model.stats()["live_workers"] == 0
+        assert run_in_fork(worker) == {"scored_in_worker": True, "live_workers": 1}
+        assert app_module.model.stats()["live_workers"] == 0
+    finally:
+        app_module.batcher.close()
+        app_module.model.close()
+
+
+def test_analyze_preflight_loads_nothing(monkeypatch):
+    ensured = []
+    monkeypatch.setattr(app_module.components, "ensure", ensured.append)
+    response = app_module.app.test_client().options("/api/analyze")
+
+    assert response.status_code == 200
+    assert ensured == []
@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from src.inference.batcher import BatchQueueFullError, MicroBatcher, split_scores
+
+
+def fake_predict(texts):
+    return {
+        "toxicity": [len(text) / 100 for text in texts],
+        "insult": [0.0 for _ in texts],
+    }
+
+
+def test_split_scores_handles_squeezed_single_item():
+    assert split_scores({"toxicity": 0.25}, 1) == [{"toxicity": 0.25}]
+    assert split_scores({"toxicity": [0.1, 0.2]}, 2) == [{"toxicity": 0.1}, {"toxicity": 0.2}]
+
+
+def test_concurrent_requests_share_a_batch():
+    calls = []
+
+    def predict(texts):
+        calls.append(list(texts))
+        return fake_predict(texts)
+
+    batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=200)
+    texts = ["a" * n for n in range(1, 9)]
+    results = {}
+
+    def worker(text):
+        results[text] = batcher.predict(text, timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(text,)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+
+    assert all(results[text]["toxicity"] == pytest.approx(len(text) / 100) for text in texts)
+    assert len(calls) < len(texts)
+    assert batcher.stats()["batched_texts"] == len(texts)
+
+
+def test_batch_size_is_capped():
+    sizes = []
+
+    def predict(texts):
+        sizes.append(len(texts))
+        return fake_predict(texts)
+
+    batcher = MicroBatcher(predict, max_batch_size=3, max_wait_ms=50)
+    futures = [batcher.submit(f"text {i}") for i in range(7)]
+    for future in futures:
+        future.result(timeout=5)
+    batcher.close()
+
+    assert max(sizes) <= 3
+    assert sum(sizes) == 7
+
+
+def test_queue_depth_limit_rejects_requests():
+    release = threading.Event()
+
+    def predict(texts):
+        release.wait(5)
+        return fake_predict(texts)
+
+    batcher = MicroBatcher(predict, max_batch_size=1, max_wait_ms=0, max_queue_size=1)
+    first = batcher.submit("in flight")
+    # Wait until the worker has taken the first request off the queue.
+    while batcher.stats()["queue_depth"]:
+        time.sleep(0.001)
+    queued = batcher.submit("queued")
+    with pytest.raises(BatchQueueFullError):
+        batcher.submit("rejected")
+
+    release.set()
+    assert first.result(timeout=5)["toxicity"] == pytest.approx(0.09)
+    assert queued.result(timeout=5)["toxicity"] == pytest.approx(0.06)
+    assert batcher.stats()["rejected"] == 1
+    batcher.close()
+
+
+def test_predict_errors_propagate_to_every_caller():
+    def predict(texts):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit("text") for _ in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="boom"):
+            future.result(timeout=5)
+    batcher.close()
+
+
+def test_workers_score_batches_concurrently():
+    running = threading.Barrier(2, timeout=5)
+
+    def predict(texts):
+        running.wait()  # only passes when two batches are in flight at once
+        return fake_predict(texts)
+
+    batcher = MicroBatcher(predict, max_batch_size=1, max_wait_ms=0, workers=2)
+    futures = [batcher.submit(text) for text in ("first", "second")]
+    assert [future.result(timeout=5)["toxicity"] for future in futures] == [0.05, 0.06]
+    batcher.close()
+
+    assert batcher.stats()["workers"] == 2
+    with pytest.raises(RuntimeError):
+        batcher.submit("late")
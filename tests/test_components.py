@@ -0,0 +1,67 @@
+import pytest
+
+from src.components import ComponentRegistry
+
+
+def test_components_load_once_on_first_use():
+    calls = []
+    registry = ComponentRegistry()
+    registry.register("model", lambda: calls.append("model") or True)
+    registry.register("broken", lambda: False)
+
+    @registry.requires("model")
+    def view():
+        return "ok"
+
+    assert registry.status()["model"]["status"] == "pending"
+    assert view() == "ok"
+    assert view() == "ok"
+    assert calls == ["model"]
+    assert registry.status()["model"]["status"] == "loaded"
+    assert registry.status()["model"]["seconds"] >= 0
+
+    assert registry.ensure("broken") is False
+    assert registry.status()["broken"]["error"] == "loader reported failure"
+
+
+def test_failed_loads_are_recorded_and_can_be_retried():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("weights missing")
+        return True
+
+    registry = ComponentRegistry()
+    registry.register("model", flaky)
+
+    assert registry.warm_up() == {"model": False}
+    assert registry.ensure("model") is False
+    assert registry.status()["model"]["error"] == "weights missing"
+    assert registry.reload("model") is True
+    assert len(attempts) == 2
+
+
+def test_duplicate_registration_is_rejected():
+    registry = ComponentRegistry()
+    registry.register("model", lambda: True)
+    with pytest.raises(ValueError):
+        registry.register("model", lambda: True)
+
+
+def test_requires_can_skip_loading():
+    calls = []
+    registry = ComponentRegistry()
+    registry.register("model", lambda: calls.append("model") or True)
+    skip = [True]
+
+    @registry.requires("model", unless=lambda: skip[0])
+    def view():
+        return "ok"
+
+    assert view() == "ok"
+    assert calls == []
+    skip[0] = False
+    assert view() == "ok"
+    assert calls == ["model"]
@@ -1,3 +1,7 @@
+from src.crisis.assessments import PHQ9Assessment
+from src.crisis.detector import CrisisDetector
+
+
 def test_imminent_danger_detection():
     """Test that "I want to kill myself" triggers IMMINENT"""
     detector = CrisisDetector()
@@ -12,6 +16,33 @@ def test_phq9_scoring():
     assert result['severity'] == "Severe depression"
     assert result['risk_level'] == "URGENT"  # Q9 = 2
 
+def test_imminent_trigger_is_first_matching_pattern():
+    """Overlapping matches still report the earliest IMMINENT pattern"""
+    detector = CrisisDetector()
+    result = detector.detect_risk("I'm going to kill myself")
+    assert result['triggers'] == [CrisisDetector.IMMINENT_DANGER_KEYWORDS[0]]
+
+    # "thoughts of suicide" (HIGH) overlaps "suicide myself" (IMMINENT)
+    result = detector.detect_risk("thoughts of suicide myself")
+    assert result['risk_level'] == 'IMMINENT'
+
+
+def test_tier_precedence_and_medium_threshold():
+    """HIGH beats MEDIUM; one MEDIUM match alone stays LOW"""
+    detector = CrisisDetector()
+    high = detector.detect_risk("I feel hopeless and alone, nobody cares")
+    assert high['risk_level'] == 'HIGH'
+    assert high['triggers'] == [CrisisDetector.HIGH_RISK_KEYWORDS[0]]
+
+    medium = detector.detect_risk("I feel empty and I can't sleep")
+    assert medium['risk_level'] == 'MEDIUM'
+    assert medium['triggers'] == CrisisDetector.MEDIUM_RISK_KEYWORDS[:2]
+
+    assert detector.detect_risk("so sad today")['risk_level'] == 'LOW'
+    assert detector.detect_risk("so sad today")['confidence'] == 0.55
+    assert detector.detect_risk("great work team") == detector.detect_risk("")
+
+
 def test_escalation_workflow():
     """Test human handoff triggers"""
     # Simulate HIGH risk conversation
@@ -0,0 +1,96 @@
+import json
+import threading
+
+import mongomock
+import pytest
+
+from rewriter import HybridRewriter
+from src.rewriting.cache import RewriteCache
+from src.rewriting.deferred import COMPLETED, FAILED, DeferredRewriter
+
+
+@pytest.fixture
+def collection():
+    return mongomock.MongoClient()["senti_clean"]["rewrites"]
+
+
+def make_rewriter(groq_stub, collection, **kwargs):
+    hybrid = HybridRewriter(groq_api_key="test-key", groq_base_url=groq_stub.base_url)
+    assert hybrid.groq.is_available
+    return DeferredRewriter(hybrid, collection, **kwargs)
+
+
+def test_fast_groq_rewrite_is_returned_directly(groq_stub, collection):
+    deferred = make_rewriter(groq_stub, collection, budget_seconds=5)
+    result = deferred.rewrite("you idiot")
+
+    assert result["rewritten_text"] == "Please reconsider your wording."
+    assert result["method_used"] == "groq"
+    assert result["pending"] is False
+    assert "you idiot" in groq_stub.requests[-1]["messages"][0]["content"]
+    deferred.close()
+
+
+def test_slow_groq_rewrite_falls_back_and_finishes_in_background(groq_stub, collection):
+    finished = threading.Event()
+    completions = []
+
+    def on_complete(rewrite_id, document):
+        completions.append((rewrite_id, document))
+        finished.set()
+
+    deferred = make_rewriter(groq_stub, collection, budget_seconds=0.05, on_complete=on_complete)
+    groq_stub.delay = 0.5
+    result = deferred.rewrite("you idiot", rewrite_id="record-1")
+
+    assert result["pending"] is True
+    assert result["rewrite_id"] == "record-1"
+    assert result["method_used"] == "rules"
+    assert result["rewritten_text"] == "You individual."
+    assert deferred.get("record-1")["status"] == "pending"
+
+    assert finished.wait(timeout=10)
+    document = deferred.get("record-1")
+    assert document["status"] == COMPLETED
+    assert document["rewritten_text"] == "Please reconsider your wording."
+    assert completions[0][0] == "record-1"
+    deferred.close()
+
+
+def test_failed_background_rewrite_is_recorded(groq_stub, collection):
+    deferred = make_rewriter(groq_stub, collection, budget_seconds=0.05)
+    groq_stub.delay = 0.3
+    groq_stub.reply = lambda body: (400, "bad request")
+    result = deferred.rewrite("you idiot")
+
+    assert result["pending"] is True
+    deferred.close()
+    document = deferred.get(result["rewrite_id"])
+    assert document["status"] == FAILED
+    assert "bad request" in document["error"]
+
+
+def test_groq_error_inside_budget_uses_rules(groq_stub, collection):
+    deferred = make_rewriter(groq_stub, collection, budget_seconds=5)
+    groq_stub.reply = lambda body: (400, "bad request")
+    result = deferred.rewrite("you idiot")
+
+    assert result["method_used"] == "rules"
+    assert result["pending"] is False
+    assert "bad request" in result["error"]
+    deferred.close()
+
+
+def test_bulk_rewrites_share_the_budget_and_late_batches_fill_the_cache(groq_stub, collection):
+    hybrid = HybridRewriter(groq_api_key="test-key", groq_base_url=groq_stub.base_url, cache=RewriteCache())
+    deferred = DeferredRewriter(hybrid, collection, budget_seconds=0.05)
+    groq_stub.reply = lambda body: (200, json.dumps({"1": "Please stop."}))
+
+    groq_stub.delay = 0.5
+    result = deferred.rewrite_many(["you idiot"])[0]
+    assert result["method_used"] == "rules"
+    assert "budget" in result["error"]
+
+    deferred.close()  # waits for the batch still running in the background
+    assert hybrid.cache.get("you idiot", "groq", hybrid._cache_version()) == "Please stop."
+    assert collection.count_documents({}) == 0
@@ -0,0 +1,82 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.extraction import UploadLines
+from src.inference.scoring import iter_line_results
+
+
+def make_pdf(pages):
+    """Build a minimal PDF with one line of Helvetica text per entry in ``pages``."""
+    page_ids = [3 + 2 * i for i in range(len(pages))]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % i for i in page_ids), len(pages)),
+    ]
+    font_id = 3 + 2 * len(pages)
+    for page_id, text in zip(page_ids, pages):
+        content = b"BT /F1 12 Tf 72 720 Td (%s) Tj ET" % text.encode("latin-1")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R"
+            b" /Resources << /Font << /F1 %d 0 R >> >> >>" % (page_id + 1, font_id)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def test_text_lines_are_cleaned_and_read_lazily():
+    lines = UploadLines(io.BytesIO(b"  first line \r\n\n\t\nsecond line\nthird"), "txt")
+    iterator = iter(lines)
+
+    assert next(iterator) == "first line"
+    assert lines.line_count == 1
+    assert 0 < lines.progress < 1
+    assert list(iterator) == ["second line", "third"]
+    assert lines.line_count == 3
+    assert lines.progress == 1.0
+
+
+def test_pdf_pages_are_extracted_one_at_a_time():
+    lines = UploadLines(io.BytesIO(make_pdf(["page one text", "page two text"])), "pdf")
+    iterator = iter(lines)
+
+    assert next(iterator) == "page one text"
+    assert lines.progress == 0.5
+    assert list(iterator) == ["page two text"]
+    assert lines.progress == 1.0
+
+
+def test_unsupported_extension_is_rejected():
+    with pytest.raises(ValueError):
+        UploadLines(io.BytesIO(b""), "docx")
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_line_results_are_yielded_per_chunk_in_order(workers):
+    scored = []
+
+    def score_fn(texts):
+        scored.append(list(texts))
+        return [{"toxicity": 0.9 if "bad" in text else 0.1} for text in texts]
+
+    lines = ["bad one", "ok", "fine two", "bad three", "fine four"]
+    executor = ThreadPoolExecutor(max_workers=workers) if workers else None
+    chunks = list(iter_line_results(lines, score_fn, chunk_size=2, executor=executor, prefetch=1))
+
+    assert [[row["line_number"] for row in rows] for rows in chunks] == [[1, 3], [4, 5]]
+    assert [row["is_toxic"] for rows in chunks for row in rows] == [True, False, True, False]
+    assert sorted(scored) == [["bad one", "fine two"], ["bad three", "fine four"]]
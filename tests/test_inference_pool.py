@@ -0,0 +1,123 @@
+import os
+import time
+
+import pytest
+
+from src.inference.pool import InferencePool, InferencePoolError, InferenceWorkerError
+
+
+class FakeModel:
+    """Picklable stand-in for Detoxify; "crash" kills the worker, "raise" fails the request."""
+
+    backend = "fake"
+    load_seconds = 0.0
+
+    def __init__(self, fail_to_load=False, fail_while=None):
+        if fail_to_load or (fail_while and os.path.exists(fail_while)):
+            raise OSError("checkpoint not found")
+
+    def predict(self, texts):
+        texts = [texts] if isinstance(texts, str) else texts
+        if "crash" in texts:
+            os._exit(3)
+        if "raise" in texts:
+            raise ValueError("bad input")
+        return {"toxicity": [len(text) / 100 for text in texts], "pid": [os.getpid()] * len(texts)}
+
+    def predict_batch(self, texts, batch_size=32):
+        return self.predict(texts)
+
+
+def fake_detoxify(model_type, **options):
+    """Picklable stand-in for load_detoxify in the app tests."""
+    return FakeModel()
+
+
+@pytest.fixture
+def pool():
+    pool = InferencePool(FakeModel, workers=2, attributes=("backend",), warm_up_text="warm up", timeout=30)
+    yield pool.start()
+    pool.close()
+
+
+def test_pool_scores_in_worker_processes(pool):
+    scores = pool.predict_batch(["abc", "abcdef"], batch_size=8)
+    assert scores["toxicity"] == [0.03, 0.06]
+    assert os.getpid() not in scores["pid"]
+    assert pool.backend == "fake"
+
+    # Requests spread over both replicas
+    pids = {pool.predict("x")["pid"][0] for _ in range(4)}
+    assert pids == set(pool.stats()["worker_pids"])
+    assert len(pids) == 2
+
+
+def test_worker_crash_fails_only_its_request_and_is_replaced(pool):
+    with pytest.raises(InferenceWorkerError):
+        pool.predict(["crash"])
+    assert pool.predict("still up")["toxicity"] == [0.08]
+
+    deadline = time.monotonic() + 30
+    while pool.stats()["live_workers"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    stats = pool.stats()
+    assert (stats["live_workers"], stats["worker_exits"], stats["restarts"]) == (2, 1, 1)
+
+
+def test_model_errors_are_raised_to_the_caller(pool):
+    with pytest.raises(ValueError, match="bad input"):
+        pool.predict(["raise"])
+    assert pool.stats()["worker_exits"] == 0
+
+
+def test_pool_reports_workers_that_cannot_load():
+    from functools import partial
+
+    pool = InferencePool(partial(FakeModel, fail_to_load=True), workers=1)
+    with pytest.raises(InferencePoolError, match="checkpoint not found"):
+        pool.start()
+
+
+def test_failed_start_is_not_retried_until_the_backoff_expires():
+    from functools import partial
+
+    pool = InferencePool(partial(FakeModel, fail_to_load=True), workers=2, retry_seconds=60)
+    with pytest.raises(InferencePoolError, match="checkpoint not found"):
+        pool.predict("first")
+
+    start = time.perf_counter()
+    with pytest.raises(InferencePoolError, match="next start attempt in"):
+        pool.predict("second")
+    assert time.perf_counter() - start < 0.5
+
+
+def test_worker_that_cannot_be_restarted_is_retried(tmp_path):
+    from functools import partial
+
+    broken = tmp_path / "broken"
+    pool = InferencePool(partial(FakeModel, fail_while=str(broken)), workers=1, retry_seconds=0.1, timeout=30)
+    pool.start()
+    try:
+        broken.touch()
+        with pytest.raises(InferenceWorkerError):
+            pool.predict(["crash"])
+
+        deadline = time.monotonic() + 30
+        while pool.stats()["failed_restarts"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert pool.stats()["live_workers"] == 0
+        broken.unlink()
+
+        while pool.stats()["live_workers"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert pool.predict("back")["toxicity"] == [0.04]
+        assert pool.stats()["restarts"] == 1
+    finally:
+        pool.close()
+
+
+def test_closed_pool_rejects_requests(pool):
+    pool.close()
+    with pytest.raises(InferencePoolError):
+        pool.predict("late")
+    assert pool.stats()["live_workers"] == 0
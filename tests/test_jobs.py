@@ -0,0 +1,50 @@
+import io
+
+import mongomock
+import pytest
+
+from src.extraction import UploadLines
+from src.jobs.manager import COMPLETED, FAILED, JobManager, serialize_job
+
+
+def fake_scores(texts):
+    return [{"toxicity": 0.9 if "idiot" in text else 0.1, "insult": 0.0} for text in texts]
+
+
+@pytest.fixture
+def manager():
+    database = mongomock.MongoClient()["senti_clean"]
+    manager = JobManager(database["jobs"], database["job_results"], fake_scores, max_workers=1, chunk_size=2)
+    yield manager
+    manager.close()
+
+
+def test_job_scores_lines_in_chunks_and_pages_results(manager):
+    data = b"you idiot\nhello there\nok\n\nnice work\nidiot again\n"
+    job_id = manager.submit("comments.txt", lambda: UploadLines(io.BytesIO(data), "txt"))
+    manager.wait(job_id, timeout=10)
+
+    job = serialize_job(manager.get(job_id))
+    assert job["status"] == COMPLETED
+    assert job["total_lines"] == 5
+    assert job["analyzed_lines"] == 4
+    assert job["processed_lines"] == 4
+    assert job["progress"] == 1.0
+    assert (job["toxic_count"], job["safe_count"]) == (2, 2)
+
+    first_page = manager.get_results(job_id, offset=0, limit=3)
+    second_page = manager.get_results(job_id, offset=3, limit=3)
+    assert [row["line_number"] for row in first_page] == [1, 2, 4]
+    assert [row["line_number"] for row in second_page] == [5]
+    assert first_page[0]["is_toxic"] is True
+    assert "job_id" not in first_page[0]
+
+
+def test_job_failure_is_recorded(manager):
+    job_id = manager.submit("empty.txt", lambda: UploadLines(io.BytesIO(b"\n  \n"), "txt"))
+    manager.wait(job_id, timeout=10)
+
+    job = serialize_job(manager.get(job_id))
+    assert job["status"] == FAILED
+    assert job["error"] == "No text found in file"
+    assert job["total_lines"] is None
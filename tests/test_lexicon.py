@@ -0,0 +1,54 @@
+import os
+import time
+
+from src.lexicon import Redactor, compile_lexicon, load_lexicon
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_longest_term_wins_in_one_pass():
+    redactor = Redactor(["hell", "ass", "asshole", "assholes"])
+    cleaned, found = redactor.redact("You ASSHOLE, hello there, ass.")
+
+    assert cleaned == "You [REDACTED], [REDACTED]o there, [REDACTED]."
+    assert found == ["hell", "ass", "asshole"]
+
+
+def test_empty_lexicon_matches_nothing():
+    assert Redactor([]).redact("anything") == ("anything", [])
+    assert compile_lexicon([]).search("anything") is None
+
+
+def test_thousands_of_terms_compile_into_one_pattern():
+    terms = [f"term{i}x" for i in range(5000)]
+    pattern = compile_lexicon(terms)
+
+    assert pattern.findall("a term42x and TERM4999X but not term5000x") == ["term42x", "TERM4999X"]
+
+
+def test_lexicon_file_is_hot_reloaded(tmp_path):
+    path = tmp_path / "lexicon.txt"
+    path.write_text("# toxic terms\nidiot\n\nmoron\n", encoding="utf-8")
+    assert load_lexicon(str(path)) == ["idiot", "moron"]
+
+    clock = FakeClock()
+    redactor = Redactor(["fallback"], path=str(path), reload_interval=5, clock=clock)
+    assert redactor.terms == ["idiot", "moron"]
+
+    path.write_text("jerk\n", encoding="utf-8")
+    future = time.time() + 10
+    os.utime(path, (future, future))
+    assert redactor.redact("you jerk") == ("you jerk", [])
+
+    clock.now = 5
+    assert redactor.redact("you jerk") == ("you [REDACTED]", ["jerk"])
+
+    path.unlink()
+    clock.now = 10
+    assert redactor.redact("you jerk") == ("you [REDACTED]", ["jerk"])
@@ -0,0 +1,221 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from groq import BadRequestError
+
+from rewriter import GroqRewriter, HybridRewriter
+from src.crisis.chatbot import CrisisChatbot
+from src.llm.client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LLMClient,
+    LLMClientError,
+    LLMTimeoutError,
+    get_shared_client,
+)
+from src.llm.health import HealthProber
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+@pytest.fixture
+def make_client(groq_stub):
+    clients = []
+
+    def make(**kwargs):
+        kwargs.setdefault("backoff_base", 0.001)
+        client = LLMClient("test-key", base_url=groq_stub.base_url, **kwargs)
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def test_complete_returns_message_content(make_client, groq_stub):
+    client = make_client()
+
+    assert client.complete(MESSAGES, model="m", max_tokens=5) == "Please reconsider your wording."
+    assert groq_stub.requests[-1]["max_tokens"] == 5
+    assert asyncio.run(client.acomplete(MESSAGES, model="m")) == "Please reconsider your wording."
+
+
+def test_concurrency_is_capped(make_client, groq_stub):
+    client = make_client(max_concurrency=2)
+    groq_stub.delay = 0.2
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda _: client.complete(MESSAGES, model="m"), range(4)))
+
+    assert time.perf_counter() - start >= 0.4
+    assert client.stats()["requests"] == 4
+
+
+def test_blocking_calls_give_up_when_the_loop_is_stuck_or_gone(make_client):
+    client = make_client(timeout=0.2, max_retries=0, backoff_max=0)
+    assert client.deadline() == pytest.approx(0.2)
+    client.ping()  # the loop thread starts with the first request
+
+    client._loop.call_soon_threadsafe(time.sleep, 0.6)  # something blocking the loop thread
+    start = time.perf_counter()
+    with pytest.raises(LLMClientError, match="within"):
+        client.complete(MESSAGES, model="m")
+    assert time.perf_counter() - start < 0.5
+    assert client.stats()["timeouts"] == 1
+    time.sleep(0.6)
+
+    client._loop.call_soon_threadsafe(client._loop.stop)
+    client._thread.join(5)
+    with pytest.raises(LLMClientError, match="not running"):
+        client.complete(MESSAGES, model="m")
+    with pytest.raises(LLMClientError):
+        client.ping()
+
+
+def test_abandoned_half_open_trial_frees_the_breaker(make_client, groq_stub):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    client = make_client(timeout=5, max_retries=0, breaker=breaker)
+    assert breaker.state == "half_open"
+
+    # The trial call is cancelled when its blocking caller stops waiting
+    groq_stub.delay = 1.0
+    with pytest.raises(LLMClientError, match="within"):
+        client._wait(client._complete(MESSAGES, "m", {}), 0.1)
+    deadline = time.monotonic() + 5
+    while client.stats()["failures"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    groq_stub.delay = 0.0
+    assert client.complete(MESSAGES, model="m") == "Please reconsider your wording."
+    assert breaker.state == "closed"
+
+
+def test_waiting_for_a_connection_counts_against_the_timeout(make_client, groq_stub):
+    client = make_client(timeout=0.3, max_concurrency=1, max_retries=0)
+    groq_stub.delay = 0.2
+
+    async def two_calls():
+        calls = [client.acomplete(MESSAGES, model="m") for _ in range(2)]
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    start = time.perf_counter()
+    first, second = asyncio.run(two_calls())
+    # The second call queues behind the first and runs out of time 0.3s after it
+    # was made, not 0.3s after it got the connection
+    assert first == "Please reconsider your wording."
+    assert isinstance(second, LLMTimeoutError)
+    assert time.perf_counter() - start < 0.45
+
+
+def test_server_errors_are_retried(make_client, groq_stub):
+    replies = iter([(503, "busy"), (500, "oops"), (200, "fine")])
+    groq_stub.reply = lambda body: next(replies)
+    client = make_client(max_retries=3)
+
+    assert client.complete(MESSAGES, model="m") == "fine"
+    assert client.stats()["retries"] == 2
+
+
+def test_client_errors_are_not_retried(make_client, groq_stub):
+    groq_stub.reply = lambda body: (400, "bad request")
+    client = make_client(breaker=CircuitBreaker(failure_threshold=1))
+
+    with pytest.raises(BadRequestError):
+        client.complete(MESSAGES, model="m")
+    assert len(groq_stub.requests) == 1
+    assert client.stats()["circuit"] == "closed"
+
+
+def test_circuit_opens_after_repeated_failures(make_client, groq_stub):
+    groq_stub.reply = lambda body: (500, "down")
+    client = make_client(max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_seconds=60))
+
+    for _ in range(2):
+        with pytest.raises(Exception):
+            client.complete(MESSAGES, model="m")
+    with pytest.raises(CircuitOpenError):
+        client.complete(MESSAGES, model="m")
+
+    assert len(groq_stub.requests) == 2
+    assert client.stats()["rejected"] == 1
+    assert client.stats()["circuit"] == "open"
+
+
+def test_circuit_breaker_lets_one_trial_through_after_reset():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 10.0
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now[0] = 20.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_shared_client_is_reused(groq_stub):
+    first = get_shared_client("shared-key", base_url=groq_stub.base_url)
+    assert get_shared_client("shared-key", base_url=groq_stub.base_url) is first
+    assert get_shared_client("other-key", base_url=groq_stub.base_url) is not first
+
+
+def test_chatbot_replies_through_the_client(make_client, groq_stub):
+    chatbot = CrisisChatbot("test-key", llm_client=make_client())
+    message = "I feel so alone and I cant sleep"
+
+    reply = chatbot.respond(message, [], {"country": "US"})
+
+    assert reply["message"] == "Please reconsider your wording."
+    assert reply["risk_assessment"]["risk_level"] == "MEDIUM"
+    assert "risk level MEDIUM" in groq_stub.requests[-1]["messages"][-1]["content"]
+
+    groq_stub.reply = lambda body: (400, "bad request")
+    assert chatbot.respond(message, [], {})["message"] == chatbot._fallback_response("MEDIUM")
+
+
+def test_health_prober_caches_the_latest_outcome():
+    outcomes = iter([RuntimeError("unreachable"), RuntimeError("unreachable"), None])
+
+    def check():
+        error = next(outcomes)
+        if error:
+            raise error
+
+    prober = HealthProber(check, interval=60)
+    assert prober.status()["status"] == "unknown"
+    prober.probe()
+    status = prober.probe()
+    assert status["status"] == "down"
+    assert status["consecutive_failures"] == 2
+    assert prober.is_down
+
+    assert prober.probe()["status"] == "up"
+    assert prober.status()["error"] is None
+
+
+def test_groq_rewriter_does_not_call_the_api_on_startup(make_client, groq_stub):
+    groq_stub.healthy = False
+    client = make_client()
+    rewriter = HybridRewriter(groq_api_key="test-key", groq_base_url=groq_stub.base_url)
+    rewriter.groq = GroqRewriter(llm_client=client)
+
+    assert groq_stub.requests == []
+    assert rewriter.groq.is_available
+
+    client.health.probe()
+    assert rewriter.groq.health_status()["status"] == "down"
+    assert rewriter.rewrite("you idiot")["method_used"] == "rules"
+    assert groq_stub.requests == []
@@ -1,11 +1,18 @@
+import os
+
+import pytest
+import torch
 from detoxify.detoxify import (
     Detoxify,
+    artifact_path,
     multilingual_toxic_xlm_r,
+    quantized_checkpoint_path,
     toxic_albert,
     toxic_bert,
     unbiased_albert,
     unbiased_toxic_roberta,
 )
+from detoxify.quantization import score_drift
 from transformers import (
     AlbertForSequenceClassification,
     BertForSequenceClassification,
@@ -92,3 +99,106 @@ def test_multilingual():
     assert all(cl in results for cl in CLASSES)
     assert results["toxicity"][0] >= 0.7
     assert results["toxicity"][1] < 0.5
+
+
+def test_predict_batch_matches_predict(tiny_checkpoint):
+    checkpoint, hf_dir = tiny_checkpoint
+    model = Detoxify(checkpoint=checkpoint, huggingface_config_path=hf_dir)
+    texts = ["you are a liar", "nice", "shut up you are a liar liar liar", "the day", "up"]
+
+    batched = model.predict_batch(texts, batch_size=2)
+    assert list(batched) == model.class_names
+    for i, text in enumerate(texts):
+        single = model.predict(text)
+        for cla in model.class_names:
+            assert abs(batched[cla][i] - single[cla]) < 1e-5
+
+
+def test_predict_batch_returns_lists(tiny_checkpoint):
+    checkpoint, hf_dir = tiny_checkpoint
+    model = Detoxify(checkpoint=checkpoint, huggingface_config_path=hf_dir)
+    assert all(isinstance(v, list) and len(v) == 1 for v in model.predict_batch(["nice day"]).values())
+    assert all(v == [] for v in model.predict_batch([]).values())
+
+
+def test_int8_quantized_model(tiny_checkpoint, tmp_path):
+    checkpoint, hf_dir = tiny_checkpoint
+    cache_dir = str(tmp_path / "cache")
+    texts = ["you are a liar", "nice day", "shut up"]
+
+    reference = Detoxify(checkpoint=checkpoint, huggingface_config_path=hf_dir)
+    quantized = Detoxify(checkpoint=checkpoint, huggingface_config_path=hf_dir, quantize="int8", cache_dir=cache_dir)
+    assert quantized.quantize == "int8"
+    assert isinstance(quantized.model.classifier, torch.ao.nn.quantized.dynamic.Linear)
+
+    cache_path = quantized_checkpoint_path(checkpoint=checkpoint, quantize="int8", cache_dir=cache_dir)
+    assert os.path.isfile(cache_path)
+    cached = Detoxify(checkpoint=checkpoint, huggingface_config_path=hf_dir, quantize="int8", cache_dir=cache_dir)
+    assert cached.predict_batch(texts) == quantized.predict_batch(texts)
+
+    drift = score_drift(reference, quantized, texts)
+    assert list(drift) == reference.class_names
+    assert all(value < 0.05 for value in drift.values())
+
+
+def test_quantize_rejects_unknown_mode(tiny_checkpoint):
+    checkpoint, hf_dir = tiny_checkpoint
+    with pytest.raises(ValueError):
+        Detoxify(checkpoint=checkpoint, huggingface_config_path=hf_dir, quantize="int4")
+
+
+@pytest.mark.parametrize("backend", ["torchscript", "onnx"])
+def test_exported_backend_matches_eager(tiny_checkpoint, tmp_path, backend):
+    if backend == "onnx":
+        pytest.importorskip("onnxruntime")
+    checkpoint, hf_dir = tiny_checkpoint
+    texts = ["you are a liar", "nice day", "shut up you are a liar liar liar liar"]
+
+    eager = Detoxify(checkpoint=checkpoint, huggingface_config_path=hf_dir)
+    graph = Detoxify(
+        checkpoint=checkpoint, huggingface_config_path=hf_dir, backend=backend, cache_dir=str(tmp_path / "cache")
+    )
+    assert graph.backend == backend
+    assert graph.class_names == eager.class_names
+    assert all(value < 1e-4 for value in score_drift(eager, graph, texts).values())
+    single = graph.predict("nice day")
+    assert abs(single["toxicity"] - eager.predict("nice day")["toxicity"]) < 1e-4
+
+
+def test_artifact_store_loads_offline(tiny_checkpoint, tmp_path, monkeypatch):
+    checkpoint, hf_dir = tiny_checkpoint
+    cache_dir = str(tmp_path / "cache")
+    texts = ["you are a liar", "nice day"]
+
+    first = Detoxify(checkpoint=checkpoint, huggingface_config_path=hf_dir, artifact_store=True, cache_dir=cache_dir)
+    artifact_dir = artifact_path(checkpoint=checkpoint, cache_dir=cache_dir)
+    assert os.path.isfile(os.path.join(artifact_dir, "model.safetensors"))
+    assert first.load_seconds > 0
+
+    def no_checkpoint(*args, **kwargs):
+        raise AssertionError("stored artifacts should be used")
+
+    monkeypatch.setattr("detoxify.detoxify.read_checkpoint", no_checkpoint)
+    second = Detoxify(checkpoint=checkpoint, artifact_store=True, cache_dir=cache_dir)
+    assert second.class_names == first.class_names
+    assert second.predict_batch(texts) == pytest.approx(first.predict_batch(texts))
+
+
+def test_mmap_weights_match_eager_scores(tiny_checkpoint, tmp_path):
+    checkpoint, hf_dir = tiny_checkpoint
+    cache_dir = str(tmp_path / "cache")
+    texts = ["you are a liar", "nice day"]
+
+    eager = Detoxify(checkpoint=checkpoint, huggingface_config_path=hf_dir)
+    mapped = Detoxify(
+        checkpoint=checkpoint,
+        huggingface_config_path=hf_dir,
+        artifact_store=True,
+        mmap_weights=True,
+        cache_dir=cache_dir,
+    )
+    assert mapped.mmap_weights
+    assert mapped.predict_batch(texts) == pytest.approx(eager.predict_batch(texts))
+
+    with pytest.raises(ValueError):
+        Detoxify(checkpoint=checkpoint, huggingface_config_path=hf_dir, mmap_weights=True)
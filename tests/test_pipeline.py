@@ -0,0 +1,68 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.pipeline import Stage, StageGraph
+
+
+def sleeper(value, seconds=0.1):
+    def run(**_):
+        time.sleep(seconds)
+        return value
+
+    return run
+
+
+def test_independent_stages_run_concurrently():
+    graph = StageGraph(
+        [
+            Stage("a", sleeper("a")),
+            Stage("b", sleeper("b")),
+            Stage("c", sleeper("c")),
+            Stage("joined", lambda a, b: a + b, after=("a", "b")),
+        ]
+    )
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        run = graph.run(executor)
+
+    assert run.results == {"a": "a", "b": "b", "c": "c", "joined": "ab"}
+    assert set(run.timings_ms) == {"a", "b", "c", "joined"}
+    assert run.timings_ms["a"] >= 100
+    assert run.total_ms < 250
+
+
+def test_without_executor_stages_run_in_dependency_order_on_caller_thread():
+    threads = []
+
+    def record(name):
+        def run(**_):
+            threads.append((name, threading.current_thread().name))
+            return name
+
+        return run
+
+    graph = StageGraph([Stage("late", record("late"), after=("early",)), Stage("early", record("early"))])
+    run = graph.run()
+
+    assert [name for name, _ in threads] == ["early", "late"]
+    assert {thread for _, thread in threads} == {threading.current_thread().name}
+    assert run.results["late"] == "late"
+
+
+def test_stage_errors_propagate():
+    def fail():
+        raise RuntimeError("boom")
+
+    graph = StageGraph([Stage("bad", fail), Stage("after_bad", lambda bad: bad, after=("bad",))])
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        with pytest.raises(RuntimeError, match="boom"):
+            graph.run(executor)
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError, match="unknown"):
+        StageGraph([Stage("a", lambda missing: missing, after=("missing",))])
+    with pytest.raises(ValueError, match="cycle"):
+        StageGraph([Stage("a", lambda b: b, after=("b",)), Stage("b", lambda a: a, after=("a",))])
@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from rewriter import HybridRewriter
+from src.cache import SqliteCacheBackend
+from src.rewriting.cache import RewriteCache
+
+
+def test_rewrite_cache_keys_on_normalized_text_method_and_version():
+    cache = RewriteCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "Please reconsider."
+
+    assert cache.get_or_compute("you  idiot ", "groq", "1", compute) == "Please reconsider."
+    assert cache.get_or_compute("you idiot", "groq", "1", compute) == "Please reconsider."
+    assert len(calls) == 1
+
+    cache.get_or_compute("you idiot", "groq", "2", compute)
+    cache.get_or_compute("you idiot", "rules", "1", compute)
+    assert len(calls) == 3
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["hit_ratio"] == 0.25
+
+
+def test_concurrent_identical_requests_share_one_call():
+    cache = RewriteCache()
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "Please reconsider."
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("you idiot", "groq", "1", compute)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    while cache.stats()["coalesced"] + 1 < len(threads):
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ["Please reconsider."] * 8
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 7
+
+
+def test_failed_call_is_raised_to_waiters_and_not_cached():
+    cache = RewriteCache()
+
+    def fail():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("you idiot", "groq", "1", fail)
+    assert cache.get_or_compute("you idiot", "groq", "1", lambda: "ok") == "ok"
+    assert cache.stats()["size"] == 1
+
+
+def test_hits_count_saved_latency():
+    cache = RewriteCache()
+
+    def slow():
+        time.sleep(0.05)
+        return "ok"
+
+    cache.get_or_compute("you idiot", "groq", "1", slow)
+    cache.get_or_compute("you idiot", "groq", "1", slow)
+    cache.get_or_compute("you idiot", "groq", "1", slow)
+    assert cache.stats()["saved_seconds"] >= 0.1
+
+
+def test_persistent_tier_survives_a_new_cache(tmp_path):
+    path = str(tmp_path / "rewrites.sqlite")
+    first = RewriteCache(persistent_backend=SqliteCacheBackend(path, table="rewrites"))
+    first.get_or_compute("you idiot", "groq", "1", lambda: "Please reconsider.")
+
+    second = RewriteCache(persistent_backend=SqliteCacheBackend(path, table="rewrites"))
+    assert second.get_or_compute("you idiot", "groq", "1", lambda: "recomputed") == "Please reconsider."
+    assert second.stats()["persistent_hits"] == 1
+
+
+def test_sqlite_backend_expires_entries(tmp_path):
+    now = [0.0]
+    backend = SqliteCacheBackend(str(tmp_path / "cache.sqlite"), clock=lambda: now[0])
+    backend.set("k", {"text": "v"}, ttl_seconds=10)
+    assert backend.get("k") == {"text": "v"}
+    now[0] = 10.0
+    assert backend.get("k") is None
+    assert backend.purge_expired() == 1
+
+
+def test_hybrid_rewriter_reuses_cached_groq_rewrite(groq_stub):
+    rewriter = HybridRewriter(groq_api_key="test-key", groq_base_url=groq_stub.base_url, cache=RewriteCache())
+    sent = len(groq_stub.requests)
+
+    first = rewriter.rewrite("You idiot!")
+    second = rewriter.rewrite("  You   idiot! ")
+
+    assert first["method_used"] == second["method_used"] == "groq"
+    assert second["rewritten_text"] == first["rewritten_text"]
+    assert len(groq_stub.requests) == sent + 1
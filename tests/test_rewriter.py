@@ -0,0 +1,91 @@
+import json
+import re
+
+from rewriter import HybridRewriter, RuleBasedRewriter, pack_batches, parse_batch_reply
+from src.rewriting.cache import RewriteCache
+
+
+def test_rule_rewriter_replaces_whole_words_in_one_pass():
+    rewriter = RuleBasedRewriter()
+
+    assert rewriter.rewrite("You stupid idiots made this crap") == (
+        "I believe you inexperienced team members made this unsatisfactory."
+    )
+    assert rewriter.rewrite("brain-dead ASSHOLES developed this") == "Brain-dead people developed this."
+    assert rewriter.rewrite("the class passed") == "The class passed."
+    assert rewriter.rewrite("this f*ck   thing is shit") == "This very thing is poor."
+
+
+def test_rule_tables_load_from_file(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"replacements": {"Meh": "fine", "gross": "unpleasant"}}), encoding="utf-8")
+    rewriter = RuleBasedRewriter(str(path))
+
+    assert rewriter.rewrite("meh food, GROSS idiot") == "I believe fine food, unpleasant idiot."
+
+
+def batch_items(body):
+    match = re.search(r"^\{.*\}$", body["messages"][0]["content"], re.MULTILINE)
+    return json.loads(match.group(0)) if match else {}
+
+
+def polite_batch(body):
+    return 200, json.dumps({key: f"Polite {key}." for key in batch_items(body)})
+
+
+def test_rewrite_many_packs_texts_into_batched_requests(groq_stub):
+    groq_stub.reply = polite_batch
+    rewriter = HybridRewriter(groq_api_key="test-key", groq_base_url=groq_stub.base_url)
+    sent = len(groq_stub.requests)
+    texts = [f"you idiot number {i}" for i in range(10)]
+
+    results = rewriter.rewrite_many(texts + texts[:2], max_prompt_tokens=50)
+
+    batches = [batch_items(body) for body in groq_stub.requests[sent:]]
+    assert [len(batch) for batch in batches] == [5, 5]
+    assert batches[0]["1"] == "you idiot number 0"
+    assert [r["method_used"] for r in results] == ["groq"] * 12
+    assert results[6]["rewritten_text"] == "Polite 2."
+    assert results[10] == results[0]
+
+
+def test_rewrite_many_falls_back_per_item(groq_stub):
+    rewriter = HybridRewriter(groq_api_key="test-key", groq_base_url=groq_stub.base_url)
+    groq_stub.reply = lambda body: (200, "Sure! ```json\n" + json.dumps({"1": "Please stop.", "3": ""}) + "\n```")
+
+    results = rewriter.rewrite_many(["you idiot", "this is crap", "shut up"])
+
+    assert [r["method_used"] for r in results] == ["groq", "rules", "rules"]
+    assert results[0]["rewritten_text"] == "Please stop."
+    assert results[1]["rewritten_text"] == RuleBasedRewriter().rewrite("this is crap")
+    assert results[1]["error"] == "Missing from Groq batch reply"
+
+
+def test_rewrite_many_uses_rules_when_the_request_fails(groq_stub):
+    rewriter = HybridRewriter(groq_api_key="test-key", groq_base_url=groq_stub.base_url)
+    groq_stub.reply = lambda body: (400, "bad request")
+
+    results = rewriter.rewrite_many(["you idiot", "shut up"])
+
+    assert [r["method_used"] for r in results] == ["rules", "rules"]
+    assert all(r["success"] and r["error"] for r in results)
+
+
+def test_rewrite_many_reuses_and_fills_the_cache(groq_stub):
+    groq_stub.reply = polite_batch
+    cache = RewriteCache()
+    rewriter = HybridRewriter(groq_api_key="test-key", groq_base_url=groq_stub.base_url, cache=cache)
+    rewriter.rewrite_many(["you idiot", "shut up"])
+    sent = len(groq_stub.requests)
+
+    results = rewriter.rewrite_many(["you  idiot", "go away"])
+
+    assert batch_items(groq_stub.requests[sent]) == {"1": "go away"}
+    assert results[0]["rewritten_text"] == "Polite 1."
+    assert cache.stats()["hits"] == 1
+
+
+def test_pack_batches_and_parse_batch_reply():
+    assert list(pack_batches(["a" * 40, "b", "c", "d" * 400], max_tokens=19)) == [["a" * 40], ["b", "c"], ["d" * 400]]
+    assert parse_batch_reply('{"1": "ok", "2": 3}', 3) == ["ok", None, None]
+    assert parse_batch_reply("not json", 2) == [None, None]
@@ -0,0 +1,59 @@
+import csv
+import json
+import os
+
+import pytest
+from run_prediction import stream_predictions
+
+
+class FakeModel:
+    def __init__(self, fail_after=None):
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def predict_batch(self, texts, batch_size=32):
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise RuntimeError("worker killed")
+        self.calls += 1
+        return {
+            "toxicity": [len(text) / 100 for text in texts],
+            "insult": [0.5 for _ in texts],
+        }
+
+
+def write_lines(path, count):
+    path.write_text("".join(f"comment number {i}\n" for i in range(count)), encoding="utf-8")
+
+
+def test_stream_predictions_writes_csv_in_chunks(tmp_path):
+    input_file = tmp_path / "comments.txt"
+    write_lines(input_file, 10)
+    dest = tmp_path / "out.csv"
+    model = FakeModel()
+
+    assert stream_predictions(model, str(input_file), str(dest), chunk_size=3) == 10
+    assert model.calls == 4
+
+    rows = list(csv.reader(dest.open(newline="")))
+    assert rows[0] == ["input_text", "toxicity", "insult"]
+    assert [row[0] for row in rows[1:]] == [f"comment number {i}" for i in range(10)]
+    assert not os.path.exists(str(dest) + ".ckpt")
+
+
+def test_stream_predictions_resumes_after_interruption(tmp_path):
+    input_file = tmp_path / "comments.txt"
+    write_lines(input_file, 10)
+    dest = tmp_path / "out.jsonl"
+
+    with pytest.raises(RuntimeError):
+        stream_predictions(FakeModel(fail_after=2), str(input_file), str(dest), chunk_size=3)
+    checkpoint = json.loads((tmp_path / "out.jsonl.ckpt").read_text())
+    assert checkpoint["lines_done"] == 6
+
+    resumed = FakeModel()
+    assert stream_predictions(resumed, str(input_file), str(dest), chunk_size=3, resume=True) == 10
+    assert resumed.calls == 2
+
+    rows = [json.loads(line) for line in dest.read_text(encoding="utf-8").splitlines()]
+    assert [row["input_text"] for row in rows] == [f"comment number {i}" for i in range(10)]
+    assert rows[0]["toxicity"] == pytest.approx(0.16)
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+import torch
+
+from src.inference.runtime import RuntimeConfig, apply_runtime, available_cpus, parse_cpu_list, split_cpus
+
+
+def test_parse_cpu_list():
+    assert parse_cpu_list("0-3,8, 10-11") == (0, 1, 2, 3, 8, 10, 11)
+    assert parse_cpu_list("2,2,1") == (1, 2)
+    assert parse_cpu_list("") == ()
+
+
+def test_split_cpus_into_disjoint_slices():
+    assert split_cpus(range(8), 2) == [(0, 1, 2, 3), (4, 5, 6, 7)]
+    assert split_cpus(range(8), 3) == [(0, 1, 2), (3, 4, 5), (6, 7)]
+    assert split_cpus([0, 1], 3) == [(0,), (1,), (0,)]
+    with pytest.raises(ValueError):
+        split_cpus(range(4), 0)
+
+
+def test_worker_config_uses_its_share_of_the_cpus():
+    config = RuntimeConfig.for_worker(1, 2, cpu_affinity="0-7")
+    assert config == RuntimeConfig(intra_op_threads=4, cpu_affinity=(4, 5, 6, 7))
+
+    config = RuntimeConfig.for_worker(1, 2, intra_op_threads=2, inter_op_threads=1, cpu_affinity="0-7")
+    assert (config.intra_op_threads, config.inter_op_threads) == (2, 1)
+
+    # Without pinning the thread count still follows the worker's share
+    unpinned = RuntimeConfig.for_worker(0, 1)
+    assert unpinned.cpu_affinity == ()
+    assert unpinned.intra_op_threads == len(available_cpus())
+
+
+def test_apply_runtime_reports_the_layout():
+    threads = torch.get_num_threads()
+    try:
+        layout = apply_runtime(RuntimeConfig(intra_op_threads=1, cpu_affinity=available_cpus()))
+    finally:
+        torch.set_num_threads(threads)
+
+    assert layout["pid"] == os.getpid()
+    assert layout["intra_op_threads"] == 1
+    assert layout["cpu_affinity"] == list(available_cpus())
+    assert layout["inter_op_threads"] >= 1
@@ -0,0 +1,82 @@
+import mongomock
+
+from src.cache import LRUCache
+from src.inference.cache import MongoCacheBackend, ScoreCache, normalize_text
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=2, ttl_seconds=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_expires_entries():
+    clock = FakeClock()
+    cache = LRUCache(max_size=10, ttl_seconds=5, clock=clock)
+    cache.set("a", 1)
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_score_cache_keys_on_normalized_text_and_model():
+    cache = ScoreCache("unbiased:fp32:torch")
+    cache.set("you  are a LIAR ", {"toxicity": 0.9})
+
+    assert normalize_text(" you\tare  a LIAR\n") == "you are a LIAR"
+    assert cache.get("you are a LIAR") == {"toxicity": 0.9}
+    assert cache.get("you are a liar") is None
+    assert ScoreCache("unbiased:int8:torch").get("you are a LIAR") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_shared_backend_is_consulted_and_promoted():
+    collection = mongomock.MongoClient()["senti_clean"]["score_cache"]
+    writer = ScoreCache("m", shared_backend=MongoCacheBackend(collection))
+    reader = ScoreCache("m", shared_backend=MongoCacheBackend(collection))
+
+    writer.set("spam wave", {"toxicity": 0.7})
+    assert reader.get("spam wave") == {"toxicity": 0.7}
+    assert reader.get("spam wave") == {"toxicity": 0.7}
+
+    stats = reader.stats()
+    assert stats["shared_hits"] == 1
+    assert stats["local_hits"] == 1
+
+
+def test_shared_backend_failures_are_misses():
+    class BrokenBackend:
+        def get(self, key):
+            raise ConnectionError("down")
+
+        def set(self, key, value, ttl_seconds):
+            raise ConnectionError("down")
+
+    cache = ScoreCache("m", shared_backend=BrokenBackend())
+    cache.set("text", {"toxicity": 0.1})
+    assert cache.get("text") == {"toxicity": 0.1}
+    assert cache.get("other") is None
+    assert cache.stats()["shared_errors"] == 2
@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from src.inference.cache import ScoreCache
+from src.inference.scoring import score_texts
+
+
+class CountingModel:
+    def __init__(self):
+        self.seen = []
+
+    def predict_batch(self, texts, batch_size=32):
+        self.seen.extend(texts)
+        return {"toxicity": [len(text) / 100 for text in texts]}
+
+
+def test_duplicates_are_scored_once():
+    model = CountingModel()
+    texts = ["spam", "hello there", "spam", "spam", "hello there"]
+
+    results = score_texts(texts, model.predict_batch)
+
+    assert sorted(model.seen) == ["hello there", "spam"]
+    assert [r["toxicity"] for r in results] == [0.04, 0.11, 0.04, 0.04, 0.11]
+    results[0]["toxicity"] = 1.0
+    assert results[2]["toxicity"] == 0.04
+
+
+def test_cached_texts_skip_inference():
+    model = CountingModel()
+    cache = ScoreCache("m")
+    cache.set("spam", {"toxicity": 0.9})
+
+    results = score_texts(["spam", "fresh"], model.predict_batch, cache=cache)
+
+    assert model.seen == ["fresh"]
+    assert results == [{"toxicity": 0.9}, {"toxicity": 0.05}]
+    assert cache.get("fresh") == {"toxicity": 0.05}
+
+
+def test_chunks_run_on_executor_in_order():
+    model = CountingModel()
+    texts = [f"line {i}" * (i % 3 + 1) for i in range(50)]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = score_texts(texts, model.predict_batch, executor=executor, chunk_size=7)
+
+    assert [r["toxicity"] for r in results] == [len(text) / 100 for text in texts]
+    assert len(model.seen) == len(set(texts))